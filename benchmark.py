@@ -0,0 +1,798 @@
+# benchmark.py
+#
+# Benchmark offline do bot: executa os fluxos reais (/config, /card, /busca, /resolvido e a paginação)
+# contra versões em memória do Notion, do Discord e do Gemini, com latência e limite de taxa configuráveis.
+# Nenhuma chamada sai da máquina. O relatório (JSON) inclui o commit atual, para comparar versões:
+#
+#   python benchmark.py --users 10 --iterations 5 --output resultado.json
+#   python benchmark.py --compare resultado.json
+
+import os
+import sys
+import json
+import copy
+import time
+import uuid
+import random
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+from collections import Counter, deque
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from typing import Optional, Dict, Any, List, Callable, Awaitable
+
+import httpx
+import discord
+from notion_client import APIResponseError, APIErrorCode
+from google.api_core import exceptions as google_exceptions
+
+SCENARIOS = ("config", "card", "busca", "paginacao", "resolvido")
+DATABASE_ID = "0123456789abcdef0123456789abcdef"
+DATABASE_URL = f"https://www.notion.so/benchmark/{DATABASE_ID}?v=1"
+GUILD_ID = 1000
+CHANNEL_ID = 2000
+# Tempo máximo de espera pelo resultado de um job de card (em segundos)
+JOB_RESULT_TIMEOUT = 300
+
+STATUS_OPTIONS = ["A fazer", "Em andamento", "Concluído"]
+PRIORITY_OPTIONS = ["Baixa", "Média", "Alta"]
+TAG_OPTIONS = ["bug", "suporte", "financeiro", "infra", "produto"]
+WORDS = ["fatura", "acesso", "servidor", "relatório", "pagamento", "cadastro", "integração", "erro", "senha", "backup",
+         "cliente", "contrato", "planilha", "deploy", "notificação", "estoque", "pedido", "reembolso", "agenda", "login"]
+PEOPLE = ["Ana Souza", "Bruno Lima", "Carla Dias", "Diego Alves", "Elisa Rocha", "Fábio Nunes", "Gabi Martins", "Hugo Reis"]
+
+
+class RateLimiter:
+    """Janela deslizante de um segundo: `allow()` diz se a chamada cabe no limite."""
+
+    def __init__(self, per_second: float):
+        self.per_second = per_second
+        self._calls: deque = deque()
+
+    def allow(self) -> bool:
+        if self.per_second <= 0:
+            return True
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] >= 1.0:
+            self._calls.popleft()
+        if len(self._calls) >= self.per_second:
+            return False
+        self._calls.append(now)
+        return True
+
+
+async def _sleep(rng: random.Random, latency: float):
+    if latency > 0:
+        await asyncio.sleep(latency * rng.uniform(0.8, 1.2))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S.000Z')
+
+
+# --- NOTION ---
+
+class FakeNotionClient:
+    """
+    Substituto do `notion_client.AsyncClient` com uma base de dados em memória.
+    Implementa apenas os endpoints usados pelo bot; filtros, paginação por cursor e
+    `filter_properties` seguem o comportamento da API. Acima do limite de taxa responde 429.
+    """
+
+    def __init__(self, pages: int, latency: float, rate_limit: float, seed: int):
+        self.latency, self.rng = latency, random.Random(seed)
+        self.limiter = RateLimiter(rate_limit)
+        self.calls: Counter = Counter()
+        self.rate_limited = 0
+        self.schema = self._build_schema()
+        self.user_list = [{"object": "user", "id": str(uuid.UUID(int=i + 1)), "type": "person", "name": name,
+                           "person": {"email": f"{name.split()[0].lower()}@exemplo.com"}} for i, name in enumerate(PEOPLE)]
+        self.page_store: Dict[str, dict] = {}
+        for _ in range(pages):
+            self._store_page(self._random_properties())
+
+        # Endpoints com os mesmos nomes do cliente (o NotionIntegration chama, por exemplo, `pages.create`)
+        self.databases = SimpleNamespace(retrieve=self._databases_retrieve, query=self._databases_query)
+        self.pages = SimpleNamespace(create=self._pages_create, update=self._pages_update, retrieve=self._pages_retrieve)
+        self.blocks = SimpleNamespace(children=SimpleNamespace(append=self._blocks_append))
+        self.users = SimpleNamespace(list=self._users_list)
+
+    @staticmethod
+    def _build_schema() -> Dict[str, dict]:
+        options = lambda names: {"options": [{"id": f"opt{i}", "name": name} for i, name in enumerate(names)]}
+        return {
+            "Nome": {"id": "title", "name": "Nome", "type": "title", "title": {}},
+            "Descrição": {"id": "desc", "name": "Descrição", "type": "rich_text", "rich_text": {}},
+            "Status": {"id": "stat", "name": "Status", "type": "status", "status": options(STATUS_OPTIONS)},
+            "Prioridade": {"id": "prio", "name": "Prioridade", "type": "select", "select": options(PRIORITY_OPTIONS)},
+            "Tags": {"id": "tags", "name": "Tags", "type": "multi_select", "multi_select": options(TAG_OPTIONS)},
+            "Responsáveis": {"id": "resp", "name": "Responsáveis", "type": "people", "people": {}},
+            "Aberto por": {"id": "open", "name": "Aberto por", "type": "people", "people": {}},
+            "Link do tópico": {"id": "link", "name": "Link do tópico", "type": "url", "url": {}},
+            "Prazo": {"id": "prazo", "name": "Prazo", "type": "date", "date": {}},
+        }
+
+    def _random_properties(self) -> Dict[str, Any]:
+        rng = self.rng
+        return {
+            "Nome": {"title": [{"text": {"content": " ".join(rng.sample(WORDS, 3)).capitalize()}}]},
+            "Descrição": {"rich_text": [{"text": {"content": " ".join(rng.choices(WORDS, k=12))}}]},
+            "Status": {"status": {"name": rng.choice(STATUS_OPTIONS)}},
+            "Prioridade": {"select": {"name": rng.choice(PRIORITY_OPTIONS)}},
+            "Tags": {"multi_select": [{"name": tag} for tag in rng.sample(TAG_OPTIONS, 2)]},
+            "Responsáveis": {"people": [{"id": rng.choice(self.user_list)["id"]}]},
+            "Prazo": {"date": {"start": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"}},
+        }
+
+    def _materialize(self, name: str, value: dict) -> Optional[dict]:
+        """Converte uma propriedade no formato de escrita da API para o formato devolvido nas leituras."""
+        schema = self.schema.get(name)
+        if not schema:
+            return None
+        prop_type = schema["type"]
+        data = value.get(prop_type)
+        if prop_type in ("title", "rich_text"):
+            data = [dict(part, plain_text=part.get("text", {}).get("content", ""), type="text", annotations={}) for part in data or []]
+        elif prop_type == "people":
+            names = {user["id"]: user["name"] for user in self.user_list}
+            data = [{"object": "user", "id": person["id"], "name": names.get(person["id"], "")} for person in data or []]
+        return {"id": schema["id"], "type": prop_type, prop_type: data}
+
+    def _store_page(self, properties: Dict[str, Any]) -> dict:
+        page_id = str(uuid.UUID(int=self.rng.getrandbits(128)))
+        page_properties = {name: {"id": data["id"], "type": data["type"], data["type"]: None if data["type"] not in ("title", "rich_text", "multi_select", "people") else []}
+                           for name, data in self.schema.items()}
+        for name, value in properties.items():
+            materialized = self._materialize(name, value)
+            if materialized:
+                page_properties[name] = materialized
+        page = {
+            "object": "page", "id": page_id, "created_time": _now_iso(), "last_edited_time": _now_iso(),
+            "archived": False, "in_trash": False, "parent": {"type": "database_id", "database_id": DATABASE_ID},
+            "url": f"https://www.notion.so/{page_id.replace('-', '')}", "properties": page_properties,
+        }
+        self.page_store[page_id] = page
+        return page
+
+    async def _call(self, endpoint: str):
+        """Latência simulada e limite de taxa, contados por endpoint."""
+        self.calls[endpoint] += 1
+        await _sleep(self.rng, self.latency)
+        if not self.limiter.allow():
+            self.rate_limited += 1
+            response = httpx.Response(429, headers={"Retry-After": "1"}, request=httpx.Request("POST", "https://api.notion.com"))
+            raise APIResponseError(response, "Rate limited (benchmark)", APIErrorCode.RateLimited)
+
+    @staticmethod
+    def _matches(page: dict, criteria: Optional[dict]) -> bool:
+        if not criteria:
+            return True
+        if "or" in criteria:
+            return any(FakeNotionClient._matches(page, item) for item in criteria["or"])
+        if "and" in criteria:
+            return all(FakeNotionClient._matches(page, item) for item in criteria["and"])
+        if criteria.get("timestamp") == "last_edited_time":
+            return page["last_edited_time"] >= criteria["last_edited_time"]["on_or_after"][:19]
+        prop = page["properties"].get(criteria.get("property"), {})
+        prop_type = prop.get("type")
+        condition = criteria.get(prop_type) or {}
+        data = prop.get(prop_type)
+        if prop_type in ("title", "rich_text"):
+            text = "".join(part.get("plain_text", "") for part in data or [])
+            return str(condition.get("contains", "")).lower() in text.lower()
+        if prop_type in ("select", "status"):
+            return bool(data) and data.get("name") == condition.get("equals")
+        if prop_type == "multi_select":
+            return any(tag.get("name") == condition.get("contains") for tag in data or [])
+        if prop_type == "people":
+            return any(person.get("id") == condition.get("contains") for person in data or [])
+        return False
+
+    async def _databases_retrieve(self, database_id: str):
+        await self._call("databases.retrieve")
+        return {"object": "database", "id": database_id, "properties": copy.deepcopy(self.schema)}
+
+    async def _databases_query(self, database_id: str, filter: Optional[dict] = None, page_size: int = 100,
+                               start_cursor: Optional[str] = None, filter_properties: Optional[List[str]] = None, **_):
+        await self._call("databases.query")
+        matches = sorted((page for page in self.page_store.values() if not page["archived"] and self._matches(page, filter)),
+                         key=lambda page: page["last_edited_time"], reverse=True)
+        start = int(start_cursor or 0)
+        batch = copy.deepcopy(matches[start:start + page_size])
+        if filter_properties:
+            for page in batch:
+                page["properties"] = {name: prop for name, prop in page["properties"].items() if prop["id"] in filter_properties}
+        has_more = start + page_size < len(matches)
+        return {"object": "list", "results": batch, "has_more": has_more, "next_cursor": str(start + page_size) if has_more else None}
+
+    async def _pages_create(self, parent: dict, properties: dict, children: Optional[List[dict]] = None):
+        await self._call("pages.create")
+        return copy.deepcopy(self._store_page(properties))
+
+    async def _pages_update(self, page_id: str, properties: Optional[dict] = None, archived: Optional[bool] = None):
+        await self._call("pages.update")
+        page = self.page_store[page_id]
+        for name, value in (properties or {}).items():
+            materialized = self._materialize(name, value)
+            if materialized:
+                page["properties"][name] = materialized
+        if archived is not None:
+            page["archived"] = archived
+        page["last_edited_time"] = _now_iso()
+        return copy.deepcopy(page)
+
+    async def _pages_retrieve(self, page_id: str):
+        await self._call("pages.retrieve")
+        return copy.deepcopy(self.page_store[page_id])
+
+    async def _blocks_append(self, block_id: str, children: List[dict]):
+        await self._call("blocks.children.append")
+        return {"object": "list", "results": children}
+
+    async def _users_list(self, page_size: int = 100, start_cursor: Optional[str] = None):
+        await self._call("users.list")
+        return {"object": "list", "results": copy.deepcopy(self.user_list), "has_more": False, "next_cursor": None}
+
+
+# --- GEMINI ---
+
+class FakeGenerativeModel:
+    """Substituto do `genai.GenerativeModel`: responde um resumo fixo após a latência configurada."""
+
+    SUMMARY = "**Resumo:**\n- O problema foi identificado e corrigido.\n\n**Ações sugeridas:**\n- Acompanhar o próximo ciclo.\n\n**Links:**\n- https://exemplo.com/docs"
+
+    def __init__(self, latency: float, rate_limit: float, seed: int):
+        self.latency, self.rng = latency, random.Random(seed)
+        self.limiter = RateLimiter(rate_limit)
+        self.calls, self.rate_limited, self.tokens = 0, 0, 0
+
+    async def generate_content_async(self, prompt: str):
+        self.calls += 1
+        await _sleep(self.rng, self.latency)
+        if not self.limiter.allow():
+            self.rate_limited += 1
+            raise google_exceptions.ResourceExhausted("Quota exceeded (benchmark)")
+        usage = SimpleNamespace(prompt_token_count=len(prompt) // 4, candidates_token_count=len(self.SUMMARY) // 4)
+        self.tokens += usage.prompt_token_count + usage.candidates_token_count
+        return SimpleNamespace(text=self.SUMMARY, usage_metadata=usage)
+
+
+# --- DISCORD ---
+
+class FakeDiscord:
+    """Latência e contagem de chamadas compartilhadas pelos objetos falsos do Discord."""
+
+    def __init__(self, latency: float, seed: int):
+        self.latency, self.rng = latency, random.Random(seed)
+        self.calls: Counter = Counter()
+        self.channels: Dict[int, Any] = {}
+
+    async def call(self, endpoint: str):
+        self.calls[endpoint] += 1
+        await _sleep(self.rng, self.latency)
+
+    # Interface usada pelo CardJobQueue no lugar do bot
+    def get_channel(self, channel_id: int):
+        return self.channels.get(channel_id)
+
+    async def fetch_channel(self, channel_id: int):
+        await self.call("channels.fetch")
+        return self.channels[channel_id]
+
+
+class FakeUser:
+    def __init__(self, user_id: int, name: str, bot: bool = False):
+        self.id, self.name, self.display_name, self.bot = user_id, name, name, bot
+        self.mention = f"<@{user_id}>"
+
+    def __hash__(self): return hash(self.id)
+    def __eq__(self, other): return isinstance(other, FakeUser) and other.id == self.id
+
+
+class FakeMessage:
+    def __init__(self, message_id: int, author: FakeUser, content: str, attachments: Optional[list] = None):
+        self.id, self.author, self.content, self.clean_content = message_id, author, content, content
+        self.attachments = attachments or []
+        self.embeds, self.edited_at, self.created_at = [], None, discord.utils.utcnow()
+
+
+class FakeChannel:
+    def __init__(self, backend: FakeDiscord, channel_id: int, name: str):
+        self.backend, self.id, self.name = backend, channel_id, name
+
+    async def send(self, content: Optional[str] = None, **kwargs):
+        await self.backend.call("channel.send")
+
+
+class FakeThread(discord.Thread):
+    """Tópico em memória. O histórico é lido em páginas de 100 mensagens, como na API do Discord."""
+
+    def __init__(self, backend: FakeDiscord, thread_id: int, parent: FakeChannel, name: str, messages: List[FakeMessage]):
+        # O __init__ do discord.Thread depende do estado da conexão e não é chamado
+        self.backend, self._parent = backend, parent
+        self.id, self.name, self.parent_id, self.archived = thread_id, name, parent.id, False
+        self.fake_messages = messages  # Da mais nova para a mais antiga
+
+    @property
+    def parent(self): return self._parent
+
+    @property
+    def jump_url(self): return f"https://discord.com/channels/{GUILD_ID}/{self.id}"
+
+    async def history(self, limit: Optional[int] = 100, oldest_first: Optional[bool] = None, **_):
+        messages = list(reversed(self.fake_messages)) if oldest_first else self.fake_messages
+        if limit is not None:
+            messages = messages[:limit]
+        for start in range(0, max(len(messages), 1), 100):
+            await self.backend.call("thread.history")
+            for message in messages[start:start + 100]:
+                yield message
+
+    async def fetch_message(self, message_id: int):
+        await self.backend.call("thread.fetch_message")
+        for message in self.fake_messages:
+            if message.id == message_id:
+                return message
+        raise discord.NotFound(SimpleNamespace(status=404, reason="Not Found"), "Unknown Message")
+
+    async def edit(self, **fields):
+        await self.backend.call("thread.edit")
+        for name, value in fields.items():
+            setattr(self, name, value)
+        return self
+
+
+class FakeInteraction:
+    """
+    Interação simulada: registra tudo o que o bot responde (mensagens, edições, modais e views).
+    `on_view` é chamado com cada view enviada, para o benchmark "clicar" nos menus.
+    """
+
+    def __init__(self, backend: FakeDiscord, user: FakeUser, channel, on_view: Optional[Callable[[discord.ui.View], None]] = None):
+        self.backend, self.user, self.channel, self.on_view = backend, user, channel, on_view
+        self.guild_id, self.application_id, self.token = GUILD_ID, 1, uuid.uuid4().hex
+        self.created_at, self.data, self.message = discord.utils.utcnow(), {}, None
+        self.response, self.followup = FakeResponse(self), FakeFollowup(self)
+        self.sent: List[SimpleNamespace] = []
+        self._changed = asyncio.Event()
+
+    def record(self, kind: str, content: Optional[str] = None, embed=None, view=None, modal=None):
+        self.sent.append(SimpleNamespace(kind=kind, content=content or "", embed=embed, view=view, modal=modal))
+        self._changed.set()
+        if view is not None and self.on_view:
+            self.on_view(view)
+
+    async def edit_original_response(self, content: Optional[str] = None, embed=None, view=None, **_):
+        await self.backend.call("interaction.edit_original_response")
+        self.record("edit", content, embed, view)
+
+    def last(self, kind: Optional[str] = None) -> Optional[SimpleNamespace]:
+        return next((item for item in reversed(self.sent) if kind is None or item.kind == kind), None)
+
+    async def wait_for(self, predicate: Callable[[SimpleNamespace], bool], timeout: float) -> SimpleNamespace:
+        deadline, checked = time.monotonic() + timeout, 0
+        while True:
+            for item in self.sent[checked:]:
+                if predicate(item):
+                    return item
+            checked = len(self.sent)
+            self._changed.clear()
+            await asyncio.wait_for(self._changed.wait(), timeout=max(0.0, deadline - time.monotonic()))
+
+
+class FakeResponse:
+    def __init__(self, interaction: FakeInteraction):
+        self.interaction, self._done = interaction, False
+
+    def is_done(self) -> bool:
+        return self._done
+
+    async def _respond(self, kind: str, **kwargs):
+        if self._done:
+            raise discord.InteractionResponded(self.interaction)
+        self._done = True
+        await self.interaction.backend.call(f"interaction.response.{kind}")
+        self.interaction.record(kind, **kwargs)
+
+    async def send_message(self, content: Optional[str] = None, embed=None, view=None, **_):
+        await self._respond("send_message", content=content, embed=embed, view=view)
+
+    async def defer(self, **_):
+        await self._respond("defer")
+
+    async def send_modal(self, modal):
+        await self._respond("send_modal", modal=modal)
+
+    async def edit_message(self, content: Optional[str] = None, embed=None, view=None, **_):
+        await self._respond("edit_message", content=content, embed=embed, view=view)
+
+
+class FakeFollowup:
+    def __init__(self, interaction: FakeInteraction):
+        self.interaction = interaction
+
+    async def send(self, content: Optional[str] = None, embed=None, view=None, **_):
+        await self.interaction.backend.call("interaction.followup.send")
+        self.interaction.record("followup", content, embed, view)
+        return FakeMessage(random.getrandbits(48), FakeUser(0, "bot", bot=True), content or "")
+
+
+# --- EXECUÇÃO ---
+
+def _is_error(item: Optional[SimpleNamespace]) -> bool:
+    return item is not None and item.content.startswith(("❌", "🔴"))
+
+
+def _is_result(item: SimpleNamespace) -> bool:
+    """Resposta final de um job de card (a confirmação e a posição na fila começam com ⏳)."""
+    return item.kind == "followup" and not item.content.startswith("⏳")
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    ordered = sorted(values)
+    if not ordered:
+        return {}
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {
+        "p50": round(pick(0.5) * 1000, 1), "p95": round(pick(0.95) * 1000, 1), "p99": round(pick(0.99) * 1000, 1),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 1), "max": round(ordered[-1] * 1000, 1),
+    }
+
+
+class Sample:
+    def __init__(self, latency: float, ack: Optional[float] = None, error: Optional[str] = None):
+        self.latency, self.ack, self.error = latency, ack, error
+
+
+class Benchmark:
+    """Prepara os substitutos, injeta-os no bot e executa os cenários com N usuários simultâneos."""
+
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.args, self.workdir = args, workdir
+        self.notion_api = FakeNotionClient(args.pages, args.notion_latency, args.notion_rate_limit, args.seed)
+        self.gemini = FakeGenerativeModel(args.gemini_latency, args.gemini_rate_limit, args.seed)
+        self.discord = FakeDiscord(args.discord_latency, args.seed)
+        self.channel = FakeChannel(self.discord, CHANNEL_ID, "suporte")
+        self.discord.channels[CHANNEL_ID] = self.channel
+        self.people = [FakeUser(100 + i, name) for i, name in enumerate(PEOPLE)]
+        self.users = [FakeUser(10_000 + i, PEOPLE[i % len(PEOPLE)]) for i in range(args.users)]
+        self._next_id = 1_000_000
+        self.rng = random.Random(args.seed)
+
+    def _new_id(self) -> int:
+        self._next_id += 1
+        return self._next_id
+
+    async def setup(self):
+        # Importados só agora: as variáveis de ambiente (bancos temporários etc.) já estão definidas
+        import bot as bot_module
+        import config_utils
+        import ia_processor
+        import ui_components
+        from card_jobs import CardJobQueue
+
+        self.bot_module, self.config_utils, self.ui = bot_module, config_utils, ui_components
+        self.notion = bot_module.notion
+        self.notion.notion = self.notion_api
+        ia_processor.gemini_pool._model = self.gemini
+        config_utils._store = config_utils.ConfigStore(os.path.join(self.workdir, "configs.json"))
+        self.config = {
+            'notion_url': DATABASE_URL,
+            'create_properties': ["Status", "Prioridade", "Tags"],
+            'display_properties': ["Nome", "Descrição", "Status", "Prioridade", "Tags", "Responsáveis", "Prazo"],
+            'action_buttons_enabled': True,
+            'rename_topic_enabled': True,
+            'ai_summary_for_commands': ["resolvido"],
+            'capture_first_message_for_commands': ["card", "resolvido"],
+            'topic_link_property_name': "Link do tópico",
+            'individual_person_prop': "Aberto por",
+            'collective_person_prop': "Responsáveis",
+            'resolved_command_defaults': {"Status": "Concluído"},
+        }
+        config_utils.save_config(GUILD_ID, CHANNEL_ID, self.config)
+        self.text_properties = [name for name in self.config['display_properties'] if self.notion_api.schema[name]['type'] in ('title', 'rich_text')]
+
+        self.card_jobs = CardJobQueue(self.discord, self.notion, db_path=os.path.join(self.workdir, "card_jobs.db"), workers=self.args.workers)
+        bot_module.bot.card_jobs = self.card_jobs
+        await self.card_jobs.start()
+        if self.notion.mirror:
+            await self.notion.sync_mirror(DATABASE_URL, full=True)
+
+    async def teardown(self):
+        await self.card_jobs.stop()
+        await self.config_utils.flush_configs()
+
+    def new_thread(self) -> FakeThread:
+        thread_id = self._new_id()
+        authors = self.people[:self.rng.randint(2, len(self.people))]
+        messages = []
+        for index in range(self.args.thread_messages):
+            author = authors[index % len(authors)]
+            attachments = [SimpleNamespace(filename=f"print{index}.png", url=f"https://cdn.exemplo.com/{thread_id}/{index}.png", content_type="image/png")] if index % 15 == 5 else []
+            message_id = thread_id if index == 0 else thread_id + index
+            messages.append(FakeMessage(message_id, author, " ".join(self.rng.choices(WORDS, k=self.rng.randint(5, 40))), attachments))
+        messages.reverse()
+        thread = FakeThread(self.discord, thread_id, self.channel, " ".join(self.rng.sample(WORDS, 3)).capitalize(), messages)
+        self.discord.channels[thread_id] = thread
+        return thread
+
+    # --- CENÁRIOS (cada um retorna as amostras de uma iteração de um usuário) ---
+
+    async def run_config(self, user: FakeUser, rng: random.Random) -> List[Sample]:
+        from ui_components import SelectView
+        channel = FakeChannel(self.discord, self._new_id(), f"canal-{user.id}")
+        self.discord.channels[channel.id] = channel
+
+        def answer(view: discord.ui.View):
+            if not isinstance(view, SelectView):
+                return
+            labels = [option.label for option in view.children[0].options]
+
+            def choose():
+                view.result = rng.sample(labels, min(len(labels), rng.randint(2, 5)))
+                view.stop()
+            asyncio.get_running_loop().call_soon(choose)
+
+        interaction = FakeInteraction(self.discord, user, channel, on_view=answer)
+        start = time.perf_counter()
+        await self.bot_module.config_command.callback(interaction, url=DATABASE_URL)
+        error = next((item.content for item in interaction.sent if _is_error(item)), None)
+        return [Sample(time.perf_counter() - start, error=error)]
+
+    async def _wait_job(self, start: float, ack: float, interaction: FakeInteraction) -> Sample:
+        result = await interaction.wait_for(_is_result, JOB_RESULT_TIMEOUT)
+        return Sample(time.perf_counter() - start, ack=ack, error=result.content if _is_error(result) else None)
+
+    async def run_card(self, user: FakeUser, rng: random.Random) -> List[Sample]:
+        thread = self.new_thread()
+        interaction = FakeInteraction(self.discord, user, thread)
+        start = time.perf_counter()
+        await self.bot_module.interactive_card.callback(interaction)
+        view = (interaction.last() or SimpleNamespace(view=None)).view
+        if not isinstance(view, self.ui.CardSelectPropertiesView):
+            return [Sample(time.perf_counter() - start, error=(interaction.last() or SimpleNamespace(content="sem resposta")).content)]
+        # Equivale às escolhas nos menus de seleção (on_select_callback)
+        view.collected_properties.update({"Status": rng.choice(STATUS_OPTIONS), "Prioridade": rng.choice(PRIORITY_OPTIONS), "Tags": rng.sample(TAG_OPTIONS, 2)})
+        click = FakeInteraction(self.discord, user, thread)
+        await view.confirm_button.callback(click)
+        return [await self._wait_job(start, time.perf_counter() - start, click)]
+
+    async def run_busca(self, user: FakeUser, rng: random.Random) -> List[Sample]:
+        interaction = FakeInteraction(self.discord, user, self.channel)
+        start = time.perf_counter()
+        await self.bot_module.interactive_search.callback(interaction)
+        if _is_error(interaction.last()):
+            return [Sample(time.perf_counter() - start, error=interaction.last().content)]
+        # Opção "Todos os campos de texto" seguida do envio do modal de busca
+        config = self.config_utils.load_config(GUILD_ID, CHANNEL_ID)
+        modal = self.ui.SearchModal(notion=self.notion, config=config, selected_property={'name': self.text_properties, 'type': 'rich_text', 'label': "todos os campos de texto"})
+        modal.search_term_input._value = rng.choice(WORDS)  # Valor que o Discord preencheria no envio do modal
+        submit = FakeInteraction(self.discord, user, self.channel)
+        await modal.on_submit(submit)
+        return [Sample(time.perf_counter() - start, error=next((item.content for item in submit.sent if _is_error(item)), None))]
+
+    async def run_paginacao(self, user: FakeUser, rng: random.Random) -> List[Sample]:
+        """Abre uma busca com muitos resultados e avança `--clicks` cards; cada clique é uma amostra."""
+        config = self.config_utils.load_config(GUILD_ID, CHANNEL_ID)
+        view = await self.ui.PaginationView.from_search(user, config, self.notion, rng.choice(STATUS_OPTIONS), "Status", "status", actions=['edit', 'delete', 'share'])
+        if not view:
+            return [Sample(0.0, error="busca sem resultados")]
+        await view.get_page_embed()
+        samples = []
+        for _ in range(self.args.clicks):
+            click = FakeInteraction(self.discord, user, self.channel)
+            start = time.perf_counter()
+            await view.next_button.callback(click)
+            samples.append(Sample(time.perf_counter() - start))
+        view.stop()
+        await view.on_timeout()
+        return samples
+
+    async def run_resolvido(self, user: FakeUser, rng: random.Random) -> List[Sample]:
+        thread = self.new_thread()
+        interaction = FakeInteraction(self.discord, user, thread)
+        start = time.perf_counter()
+        await self.bot_module.resolved_command.callback(interaction)
+        ack = time.perf_counter() - start
+        if _is_error(interaction.last()):
+            return [Sample(ack, ack=ack, error=interaction.last().content)]
+        return [await self._wait_job(start, ack, interaction)]
+
+    # --- MEDIÇÃO ---
+
+    def _counters(self) -> Dict[str, Any]:
+        return {
+            "notion": Counter(self.notion_api.calls), "notion_rate_limited": self.notion_api.rate_limited,
+            "discord": Counter(self.discord.calls),
+            "gemini": self.gemini.calls, "gemini_rate_limited": self.gemini.rate_limited, "gemini_tokens": self.gemini.tokens,
+        }
+
+    async def _user_loop(self, scenario: Callable[[FakeUser, random.Random], Awaitable[List[Sample]]], user: FakeUser, rng: random.Random) -> List[Sample]:
+        samples = []
+        for _ in range(self.args.iterations):
+            start = time.perf_counter()
+            try:
+                samples.extend(await scenario(user, rng))
+            except Exception as e:
+                samples.append(Sample(time.perf_counter() - start, error=f"{type(e).__name__}: {e}"))
+        return samples
+
+    async def run_scenario(self, name: str) -> Dict[str, Any]:
+        scenario = getattr(self, f"run_{name}")
+        # Uma execução de aquecimento (caches de schema e usuários), fora da medição
+        try:
+            await scenario(self.users[0], random.Random(self.args.seed))
+        except Exception as e:
+            print(f"Aviso: o aquecimento do cenário '{name}' falhou: {e}")
+
+        before = self._counters()
+        start = time.perf_counter()
+        per_user = await asyncio.gather(*(self._user_loop(scenario, user, random.Random(self.args.seed + i)) for i, user in enumerate(self.users)))
+        elapsed = time.perf_counter() - start
+        after = self._counters()
+
+        samples = [sample for user_samples in per_user for sample in user_samples]
+        ops = max(1, len(samples))
+        per_op = lambda value: round(value / ops, 3)
+        notion_calls = {endpoint: per_op(count) for endpoint, count in sorted((after["notion"] - before["notion"]).items())}
+        discord_calls = {endpoint: per_op(count) for endpoint, count in sorted((after["discord"] - before["discord"]).items())}
+        errors = [sample.error for sample in samples if sample.error]
+        result = {
+            "ops": len(samples),
+            "errors": len(errors),
+            "error_samples": sorted(set(errors))[:5],
+            "duration_s": round(elapsed, 3),
+            "throughput_ops_s": round(len(samples) / elapsed, 3) if elapsed else 0.0,
+            "latency_ms": _percentiles([sample.latency for sample in samples]),
+            "calls_per_op": {
+                "notion_total": per_op(sum(after["notion"].values()) - sum(before["notion"].values())),
+                "notion": notion_calls,
+                "notion_rate_limited": per_op(after["notion_rate_limited"] - before["notion_rate_limited"]),
+                "discord_total": per_op(sum(after["discord"].values()) - sum(before["discord"].values())),
+                "discord": discord_calls,
+                "gemini": per_op(after["gemini"] - before["gemini"]),
+                "gemini_rate_limited": per_op(after["gemini_rate_limited"] - before["gemini_rate_limited"]),
+                "gemini_tokens": per_op(after["gemini_tokens"] - before["gemini_tokens"]),
+            },
+        }
+        acks = [sample.ack for sample in samples if sample.ack is not None]
+        if acks:
+            result["ack_latency_ms"] = _percentiles(acks)
+        return result
+
+
+# --- RELATÓRIO ---
+
+def _git_revision() -> Dict[str, Any]:
+    cwd = os.path.dirname(os.path.abspath(__file__))
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=cwd, capture_output=True, text=True, check=True).stdout.strip()
+        dirty = bool(subprocess.run(["git", "status", "--porcelain", "--untracked-files=no"], cwd=cwd, capture_output=True, text=True).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def _stage_summaries() -> Dict[str, Any]:
+    """Percentis das etapas internas medidas pelo próprio bot (acumulados em todos os cenários)."""
+    from metrics import metrics
+    stages = {}
+    for labels, count, quantiles in metrics.histogram_summaries("stage_duration_seconds"):
+        if labels.get("status") != "ok":
+            continue
+        stages[labels.get("stage", "?")] = {"count": count, **{f"p{int(q * 100)}": round(value * 1000, 1) for q, value in quantiles.items()}}
+    return {"stages_ms": dict(sorted(stages.items())), "cache_hit_rates": {cache: round(rate, 3) for cache, (rate, _) in metrics.hit_rates().items()}}
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"\nCommit {report['commit'] or '?'}{' (com alterações locais)' if report['dirty'] else ''} — {report['parameters']['users']} usuários simultâneos")
+    print(f"{'cenário':<11} {'ops':>5} {'ops/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'notion/op':>10} {'gemini/op':>10} {'erros':>6}")
+    for name, result in report["scenarios"].items():
+        latency = result["latency_ms"] or {}
+        print(f"{name:<11} {result['ops']:>5} {result['throughput_ops_s']:>8.2f} {latency.get('p50', 0):>9.1f} {latency.get('p95', 0):>9.1f} "
+              f"{latency.get('p99', 0):>9.1f} {result['calls_per_op']['notion_total']:>10.2f} {result['calls_per_op']['gemini']:>10.2f} {result['errors']:>6}")
+
+
+def print_comparison(baseline: Dict[str, Any], report: Dict[str, Any]):
+    """Mostra a variação de cada métrica em relação a um relatório anterior."""
+    print(f"\nComparação com {baseline.get('commit') or '?'}:")
+    changed = {key for key in set(baseline.get("parameters", {})) | set(report["parameters"])
+               if key not in ("output", "compare") and baseline.get("parameters", {}).get(key) != report["parameters"].get(key)}
+    if changed:
+        print(f"Aviso: parâmetros diferentes entre as execuções ({', '.join(sorted(changed))}); a comparação pode não ser justa.")
+
+    def delta(old: float, new: float) -> str:
+        if not old:
+            return f"{new:.2f}"
+        return f"{old:.2f} → {new:.2f} ({(new - old) / old * 100:+.1f}%)"
+
+    for name, result in report["scenarios"].items():
+        old = baseline.get("scenarios", {}).get(name)
+        if not old:
+            continue
+        print(f"  {name}:")
+        print(f"    ops/s      {delta(old['throughput_ops_s'], result['throughput_ops_s'])}")
+        for quantile in ("p50", "p95", "p99"):
+            print(f"    {quantile} ms     {delta(old['latency_ms'].get(quantile, 0), result['latency_ms'].get(quantile, 0))}")
+        print(f"    notion/op  {delta(old['calls_per_op']['notion_total'], result['calls_per_op']['notion_total'])}")
+        print(f"    gemini/op  {delta(old['calls_per_op']['gemini'], result['calls_per_op']['gemini'])}")
+
+
+def _prepare_environment(args: argparse.Namespace, workdir: str):
+    """Define as variáveis lidas na importação dos módulos do bot (antes de importá-los)."""
+    os.environ.setdefault("NOTION_TOKEN", "benchmark")
+    os.environ.setdefault("GOOGLE_API_KEY", "benchmark")
+    os.environ["NOTION_MIRROR_ENABLED"] = "true" if args.mirror else "false"
+    os.environ["NOTION_MIRROR_DB_PATH"] = os.path.join(workdir, "notion_mirror.db")
+    os.environ["CARD_JOBS_DB_PATH"] = os.path.join(workdir, "card_jobs.db")
+    os.environ["AI_SUMMARY_CACHE_PATH"] = os.path.join(workdir, "summary_cache.json")
+    os.environ["NOTION_REQUESTS_PER_SECOND"] = str(args.notion_rate_limit)
+    os.environ["CARD_JOB_WORKERS"] = str(args.workers)
+
+
+async def run_benchmark(args: argparse.Namespace) -> Dict[str, Any]:
+    with tempfile.TemporaryDirectory(prefix="notion-bot-bench-") as workdir:
+        _prepare_environment(args, workdir)
+        benchmark = Benchmark(args, workdir)
+        await benchmark.setup()
+        scenarios = {}
+        try:
+            for name in args.scenarios:
+                print(f"Executando o cenário '{name}'...")
+                scenarios[name] = await benchmark.run_scenario(name)
+        finally:
+            await benchmark.teardown()
+        return {
+            **_git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "parameters": {key: value for key, value in vars(args).items() if key not in ("output", "compare")},
+            "scenarios": scenarios,
+            **_stage_summaries(),
+        }
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark offline do bot com Notion, Discord e Gemini simulados.")
+    parser.add_argument("--users", type=int, default=10, help="usuários simultâneos")
+    parser.add_argument("--iterations", type=int, default=3, help="execuções de cada cenário por usuário")
+    parser.add_argument("--scenarios", type=lambda value: [name.strip() for name in value.split(",") if name.strip()], default=list(SCENARIOS),
+                        help=f"cenários separados por vírgula ({', '.join(SCENARIOS)})")
+    parser.add_argument("--clicks", type=int, default=10, help="cliques em ➡️ por iteração do cenário 'paginacao'")
+    parser.add_argument("--pages", type=int, default=500, help="páginas na base de dados simulada")
+    parser.add_argument("--thread-messages", type=int, default=80, help="mensagens em cada tópico simulado")
+    parser.add_argument("--workers", type=int, default=2, help="workers da fila de cards")
+    parser.add_argument("--notion-latency", type=float, default=0.25, help="latência média do Notion (s)")
+    parser.add_argument("--notion-rate-limit", type=float, default=3.0, help="requisições/s aceitas pelo Notion antes do 429")
+    parser.add_argument("--discord-latency", type=float, default=0.08, help="latência média do Discord (s)")
+    parser.add_argument("--gemini-latency", type=float, default=1.5, help="latência média do Gemini (s)")
+    parser.add_argument("--gemini-rate-limit", type=float, default=5.0, help="requisições/s aceitas pelo Gemini")
+    parser.add_argument("--mirror", action="store_true", help="usa a cópia local do Notion no /busca (sincronizada antes da medição)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="arquivo JSON para salvar o relatório")
+    parser.add_argument("--compare", help="relatório JSON anterior para comparar")
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"cenário(s) desconhecido(s): {', '.join(unknown)}")
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
+    report = asyncio.run(run_benchmark(args))
+    print_report(report)
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            print_comparison(json.load(f), report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nRelatório salvo em '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -5,38 +5,116 @@ from discord import app_commands, Interaction, SelectOption, Color
 from discord.ext import commands
 from discord.ui import Select, View
 import os
+import asyncio
 from dotenv import load_dotenv
 from typing import Optional
 
 # Módulos locais
 from notion_integration import NotionIntegration, NotionAPIError
-from config_utils import save_config, load_config
+from config_utils import save_config, load_config, list_notion_urls
+from card_jobs import CardJobQueue
+from metrics import metrics, start_metrics_server
+from ia_processor import gemini_pool, load_genai
+from command_sync import sync_if_changed
+from sharding import DISCORD_SHARD_COUNT, DISCORD_SHARD_IDS, DISCORD_SHARD_PROCESSES, launch_shard_processes
 from ui_components import (
     SelectView,
     PaginationView,
     SearchModal,
     CardModal,
     ManagementView,
-    get_topic_participants,
-    PublishView,
-    _build_notion_page_content,
     CardSelectPropertiesView, # Importa a view para uso direto
+    CardEditButton,
+    CardDeleteButton,
+    live_view_stats,
 )
 
 # Carregar variáveis de ambiente e inicializar bot/notion
 load_dotenv()
 DISCORD_TOKEN = os.getenv("DISCORD_TOKEN")
 DISCORD_GUILD_ID = os.getenv("DISCORD_GUILD_ID")
+# Com a inicialização preguiçosa, o cliente do Notion, o SDK do Gemini e as views de configuração
+# pouco usadas só são carregados no primeiro uso; "false" carrega tudo antes de conectar
+BOT_LAZY_INIT = os.getenv("BOT_LAZY_INIT", "true").lower() not in ("0", "false", "no")
+
+if __name__ == "__main__" and DISCORD_TOKEN and DISCORD_SHARD_PROCESSES > 1 and not DISCORD_SHARD_IDS:
+    # Um processo por grupo de shards, compartilhando configurações e caches em disco. O processo
+    # principal só acompanha os filhos, por isso sai antes de criar o cliente do Notion e o bot
+    raise SystemExit(launch_shard_processes(os.path.abspath(__file__)))
 
 intents = discord.Intents.default()
 intents.message_content = True
 intents.guilds = True
 intents.messages = True
 
-bot = commands.Bot(command_prefix="!", intents=intents)
 notion = NotionIntegration()
 
 
+def preload_dependencies():
+    """Carrega de imediato o que a inicialização preguiçosa adia (SDKs, cliente do Notion, cópia local e views)."""
+    import config_views
+    load_genai()
+    notion.notion
+    notion.mirror
+
+
+if not BOT_LAZY_INIT:
+    preload_dependencies()
+
+
+class NotionBot(commands.AutoShardedBot):
+    """
+    Bot com a fila de criação de cards, iniciada junto com a conexão.
+    Sem DISCORD_SHARD_COUNT/DISCORD_SHARD_IDS, usa a quantidade de shards recomendada pelo Discord.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.notion = notion
+        self.card_jobs: Optional[CardJobQueue] = None
+        self.mirror_sync: Optional[asyncio.Task] = None
+        self.ready_once = False
+
+    async def setup_hook(self):
+        # Botões dos cards publicados: funcionam mesmo depois de um reinício, sem views em memória
+        self.add_dynamic_items(CardEditButton, CardDeleteButton)
+        self.card_jobs = CardJobQueue(self, notion)
+        await self.card_jobs.start()
+        start_metrics_server()
+        # Mantém a cópia local das bases configuradas atualizada para o /busca
+        self.mirror_sync = asyncio.create_task(notion.run_mirror_sync(list_notion_urls))
+        await self.sync_commands()
+
+    async def sync_commands(self):
+        """
+        Sincroniza os comandos de barra uma vez por processo (aqui, e não no on_ready, que dispara
+        de novo a cada reconexão) e só quando a árvore de comandos mudou desde a última sincronização.
+        """
+        guild = discord.Object(id=DISCORD_GUILD_ID) if DISCORD_GUILD_ID else None
+        if guild:
+            self.tree.copy_global_to(guild=guild)
+        if DISCORD_SHARD_IDS and 0 not in DISCORD_SHARD_IDS:
+            return  # Com vários processos de shards, só o do shard 0 sincroniza
+        scope = f"o servidor {DISCORD_GUILD_ID}" if guild else "todos os servidores"
+        try:
+            if await sync_if_changed(self.tree, self.application_id, guild):
+                print(f"Comandos sincronizados para {scope}.")
+            else:
+                print(f"Comandos sem alterações para {scope}; sincronização ignorada.")
+        except discord.HTTPException as e:
+            print(f"Erro ao sincronizar os comandos: {e}")
+
+    async def close(self):
+        if self.mirror_sync:
+            self.mirror_sync.cancel()
+        if self.card_jobs:
+            await self.card_jobs.stop()
+        await super().close()
+
+
+bot = NotionBot(command_prefix="!", intents=intents, shard_count=DISCORD_SHARD_COUNT, shard_ids=DISCORD_SHARD_IDS)
+
+
 # --- FUNÇÃO AUXILIAR DE CONFIGURAÇÃO ---
 
 async def run_full_config_flow(interaction: Interaction, url: str, is_update: bool = False):
@@ -49,7 +127,7 @@ async def run_full_config_flow(interaction: Interaction, url: str, is_update: bo
     try:
         save_config(interaction.guild_id, config_channel_id, {'notion_url': url})
 
-        all_properties = notion.get_properties_for_interaction(url)
+        all_properties = await notion.get_properties_for_interaction(url)
         property_names = [prop['name'] for prop in all_properties]
 
         async def run_selection_process(prompt_title, prompt_description, original_interaction):
@@ -106,18 +184,21 @@ async def run_full_config_flow(interaction: Interaction, url: str, is_update: bo
 
 @bot.event
 async def on_ready():
-    """Evento disparado quando o bot está pronto."""
-    if DISCORD_GUILD_ID:
-        guild = discord.Object(id=DISCORD_GUILD_ID)
-        bot.tree.copy_global_to(guild=guild)
-        await bot.tree.sync(guild=guild)
-        print(f"Comandos sincronizados para o servidor {DISCORD_GUILD_ID}.")
-    else:
-        await bot.tree.sync()
-        print("Comandos sincronizados globalmente.")
+    """Evento disparado quando o bot está pronto (e de novo a cada reconexão com uma sessão nova)."""
+    if bot.ready_once:
+        print(f"🔄 {bot.user} reconectado.")
+        return
+    bot.ready_once = True
     print(f"✅ {bot.user} está online e pronto para uso!")
 
 
+@bot.event
+async def on_app_command_completion(interaction: Interaction, command):
+    """Registra o tempo de resposta de cada comando (do envio pelo usuário até o fim do handler)."""
+    elapsed = (discord.utils.utcnow() - interaction.created_at).total_seconds()
+    metrics.observe("command_duration_seconds", elapsed, command=command.qualified_name)
+
+
 # --- COMANDOS DE BARRA (/) ---
 
 @bot.tree.command(name="config", description="(Admin) Configura ou gerencia o bot para este canal.")
@@ -133,11 +214,15 @@ async def config_command(interaction: Interaction, url: Optional[str] = None):
         if not notion.extract_database_id(url):
             return await interaction.followup.send("❌ A URL do Notion fornecida parece ser inválida. Verifique se é a URL de uma base de dados.", ephemeral=True)
 
+        # O /config sempre trabalha com o schema mais recente da base
+        notion.invalidate_schema(url)
+
         await interaction.followup.send("Iniciando a configuração/reconfiguração completa...", ephemeral=True)
         await run_full_config_flow(interaction, url, is_update=bool(config))
         return
 
     if config and 'notion_url' in config:
+        notion.invalidate_schema(config['notion_url'])
         view = ManagementView(interaction, notion, config)
         await interaction.followup.send("Este canal já está configurado. Escolha uma opção de gerenciamento:", view=view, ephemeral=True)
     else:
@@ -166,7 +251,8 @@ async def interactive_card(interaction: Interaction):
         if not config or 'notion_url' not in config:
             return await interaction.response.send_message("❌ O Notion ainda não foi configurado para este canal. Peça para um admin usar `/config`.", ephemeral=True)
 
-        all_properties = notion.get_properties_for_interaction(config['notion_url'])
+        with metrics.timer("stage_duration_seconds", stage="card.propriedades"):
+            all_properties = await notion.get_properties_for_interaction(config['notion_url'])
 
         thread_context = interaction.channel if isinstance(interaction.channel, discord.Thread) else None
         topic_title = thread_context.name if thread_context else None
@@ -205,7 +291,8 @@ async def interactive_card(interaction: Interaction):
                 select_props=select_props,
                 collected_from_modal={}, # Inicia com dados vazios
                 thread_context=thread_context,
-                notion=notion
+                notion=notion,
+                job_queue=bot.card_jobs
             )
             await interaction.response.send_message("📝 Por favor, preencha as opções abaixo para criar o card.", view=view, ephemeral=True)
             return
@@ -219,7 +306,8 @@ async def interactive_card(interaction: Interaction):
             text_props=text_props,
             select_props=select_props,
             thread_context=thread_context,
-            topic_title=topic_title
+            topic_title=topic_title,
+            job_queue=bot.card_jobs
         )
         await interaction.response.send_modal(modal)
 
@@ -238,7 +326,8 @@ async def interactive_search(interaction: Interaction):
         if not config or 'notion_url' not in config:
             return await interaction.response.send_message("❌ O Notion não foi configurado para este canal. Use `/config`.", ephemeral=True)
 
-        all_properties = notion.get_properties_for_interaction(config['notion_url'])
+        with metrics.timer("stage_duration_seconds", stage="busca.propriedades"):
+            all_properties = await notion.get_properties_for_interaction(config['notion_url'])
         display_properties_names = config.get('display_properties', [])
         if not display_properties_names:
             return await interaction.response.send_message("❌ As propriedades para busca não foram configuradas. Use `/config`.", ephemeral=True)
@@ -247,11 +336,17 @@ async def interactive_search(interaction: Interaction):
         if not searchable_options:
             return await interaction.response.send_message("❌ Nenhuma propriedade pesquisável configurada.", ephemeral=True)
 
+        # Busca em todas as propriedades de texto exibidas de uma só vez
+        text_prop_names = [p['name'] for p in searchable_options if p['type'] in ('title', 'rich_text')]
+        ALL_TEXT_OPTION = "__todas__"
+
         class PropertySelect(Select):
             def __init__(self, searchable_props, author_id):
                 self.searchable_props = searchable_props
                 self.author_id = author_id
                 opts = [SelectOption(label=p['name'], description=f"Tipo: {p['type']}") for p in self.searchable_props[:25]]
+                if len(text_prop_names) > 1 and len(opts) < 25:
+                    opts.insert(0, SelectOption(label="Todos os campos de texto", value=ALL_TEXT_OPTION, description=", ".join(text_prop_names)[:100]))
                 super().__init__(placeholder="Escolha uma propriedade para pesquisar...", options=opts)
 
             async def callback(self, inter: Interaction):
@@ -259,6 +354,9 @@ async def interactive_search(interaction: Interaction):
                     return await inter.response.send_message("Você não pode interagir com o menu de outra pessoa.", ephemeral=True)
 
                 selected_prop_name = self.values[0]
+                if selected_prop_name == ALL_TEXT_OPTION:
+                    all_text_property = {'name': text_prop_names, 'type': 'rich_text', 'label': "todos os campos de texto"}
+                    return await inter.response.send_modal(SearchModal(notion=notion, config=config, selected_property=all_text_property))
                 selected_property = next((p for p in all_properties if p['name'] == selected_prop_name), None)
 
                 if selected_property['type'] in ['select', 'multi_select', 'status']:
@@ -272,15 +370,12 @@ async def interactive_search(interaction: Interaction):
                         async def callback(self, sub_inter: Interaction):
                             await sub_inter.response.defer(thinking=True, ephemeral=True)
                             search_term = self.values[0]
-                            cards = notion.search_in_database(config['notion_url'], search_term, selected_property['name'], selected_property['type'])
-                            results = cards.get('results', [])
-                            if not results:
+                            view = await PaginationView.from_search(sub_inter.user, config, notion, search_term, selected_property['name'], selected_property['type'], actions=['edit', 'delete', 'share'])
+                            if not view:
                                 return await sub_inter.followup.send(f"❌ Nenhum resultado para '{search_term}'.", ephemeral=True)
 
-                            await sub_inter.followup.send(f"✅ {len(results)} resultado(s) encontrado(s)!", ephemeral=True)
+                            await sub_inter.followup.send(view.results_summary(), ephemeral=True)
 
-                            view = PaginationView(sub_inter.user, results, config, notion, actions=['edit', 'delete', 'share'])
-                            view.update_nav_buttons()
                             await sub_inter.followup.send(embed=await view.get_page_embed(), view=view, ephemeral=True)
 
                     view_options = View(timeout=120.0)
@@ -311,7 +406,7 @@ async def num_cards(interaction: Interaction):
         config = load_config(interaction.guild_id, config_channel_id)
         if not config or 'notion_url' not in config:
             return await interaction.response.send_message("❌ O Notion não foi configurado para este canal. Use `/config`.", ephemeral=True)
-        count = notion.get_database_count(config['notion_url'])
+        count = await notion.get_database_count(config['notion_url'])
         await interaction.response.send_message(f"📊 O banco de dados deste canal contém **{count}** cards.")
     except NotionAPIError as e:
         await interaction.response.send_message(f"❌ Erro ao acessar o Notion: {e}", ephemeral=True)
@@ -343,49 +438,76 @@ async def resolved_command(interaction: Interaction):
         if individual_prop:
             properties_to_set[individual_prop] = interaction.user.display_name
 
-        collective_prop = config.get('collective_person_prop')
-        if collective_prop and thread_context:
-            participants = await get_topic_participants(thread_context)
-            notion_user_ids = [notion.search_id_person(member.display_name) for member in participants]
-            properties_to_set[collective_prop] = [uid for uid in notion_user_ids if uid]
-
         topic_prop_name = config.get('topic_link_property_name')
         if topic_prop_name and thread_context:
             properties_to_set[topic_prop_name] = thread_context.jump_url
 
         title_value = thread_context.name.replace("[Card]", "").strip()
-        
-        page_content = await _build_notion_page_content(config, thread_context, notion, command_name="resolvido")
-
-        page_properties = notion.build_page_properties(config['notion_url'], title_value, properties_to_set)
-        
-        response = notion.insert_into_database(
-            config['notion_url'],
-            page_properties,
-            children=page_content
-        )
 
-        new_name = f"[Resolvido] {title_value}"
-        if len(new_name) > 100: new_name = new_name[:97] + "..."
-        await thread_context.edit(name=new_name, archived=True)
-
-        success_embed = notion.format_page_for_embed(response, display_properties=config.get('display_properties', []))
-        if success_embed:
-            success_embed.title = f"✅ Tópico Resolvido e Card Criado!"
-            
-            publish_view = PublishView(interaction.user.id, success_embed, response['id'], config, notion)
-            await interaction.followup.send("Use o botão abaixo para exibir o card para todos no tópico.", embed=success_embed, view=publish_view, ephemeral=True)
-        else:
-            await interaction.followup.send("✅ Tópico marcado como resolvido e card criado no Notion!", ephemeral=True)
-        
-    except NotionAPIError as e:
-        await interaction.followup.send(f"❌ **Erro no Notion:**\n`{e}`", ephemeral=True)
-    except discord.Forbidden:
-        await interaction.followup.send("❌ **Erro de Permissão:** Não tenho permissão para editar ou arquivar este tópico. Verifique minhas permissões no servidor.", ephemeral=True)
+        # Participantes, resumo, criação do card e arquivamento do tópico rodam em segundo plano (card_jobs)
+        with metrics.timer("stage_duration_seconds", stage="resolvido.enfileirar"):
+            await bot.card_jobs.enqueue(interaction, "resolvido", title_value, properties_to_set)
+        await interaction.followup.send("⏳ Criando o card e marcando o tópico como resolvido... Você será avisado aqui assim que terminar.", ephemeral=True)
+
     except Exception as e:
         await interaction.followup.send(f"🔴 **Erro inesperado:**\n`{e}`", ephemeral=True)
         print(f"Erro inesperado no /resolvido: {e}")
 
+@bot.tree.command(name="stats", description="(Admin) Mostra métricas de desempenho do bot.")
+@app_commands.checks.has_permissions(administrator=True)
+async def stats_command(interaction: Interaction):
+    def fmt_quantiles(quantiles: dict) -> str:
+        return " / ".join(f"{quantiles[q] * 1000:.0f}" for q in (0.5, 0.95, 0.99))
+
+    embed = discord.Embed(title="📊 Métricas do Bot", color=Color.blue())
+    embed.description = "Latências em ms (p50 / p95 / p99)."
+
+    commands_lines = [f"`/{labels.get('command')}`: {count}x — {fmt_quantiles(q)}" for labels, count, q in metrics.histogram_summaries("command_duration_seconds")]
+    embed.add_field(name="Comandos", value="\n".join(commands_lines[:10]) or "Nenhum ainda.", inline=False)
+
+    notion_lines = sorted(
+        ((count, f"`{labels.get('endpoint')}`{' (erro)' if labels.get('status') == 'error' else ''}: {count}x — {fmt_quantiles(q)}")
+         for labels, count, q in metrics.histogram_summaries("notion_request_duration_seconds")), reverse=True
+    )
+    embed.add_field(name="Notion", value="\n".join(line for _, line in notion_lines[:8]) or "Nenhuma chamada.", inline=False)
+
+    stage_lines = sorted(
+        ((count, f"`{labels.get('stage')}`: {count}x — {fmt_quantiles(q)}")
+         for labels, count, q in metrics.histogram_summaries("stage_duration_seconds") if labels.get('status') == 'ok'), reverse=True
+    )
+    embed.add_field(name="Etapas", value="\n".join(line for _, line in stage_lines[:10]) or "Nenhuma ainda.", inline=False)
+
+    embed.add_field(name="Gemini", value=(
+        f"Chamadas: {metrics.counter_value('gemini_requests_total', result='ok'):.0f} "
+        f"(falhas: {metrics.counter_value('gemini_requests_total', result='error'):.0f})\n"
+        f"Tokens: {metrics.counter_value('gemini_tokens_total', kind='prompt'):.0f} entrada / "
+        f"{metrics.counter_value('gemini_tokens_total', kind='response'):.0f} saída\n"
+        f"Fila: {gemini_pool.queue_size}"
+    ), inline=True)
+    embed.add_field(name="Discord", value=(
+        f"Leituras de histórico: {metrics.counter_value('discord_history_fetches_total'):.0f}\n"
+        f"Mensagens lidas: {metrics.counter_value('discord_history_messages_total'):.0f}\n"
+        f"Fila do Notion: {notion.scheduler.queue_size}"
+    ), inline=True)
+
+    shard_lines = [f"`#{shard_id}`: {latency * 1000:.0f} ms" for shard_id, latency in bot.latencies]
+    embed.add_field(name=f"Shards ({len(shard_lines)} de {bot.shard_count or '?'} neste processo)", value=", ".join(shard_lines[:20]) or "Nenhum conectado.", inline=False)
+
+    cache_lines = [f"`{cache}`: {rate:.0%} de {total}" for cache, (rate, total) in sorted(metrics.hit_rates().items())]
+    embed.add_field(name="Caches (acertos)", value="\n".join(cache_lines) or "Sem acessos.", inline=False)
+
+    views = live_view_stats(bot)
+    rss = f"{views['rss_bytes'] / 1024 / 1024:.0f} MB" if views['rss_bytes'] else "?"
+    embed.add_field(name="Memória", value=f"RSS: {rss}\nViews ativas: {views['total']} (persistentes: {views['persistent']})", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@stats_command.error
+async def stats_command_error(interaction: Interaction, error: app_commands.AppCommandError):
+    if isinstance(error, app_commands.MissingPermissions):
+        await interaction.response.send_message("❌ Você precisa ser um administrador para usar este comando.", ephemeral=True)
+    else:
+        print(f"Erro no /stats: {error}")
+
 # --- INICIAR O BOT ---
 if __name__ == "__main__":
     if DISCORD_TOKEN:
@@ -0,0 +1,340 @@
+# card_jobs.py
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, List, Set, Callable
+
+import discord
+from discord import Interaction, Color
+
+# Módulos locais
+from notion_integration import NotionIntegration, NotionAPIError
+from config_utils import load_config
+from metrics import metrics
+from sharding import owns_guild
+from ui_components import (
+    ThreadSnapshot,
+    PublishView,
+    send_card_with_actions,
+    _build_notion_page_content,
+    queue_position_notifier,
+    run_stage,
+    PAGE_STAGE_TIMEOUT,
+)
+
+CARD_JOBS_DB_PATH = os.getenv("CARD_JOBS_DB_PATH", "card_jobs.db")
+# Quantidade de cards criados ao mesmo tempo
+CARD_JOB_WORKERS = int(os.getenv("CARD_JOB_WORKERS", "2"))
+CARD_JOB_MAX_ATTEMPTS = int(os.getenv("CARD_JOB_MAX_ATTEMPTS", "3"))
+# O token de uma interação vale 15 minutos; depois disso (ou depois de um reinício, já que o token
+# não é salvo no banco) o resultado é enviado no canal
+INTERACTION_TOKEN_LIFETIME = 14 * 60
+# Jobs concluídos são apagados do banco depois deste tempo (em segundos)
+FINISHED_JOB_RETENTION = 7 * 24 * 3600
+
+
+class CardJobError(Exception):
+    """Erro definitivo de um job: não adianta tentar de novo."""
+    pass
+
+
+class CardJobQueue:
+    """
+    Fila de criação de cards (/card e /resolvido) executada em segundo plano.
+    Os jobs ficam salvos em um arquivo SQLite e são retomados se o bot reiniciar;
+    o comando só registra o job e responde na hora, e o resultado é enviado quando fica pronto.
+    Com vários processos de shards usando o mesmo arquivo, cada processo só retoma os jobs dos
+    servidores que atende (`owns_guild`).
+    """
+
+    def __init__(self, bot: discord.Client, notion: NotionIntegration, db_path: str = CARD_JOBS_DB_PATH, workers: int = CARD_JOB_WORKERS,
+                 owns_guild: Callable[[Optional[int]], bool] = owns_guild):
+        self.bot, self.notion, self.db_path, self.worker_count = bot, notion, db_path, workers
+        self.owns_guild = owns_guild
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Outros processos de shards podem estar gravando no mesmo arquivo
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS card_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER,
+                command TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                page TEXT,
+                error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        """)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(card_jobs)")}
+        if "guild_id" not in columns:
+            # Bancos criados antes do suporte a shards
+            self._conn.execute("ALTER TABLE card_jobs ADD COLUMN guild_id INTEGER")
+            self._conn.execute("UPDATE card_jobs SET guild_id = json_extract(payload, '$.guild_id')")
+        # Versões anteriores guardavam o token da interação (uma credencial de webhook) no payload
+        self._conn.execute("""
+            UPDATE card_jobs SET payload = json_remove(payload, '$.interaction_token', '$.application_id')
+            WHERE json_extract(payload, '$.interaction_token') IS NOT NULL
+        """)
+        self._conn.commit()
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        # Novas tentativas agendadas (o loop só guarda referências fracas das tasks)
+        self._tasks: Set[asyncio.Task] = set()
+        # Interações ainda vivas neste processo, usadas para responder direto ao usuário
+        self._interactions: Dict[int, Interaction] = {}
+
+    # --- ACESSO AO BANCO ---
+
+    def _execute(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        with self._db_lock:
+            cursor = self._conn.execute(query, params)
+            rows = cursor.fetchall()
+            self._conn.commit()
+            if query.lstrip().upper().startswith("INSERT"):
+                return [{"id": cursor.lastrowid}]
+            return rows
+
+    async def _db(self, query: str, params: tuple = ()) -> List[sqlite3.Row]:
+        return await asyncio.to_thread(self._execute, query, params)
+
+    async def _set_status(self, job_id: int, status: str, error: Optional[str] = None):
+        await self._db("UPDATE card_jobs SET status = ?, error = ?, updated_at = ? WHERE id = ?", (status, error, time.time(), job_id))
+
+    # --- CICLO DE VIDA ---
+
+    async def start(self):
+        """Retoma os jobs pendentes (inclusive os interrompidos por um reinício) e inicia os workers."""
+        now = time.time()
+        await self._db("DELETE FROM card_jobs WHERE status IN ('done', 'failed') AND updated_at < ?", (now - FINISHED_JOB_RETENTION,))
+        for row in await self._db("SELECT id, guild_id FROM card_jobs WHERE status = 'running'"):
+            # Jobs 'running' de outros servidores pertencem a outro processo, que ainda pode estar executando-os
+            if self.owns_guild(row["guild_id"]):
+                await self._db("UPDATE card_jobs SET status = 'pending', updated_at = ? WHERE id = ? AND status = 'running'", (now, row["id"]))
+        for row in await self._db("SELECT id, guild_id FROM card_jobs WHERE status = 'pending' ORDER BY id"):
+            if self.owns_guild(row["guild_id"]):
+                self._queue.put_nowait(row["id"])
+        for _ in range(self.worker_count):
+            self._workers.append(asyncio.create_task(self._worker()))
+
+    async def stop(self):
+        # Jobs com nova tentativa agendada continuam 'pending' no banco e são retomados no próximo start()
+        tasks = self._workers + list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers.clear()
+        self._tasks.clear()
+        self._conn.close()
+
+    async def enqueue(self, interaction: Interaction, command_name: str, title: str, properties: Dict[str, Any]) -> int:
+        """Registra a criação de um card; o resultado é enviado ao usuário quando o job terminar."""
+        channel = interaction.channel
+        is_thread = isinstance(channel, discord.Thread)
+        payload = {
+            "guild_id": interaction.guild_id,
+            "config_channel_id": channel.parent_id if is_thread else channel.id,
+            "channel_id": channel.id,
+            "thread_id": channel.id if is_thread else None,
+            "user_id": interaction.user.id,
+            "title": title,
+            "properties": properties,
+            "interaction_created_at": interaction.created_at.timestamp(),
+        }
+        now = time.time()
+        rows = await self._db(
+            "INSERT INTO card_jobs (guild_id, command, payload, status, created_at, updated_at) VALUES (?, ?, ?, 'pending', ?, ?)",
+            (interaction.guild_id, command_name, json.dumps(payload), now, now)
+        )
+        job_id = rows[0]["id"]
+        self._interactions[job_id] = interaction
+        self._queue.put_nowait(job_id)
+        return job_id
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._process(job_id)
+            except Exception as e:
+                print(f"Erro inesperado no worker de cards (job {job_id}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _requeue_later(self, job_id: int, delay: float):
+        await asyncio.sleep(delay)
+        self._queue.put_nowait(job_id)
+
+    # --- EXECUÇÃO ---
+
+    async def _process(self, job_id: int):
+        rows = await self._db("SELECT * FROM card_jobs WHERE id = ? AND status = 'pending'", (job_id,))
+        if not rows:
+            return
+        row = rows[0]
+        job = {
+            "id": job_id,
+            "command": row["command"],
+            "payload": json.loads(row["payload"]),
+            "page": json.loads(row["page"]) if row["page"] else None,
+            "attempts": row["attempts"] + 1,
+            "created_at": row["created_at"],
+        }
+        await self._db("UPDATE card_jobs SET status = 'running', attempts = ?, updated_at = ? WHERE id = ?", (job["attempts"], time.time(), job_id))
+
+        try:
+            with metrics.timer("stage_duration_seconds", stage=f"{job['command']}.job"):
+                await self._run(job)
+        except (CardJobError, discord.Forbidden) as e:
+            metrics.inc("card_jobs_total", command=job["command"], result="failed")
+            await self._fail(job, e)
+        except Exception as e:
+            if job["attempts"] < CARD_JOB_MAX_ATTEMPTS:
+                metrics.inc("card_jobs_total", command=job["command"], result="retry")
+                print(f"Aviso: job de card {job_id} falhou ({e}); nova tentativa {job['attempts']}/{CARD_JOB_MAX_ATTEMPTS}.")
+                await self._set_status(job_id, 'pending', str(e))
+                task = asyncio.create_task(self._requeue_later(job_id, 5 * 2 ** job["attempts"]))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            else:
+                metrics.inc("card_jobs_total", command=job["command"], result="failed")
+                await self._fail(job, e)
+        else:
+            metrics.inc("card_jobs_total", command=job["command"], result="done")
+            await self._set_status(job_id, 'done')
+            self._interactions.pop(job_id, None)
+
+    async def _get_channel(self, channel_id: int):
+        return self.bot.get_channel(channel_id) or await self.bot.fetch_channel(channel_id)
+
+    async def _run(self, job: Dict[str, Any]):
+        payload, command_name = job["payload"], job["command"]
+        config = load_config(payload["guild_id"], payload["config_channel_id"])
+        if not config or 'notion_url' not in config:
+            raise CardJobError("O Notion não está mais configurado para este canal.")
+
+        thread = await self._get_channel(payload["thread_id"]) if payload.get("thread_id") else None
+        interaction = self._interactions.get(job["id"])
+
+        page = job["page"]
+        if page is None:
+            properties = dict(payload["properties"])
+            snapshot = await ThreadSnapshot.fetch_for_command(thread, config, command_name) if thread else None
+
+            async def resolve_participants():
+                collective_prop = config.get('collective_person_prop')
+                if collective_prop and snapshot:
+                    notion_user_ids = await self.notion.resolve_people([member.display_name for member in snapshot.participants])
+                    properties[collective_prop] = [uid for uid in notion_user_ids if uid]
+
+            async def build_properties():
+                # Sem os participantes o card ainda pode ser criado; já as propriedades são obrigatórias
+                await run_stage("participantes", resolve_participants(), PAGE_STAGE_TIMEOUT)
+                return await self.notion.build_page_properties(config['notion_url'], payload["title"], properties)
+
+            # Propriedades e corpo da página são montados ao mesmo tempo
+            page_properties, page_content = await asyncio.gather(
+                build_properties(),
+                _build_notion_page_content(config, thread, self.notion, command_name=command_name, snapshot=snapshot,
+                                           on_queue_position=queue_position_notifier(interaction) if interaction else None),
+            )
+            # Em uma nova tentativa, a criação anterior pode ter chegado ao Notion mesmo tendo falhado aqui
+            created_since = datetime.fromtimestamp(job["created_at"], timezone.utc) if job["attempts"] > 1 else None
+            with metrics.timer("stage_duration_seconds", stage=f"{command_name}.criar_pagina"):
+                page = await self.notion.insert_into_database(config['notion_url'], page_properties, children=page_content, created_since=created_since)
+            # Guarda a página criada: se uma etapa seguinte falhar, a nova tentativa não duplica o card
+            await self._db("UPDATE card_jobs SET page = ?, updated_at = ? WHERE id = ?", (json.dumps(page), time.time(), job["id"]))
+
+        warning = None
+        try:
+            await self._finish_thread(command_name, thread, config, payload["title"])
+        except discord.Forbidden:
+            warning = "⚠️ **Erro de Permissão:** Não tenho permissão para editar ou arquivar este tópico. Verifique minhas permissões no servidor."
+        await self._notify_success(job, config, page, warning)
+
+    async def _finish_thread(self, command_name: str, thread: Optional[discord.Thread], config: dict, title: str):
+        if not thread:
+            return
+        if command_name == "resolvido":
+            new_name = f"[Resolvido] {title}"
+            if len(new_name) > 100: new_name = new_name[:97] + "..."
+            await thread.edit(name=new_name, archived=True)
+        elif config.get('rename_topic_enabled') and not thread.name.startswith("[Card]"):
+            await thread.edit(name=f"[Card] {thread.name}")
+
+    # --- RESPOSTAS AO USUÁRIO ---
+
+    async def _send_to_user(self, job: Dict[str, Any], content: str, embed: Optional[discord.Embed] = None, view: Optional[discord.ui.View] = None,
+                            public_content: Optional[str] = None, public_config: Optional[dict] = None, public_page_id: Optional[str] = None):
+        """
+        Envia o resultado pela interação enquanto o token dela é válido (mensagem efêmera);
+        depois disso, ou se o bot reiniciou desde o comando, publica no canal mencionando o usuário.
+        """
+        payload = job["payload"]
+        kwargs = {"embed": embed} if embed else {}
+        interaction = self._interactions.get(job["id"])
+        if interaction and time.time() - payload["interaction_created_at"] < INTERACTION_TOKEN_LIFETIME:
+            if view: kwargs["view"] = view
+            try:
+                await interaction.followup.send(content, ephemeral=True, **kwargs)
+                return
+            except discord.NotFound:
+                pass  # Token expirado: segue para o envio no canal
+        kwargs.pop("view", None)  # A view efêmera (PublishView) não vale para a mensagem pública
+        # O tópico do /resolvido já foi arquivado, então a mensagem vai para o canal principal
+        channel_id = payload["config_channel_id"] if job["command"] == "resolvido" else payload["channel_id"]
+        channel = await self._get_channel(channel_id)
+        if public_page_id:
+            await send_card_with_actions(channel, public_config, public_page_id, content=f"<@{payload['user_id']}> {public_content or content}", **kwargs)
+        else:
+            await channel.send(f"<@{payload['user_id']}> {public_content or content}", **kwargs)
+
+    async def _notify_success(self, job: Dict[str, Any], config: dict, page: dict, warning: Optional[str]):
+        payload = job["payload"]
+        success_embed = self.notion.format_page_for_embed(page, display_properties=config.get('display_properties', []))
+        if job["command"] == "resolvido":
+            content = "Use o botão abaixo para exibir o card para todos no tópico."
+            public_content = "o tópico foi resolvido e o card foi criado!"
+            if success_embed:
+                success_embed.title = f"✅ Tópico Resolvido e Card Criado!"
+        else:
+            content = "Card criado! Use o botão para exibir para todos."
+            public_content = "seu card foi criado!"
+            if success_embed:
+                success_embed.title = f"✅ Card '{success_embed.title.replace('📌 ', '')}' Criado!"
+                success_embed.color = Color.purple()
+        if warning:
+            content = f"{warning}\n{content}"
+
+        if not success_embed:
+            return await self._send_to_user(job, f"{warning or ''}\n✅ Card criado no Notion!".strip())
+        publish_view = PublishView(payload["user_id"], success_embed, page['id'], config, self.notion)
+        await self._send_to_user(job, content, embed=success_embed, view=publish_view, public_content=public_content, public_config=config, public_page_id=page['id'])
+
+    async def _fail(self, job: Dict[str, Any], error: Exception):
+        await self._set_status(job["id"], 'failed', str(error))
+        if isinstance(error, NotionAPIError):
+            message = f"❌ **Erro no Notion:**\n`{error}`"
+        elif isinstance(error, discord.Forbidden):
+            message = "❌ **Erro de Permissão:** Não tenho permissão para editar ou arquivar este tópico. Verifique minhas permissões no servidor."
+        elif isinstance(error, CardJobError):
+            message = f"❌ {error}"
+        else:
+            message = f"🔴 **Erro inesperado:**\n`{error}`"
+            print(f"Erro inesperado no job de card {job['id']} (/{job['command']}): {error}")
+        try:
+            await self._send_to_user(job, message)
+        except discord.HTTPException as e:
+            print(f"Não foi possível avisar o usuário sobre a falha do job {job['id']}: {e}")
+        finally:
+            self._interactions.pop(job["id"], None)
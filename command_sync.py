@@ -0,0 +1,62 @@
+# command_sync.py
+
+import os
+import json
+import hashlib
+import tempfile
+from typing import Optional, Dict, Any
+
+import discord
+from discord import app_commands
+
+from sharding import file_lock
+
+# Arquivo com a impressão digital da última árvore de comandos sincronizada em cada escopo
+COMMAND_SYNC_STATE_PATH = os.getenv("COMMAND_SYNC_STATE_PATH", "command_sync.json")
+# Força a sincronização mesmo sem alterações nos comandos (ex.: comandos apagados manualmente)
+FORCE_COMMAND_SYNC = os.getenv("FORCE_COMMAND_SYNC", "false").lower() in ("1", "true", "yes")
+
+
+def tree_fingerprint(tree: app_commands.CommandTree, guild: Optional[discord.abc.Snowflake] = None) -> str:
+    """SHA-256 do JSON que seria enviado ao Discord no `tree.sync()` do escopo."""
+    payload = sorted((command.to_dict(tree) for command in tree.get_commands(guild=guild)), key=lambda data: (data.get('type', 1), data['name']))
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def _load_state(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+
+def _save_fingerprint(path: str, key: str, fingerprint: str):
+    with file_lock(path):
+        state = _load_state(path)
+        state[key] = fingerprint
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".command-sync-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(state, f, indent=4)
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+async def sync_if_changed(tree: app_commands.CommandTree, application_id: int, guild: Optional[discord.abc.Snowflake] = None,
+                          path: str = COMMAND_SYNC_STATE_PATH, force: bool = FORCE_COMMAND_SYNC) -> bool:
+    """
+    Sincroniza a árvore de comandos só quando ela mudou desde a última sincronização bem-sucedida
+    (o `tree.sync()` tem um limite de taxa baixo). Retorna True se sincronizou.
+    """
+    key = f"{application_id}:{guild.id if guild else 'global'}"
+    fingerprint = tree_fingerprint(tree, guild)
+    if not force and _load_state(path).get(key) == fingerprint:
+        return False
+    await tree.sync(guild=guild)
+    _save_fingerprint(path, key, fingerprint)
+    return True
@@ -1,44 +1,151 @@
 # config_utils.py
 
 import json
-from typing import Optional, Dict, Any
+import os
+import copy
+import atexit
+import asyncio
+import tempfile
+from typing import Optional, Dict, Any, List, Callable
+
+from sharding import file_lock, owns_guild
 
 CONFIG_FILE_PATH = 'configs.json'
+# Atraso (em segundos) usado para agrupar várias alterações seguidas em uma única escrita no disco
+SAVE_DEBOUNCE_SECONDS = float(os.getenv("CONFIG_SAVE_DEBOUNCE", "1.0"))
 
-def save_config(server_id: str, channel_id: str, new_channel_config: Dict[str, Any]):
-    """Salva a configuração de um canal específico no arquivo JSON."""
-    try:
-        with open(CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
-            configs = json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        configs = {}
 
-    server_id_str = str(server_id)
-    channel_id_str = str(channel_id)
+class ConfigStore:
+    """
+    Mantém o conteúdo do arquivo de configurações em memória.
+    As leituras não tocam no disco; as alterações são agrupadas (debounce) e gravadas
+    de forma atômica (arquivo temporário + rename) sob um lock do asyncio.
+    Como o arquivo pode ser compartilhado por vários processos de shards, a gravação relê o arquivo
+    sob um lock entre processos e substitui apenas os servidores alterados por este processo.
+    """
+
+    def __init__(self, path: str = CONFIG_FILE_PATH, debounce: float = SAVE_DEBOUNCE_SECONDS):
+        self.path = path
+        self.debounce = debounce
+        self._configs: Optional[Dict[str, Any]] = None
+        self._dirty_servers: set = set()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        self._lock = asyncio.Lock()
+
+    def _ensure_loaded(self) -> Dict[str, Any]:
+        if self._configs is None:
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._configs = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                self._configs = {}
+        return self._configs
+
+    def get_channel(self, server_id: str, channel_id: str) -> Optional[Dict[str, Any]]:
+        channel_config = self._ensure_loaded().get(str(server_id), {}).get("channels", {}).get(str(channel_id))
+        # Cópia para que alterações feitas pelos chamadores só valham depois de um save_config
+        return copy.deepcopy(channel_config) if channel_config is not None else None
+
+    def update_channel(self, server_id: str, channel_id: str, new_channel_config: Dict[str, Any]):
+        configs = self._ensure_loaded()
+        server_config = configs.setdefault(str(server_id), {"channels": {}})
+        channels = server_config.setdefault("channels", {})
+        channels.setdefault(str(channel_id), {}).update(copy.deepcopy(new_channel_config))
+        self._dirty_servers.add(str(server_id))
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Fora do loop de eventos (scripts, testes) a gravação é imediata
+            self.flush_sync()
+            return
+        if self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.debounce, lambda: asyncio.ensure_future(self.flush()))
+
+    def _read_disk(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _merge_and_write(self, servers: Dict[str, Any]):
+        """Relê o arquivo e grava apenas os servidores informados, preservando os dos outros processos."""
+        with file_lock(self.path):
+            configs = self._read_disk()
+            configs.update(servers)
+            self._write_atomic(json.dumps(configs, indent=4))
+
+    def _take_dirty(self) -> Dict[str, Any]:
+        servers = {server_id: copy.deepcopy(self._configs[server_id]) for server_id in self._dirty_servers}
+        self._dirty_servers = set()
+        return servers
 
-    # Garante que o dicionário do servidor e dos canais existam
-    if server_id_str not in configs:
-        configs[server_id_str] = {"channels": {}}
-    elif "channels" not in configs[server_id_str]:
-        configs[server_id_str]["channels"] = {}
+    def _write_atomic(self, data: str):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".configs-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
 
-    channel_config = configs[server_id_str]["channels"].get(channel_id_str, {})
-    channel_config.update(new_channel_config)
-    
-    configs[server_id_str]["channels"][channel_id_str] = channel_config
-    
-    # Atualiza o dicionário principal de configurações
-    configs[server_id_str] = configs[server_id_str]
+    async def flush(self):
+        """Grava as alterações pendentes no disco."""
+        self._flush_handle = None
+        async with self._lock:
+            if not self._dirty_servers:
+                return
+            servers = self._take_dirty()
+            try:
+                await asyncio.to_thread(self._merge_and_write, servers)
+            except Exception as e:
+                self._dirty_servers.update(servers)
+                print(f"Erro ao salvar as configurações em '{self.path}': {e}")
 
-    with open(CONFIG_FILE_PATH, 'w', encoding='utf-8') as f:
-        json.dump(configs, f, indent=4)
+    def notion_urls(self, owns_server: Optional[Callable[[int], bool]] = None) -> List[str]:
+        urls = []
+        for server_id, server_config in self._ensure_loaded().items():
+            if owns_server and not owns_server(int(server_id)):
+                continue
+            for channel_config in server_config.get("channels", {}).values():
+                url = channel_config.get("notion_url")
+                if url and url not in urls:
+                    urls.append(url)
+        return urls
+
+    def flush_sync(self):
+        """Versão síncrona do flush, usada fora do loop e no encerramento do processo."""
+        if self._dirty_servers and self._configs is not None:
+            self._merge_and_write(self._take_dirty())
+
+
+_store = ConfigStore()
+atexit.register(_store.flush_sync)
+
+
+async def flush_configs():
+    """Força a gravação imediata das configurações pendentes."""
+    await _store.flush()
+
+
+def save_config(server_id: str, channel_id: str, new_channel_config: Dict[str, Any]):
+    """Salva a configuração de um canal específico no arquivo JSON."""
+    _store.update_channel(server_id, channel_id, new_channel_config)
 
 
 def load_config(server_id: str, channel_id: str) -> Optional[Dict[str, Any]]:
     """Carrega a configuração de um canal específico do arquivo JSON."""
-    try:
-        with open(CONFIG_FILE_PATH, 'r', encoding='utf-8') as f:
-            configs = json.load(f)
-        return configs.get(str(server_id), {}).get("channels", {}).get(str(channel_id))
-    except FileNotFoundError:
-        return None
\ No newline at end of file
+    return _store.get_channel(server_id, channel_id)
+
+
+def list_notion_urls() -> List[str]:
+    """Retorna as URLs de bases do Notion configuradas nos servidores deste processo (sem repetições)."""
+    return _store.notion_urls(owns_guild)
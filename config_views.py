@@ -0,0 +1,201 @@
+# config_views.py
+# Views do /config usadas raramente (conteúdo do card e valores do /resolvido).
+# Ficam fora do ui_components e são importadas só quando o administrador abre essas opções.
+
+import discord
+from discord import Interaction, SelectOption, ButtonStyle, Color
+from discord.ui import View, Button, Select, Modal, TextInput
+from typing import Optional
+
+# Módulos locais
+from notion_integration import NotionIntegration
+from config_utils import save_config, load_config
+from ui_components import TrackedView, ManagementView
+
+
+class ResolvedPropertyDefaultModal(Modal, title="Definir Valor Padrão"):
+    def __init__(self, property_name: str, current_value: Optional[str] = None):
+        super().__init__()
+        self.property_name = property_name
+        self.value_input = TextInput(
+            label=f"Valor para '{property_name}'",
+            placeholder="Ex: Concluído, Finalizado, etc.",
+            default=current_value,
+            required=True
+        )
+        self.add_item(self.value_input)
+
+    async def on_submit(self, interaction: Interaction):
+        self.value = self.value_input.value
+        await interaction.response.defer()
+        self.stop()
+
+class ResolvedConfigView(TrackedView):
+    def __init__(self, parent_interaction: Interaction, notion: NotionIntegration, config: dict, all_db_properties: list):
+        super().__init__(timeout=180.0)
+        self.parent_interaction = parent_interaction
+        self.guild_id = parent_interaction.guild_id
+        self.channel_id = parent_interaction.channel.parent_id if isinstance(parent_interaction.channel, discord.Thread) else parent_interaction.channel.id
+        self.notion = notion
+        self.config = config
+        # As propriedades são buscadas (de forma assíncrona) por quem cria a view
+        self.all_db_properties = all_db_properties
+
+    async def _update_message(self, interaction: Interaction):
+        self.config = load_config(self.guild_id, self.channel_id)
+        defaults = self.config.get('resolved_command_defaults', {})
+        
+        embed = discord.Embed(title="⚙️ Configuração do /resolvido", color=Color.orange())
+        if not defaults:
+            embed.description = "Nenhuma propriedade com valor padrão foi configurada ainda."
+        else:
+            desc = "Quando `/resolvido` for usado, as seguintes propriedades serão definidas:\n\n"
+            for key, value in defaults.items():
+                if isinstance(value, list): value_str = ", ".join(f"`{v}`" for v in value)
+                else: value_str = f"`{value}`"
+                desc += f"🔹 **{key}**: {value_str}\n"
+            embed.description = desc
+        
+        await self.parent_interaction.edit_original_response(embed=embed, view=self)
+
+
+    @discord.ui.button(label="Adicionar/Editar Propriedade", style=ButtonStyle.success, emoji="➕")
+    async def add_property(self, interaction: Interaction, button: Button):
+        
+        prop_options = [SelectOption(label=p['name']) for p in self.all_db_properties if p['type'] != 'title']
+        prop_select = Select(placeholder="Escolha a propriedade para definir um valor...", options=prop_options[:25])
+
+        async def select_callback(inter: Interaction):
+            selected_prop_name = inter.data['values'][0]
+            prop_details = next((p for p in self.all_db_properties if p['name'] == selected_prop_name), None)
+            
+            if prop_details and prop_details['type'] in ['select', 'multi_select', 'status']:
+                options = prop_details.get('options', [])
+                is_multi = prop_details['type'] == 'multi_select'
+                
+                value_select = Select(
+                    placeholder=f"Escolha o valor padrão para '{selected_prop_name}'...",
+                    options=[SelectOption(label=opt) for opt in options[:25]],
+                    max_values=len(options) if is_multi else 1
+                )
+
+                async def value_select_callback(value_inter: Interaction):
+                    chosen_value = value_inter.data['values']
+                    current_defaults = self.config.get('resolved_command_defaults', {})
+                    current_defaults[selected_prop_name] = chosen_value if is_multi else chosen_value[0]
+                    save_config(self.guild_id, self.channel_id, {'resolved_command_defaults': current_defaults})
+                    await value_inter.response.edit_message(content=f"✅ Valor padrão para **{selected_prop_name}** salvo!", view=None, delete_after=5)
+                    await self._update_message(interaction)
+
+                value_select.callback = value_select_callback
+                view = View().add_item(value_select)
+                await inter.response.edit_message(content="Agora, escolha o valor padrão:", view=view)
+
+            else:
+                current_defaults = self.config.get('resolved_command_defaults', {})
+                modal = ResolvedPropertyDefaultModal(selected_prop_name, current_defaults.get(selected_prop_name))
+                await inter.response.send_modal(modal)
+                await modal.wait()
+
+                if hasattr(modal, 'value'):
+                    current_defaults[selected_prop_name] = modal.value
+                    save_config(self.guild_id, self.channel_id, {'resolved_command_defaults': current_defaults})
+                    await inter.followup.send(f"✅ Valor padrão para **{selected_prop_name}** salvo!", ephemeral=True, delete_after=5)
+                    await self._update_message(interaction)
+        
+        prop_select.callback = select_callback
+        view = View().add_item(prop_select)
+        await interaction.response.send_message("Primeiro, selecione a propriedade:", view=view, ephemeral=True)
+
+
+    @discord.ui.button(label="Remover Propriedade", style=ButtonStyle.danger, emoji="🗑️")
+    async def remove_property(self, interaction: Interaction, button: Button):
+        defaults = self.config.get('resolved_command_defaults', {})
+        if not defaults:
+            return await interaction.response.send_message("❌ Nenhuma propriedade configurada para remover.", ephemeral=True, delete_after=10)
+
+        prop_options = [SelectOption(label=name) for name in defaults.keys()]
+        prop_select = Select(placeholder="Escolha a propriedade para remover...", options=prop_options[:25])
+
+        async def select_callback(inter: Interaction):
+            prop_to_remove = inter.data['values'][0]
+            current_defaults = self.config.get('resolved_command_defaults', {})
+            if prop_to_remove in current_defaults:
+                del current_defaults[prop_to_remove]
+                save_config(self.guild_id, self.channel_id, {'resolved_command_defaults': current_defaults})
+                await inter.response.send_message(f"✅ Propriedade **{prop_to_remove}** removida.", ephemeral=True, delete_after=5)
+                await self._update_message(interaction)
+        
+        prop_select.callback = select_callback
+        view = View().add_item(prop_select)
+        await interaction.response.send_message("Selecione a propriedade para remover:", view=view, ephemeral=True)
+
+
+    @discord.ui.button(label="Voltar", style=ButtonStyle.secondary, emoji="↩️")
+    async def go_back(self, interaction: Interaction, button: Button):
+        await interaction.response.defer()
+        main_view = ManagementView(self.parent_interaction, self.notion, self.config)
+        await self.parent_interaction.edit_original_response(content="Este canal já está configurado. Escolha uma opção de gerenciamento:", embed=None, view=main_view)
+
+class CardContentView(TrackedView):
+    def __init__(self, parent_interaction: Interaction, notion: NotionIntegration, config: dict):
+        super().__init__(timeout=180.0)
+        self.parent_interaction = parent_interaction
+        self.guild_id = parent_interaction.guild_id
+        self.channel_id = parent_interaction.channel.parent_id if isinstance(parent_interaction.channel, discord.Thread) else parent_interaction.channel.id
+        self.notion = notion
+        self.config = config
+        self._update_buttons()
+
+    def _update_buttons(self):
+        self.clear_items()
+        self.add_item(Button(label="Configurar Resumo por IA", custom_id="config_ai_summary", style=ButtonStyle.secondary, emoji="✨"))
+        self.add_item(Button(label="Configurar Captura de 1ª Mensagem", custom_id="config_first_message", style=ButtonStyle.secondary, emoji="✉️"))
+        self.add_item(Button(label="Voltar", custom_id="back_to_main", style=ButtonStyle.grey, row=2))
+
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        # CORREÇÃO APLICADA AQUI
+        custom_id = interaction.data.get('custom_id')
+
+        if custom_id == "config_ai_summary":
+            await self.configure_feature(interaction, 'ai_summary_for_commands', 'Resumo por IA')
+            return False 
+        elif custom_id == "config_first_message":
+            await self.configure_feature(interaction, 'capture_first_message_for_commands', 'Captura da 1ª Mensagem')
+            return False
+        elif custom_id == "back_to_main":
+            main_view = ManagementView(self.parent_interaction, self.notion, self.config)
+            await self.parent_interaction.edit_original_response(content="Este canal já está configurado. Escolha uma opção de gerenciamento:", embed=None, view=main_view)
+            await interaction.response.defer()
+            return False
+        return True
+
+    async def configure_feature(self, interaction: Interaction, config_key: str, feature_name: str):
+        current_setting = self.config.get(config_key, [])
+        options = [
+            SelectOption(label="/card", value="card", default=("card" in current_setting)),
+            SelectOption(label="/resolvido", value="resolvido", default=("resolvido" in current_setting))
+        ]
+        select_menu = Select(placeholder=f"Ativar {feature_name} para...", options=options, min_values=0, max_values=2, custom_id=f"select_{config_key}")
+
+        async def select_callback(inter: Interaction):
+            save_config(self.guild_id, self.channel_id, {config_key: inter.data.get('values', [])})
+            self.config = load_config(self.guild_id, self.channel_id)
+            await inter.response.edit_message(content=f"✅ Configuração de **{feature_name}** atualizada!", view=None, delete_after=5)
+            await self.update_embed(self.parent_interaction)
+
+        select_menu.callback = select_callback
+        view = View().add_item(select_menu)
+        await interaction.response.send_message(f"Selecione para quais comandos a função **{feature_name}** deve ser ativada.", view=view, ephemeral=True)
+
+    async def update_embed(self, interaction: Interaction):
+        ai_commands = self.config.get('ai_summary_for_commands', [])
+        fm_commands = self.config.get('capture_first_message_for_commands', [])
+        ai_status = ", ".join(f"`/{cmd}`" for cmd in ai_commands) if ai_commands else "Nenhum"
+        fm_status = ", ".join(f"`/{cmd}`" for cmd in fm_commands) if fm_commands else "Nenhum"
+        
+        embed = discord.Embed(title="⚙️ Configurar Conteúdo do Card", color=Color.blue())
+        embed.add_field(name="Resumo por IA", value=f"Ativado para: {ai_status}", inline=False)
+        embed.add_field(name="Captura da 1ª Mensagem", value=f"Ativado para: {fm_status}", inline=False)
+        
+        await self.parent_interaction.edit_original_response(embed=embed, view=self)
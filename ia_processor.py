@@ -1,52 +1,326 @@
 # ia_processor.py
 
 import os
-import google.generativeai as genai
-from typing import List
+import json
+import time
+import random
+import asyncio
+import hashlib
+import tempfile
+from collections import OrderedDict, deque
+from typing import List, Optional, Dict, Any, Callable, Awaitable, Tuple
 import discord
 
-# Configura a API do Google com a chave do ambiente
-try:
-    genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
-except TypeError:
-    print("AVISO: Chave da API do Google não encontrada. A funcionalidade de IA estará desativada.")
-    genai = None
+from metrics import metrics
+from sharding import file_lock
 
-def _format_conversation(messages: List[discord.Message]) -> str:
-    """Formata uma lista de mensagens do Discord em um texto único e legível."""
-    conversation_text = ""
-    for msg in reversed(messages): # As mensagens vêm da mais nova para a mais antiga
-        if not msg.author.bot: # Ignora mensagens de bots
-            conversation_text += f"{msg.author.display_name}: {msg.clean_content}\n"
-    return conversation_text
+# SDK do Gemini: importado e configurado no primeiro uso (ver load_genai), fora da inicialização do bot
+genai = None
+_genai_loaded = False
+_TRANSIENT_ERRORS = (asyncio.TimeoutError,)
 
-async def summarize_thread_content(messages: List[discord.Message]) -> str:
-    """
-    Usa a API do Gemini para resumir uma conversa de um tópico do Discord.
-    """
-    if not genai:
-        return "Erro: A funcionalidade de IA não está configurada (API Key ausente)."
 
-    conversation = _format_conversation(messages)
-    if not conversation.strip():
-        return "" # Retorna vazio se não houver mensagens de usuários
+def load_genai():
+    """Importa e configura o SDK do Gemini na primeira chamada; retorna None se a IA estiver desativada."""
+    global genai, _genai_loaded, _TRANSIENT_ERRORS
+    if _genai_loaded:
+        return genai
+    _genai_loaded = True
+    import google.generativeai as sdk
 
-    # Modelo de IA configurado para ser eficiente e de alta qualidade
-    model = genai.GenerativeModel('gemini-1.5-flash-latest')
+    # Configura a API do Google com a chave do ambiente
+    try:
+        sdk.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+        genai = sdk
+    except TypeError:
+        print("AVISO: Chave da API do Google não encontrada. A funcionalidade de IA estará desativada.")
 
-    # O prompt é a instrução que damos para a IA. É a parte mais importante.
-    # REVERTIDO PARA O PROMPT ORIGINAL
-    prompt = f"""
-    Você é um assistente especialista em resumir discussões de equipes.
-    Sua tarefa é ler a transcrição de uma conversa de um tópico do Discord e criar um resumo conciso e informativo em português.
+    try:
+        from google.api_core import exceptions as google_exceptions
+        _TRANSIENT_ERRORS = (asyncio.TimeoutError, google_exceptions.ResourceExhausted, google_exceptions.ServiceUnavailable,
+                             google_exceptions.InternalServerError, google_exceptions.DeadlineExceeded)
+    except ImportError:
+        pass
+    return genai
+
+# Modelo usado nos resumos
+GEMINI_MODEL_NAME = os.getenv("GEMINI_MODEL", "gemini-1.5-flash-latest")
+# Quantidade máxima de chamadas simultâneas ao Gemini no processo inteiro
+LLM_MAX_CONCURRENCY = int(os.getenv("AI_MAX_CONCURRENT_REQUESTS", "4"))
+# Tempo máximo (em segundos) de cada chamada e número de novas tentativas em erros transitórios
+LLM_REQUEST_TIMEOUT = float(os.getenv("AI_REQUEST_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("AI_MAX_RETRIES", "3"))
+# Intervalo mínimo (em segundos) entre dois avisos de posição na fila para o mesmo callback
+QUEUE_NOTIFY_INTERVAL = float(os.getenv("AI_QUEUE_NOTIFY_INTERVAL", "3"))
 
+# Estimativa simples de tokens (~4 caracteres por token), suficiente para dividir a conversa em janelas
+CHARS_PER_TOKEN = 4
+# Tamanho máximo (em tokens estimados) de cada janela da conversa enviada ao modelo
+CHUNK_TOKEN_BUDGET = int(os.getenv("AI_SUMMARY_CHUNK_TOKENS", "12000"))
+# Quantidade máxima de janelas resumidas ao mesmo tempo para um mesmo tópico
+MAX_PARALLEL_CHUNKS = int(os.getenv("AI_SUMMARY_MAX_PARALLEL_CHUNKS", "4"))
+# Cache persistente de resumos por tópico
+SUMMARY_CACHE_PATH = os.getenv("AI_SUMMARY_CACHE_PATH", "summary_cache.json")
+SUMMARY_CACHE_MAX_ENTRIES = int(os.getenv("AI_SUMMARY_CACHE_MAX_ENTRIES", "500"))
+
+SUMMARY_INSTRUCTIONS = """
     O resumo deve:
     1.  Ser escrito em da melhor forma para organização.
     2.  Identificar a ideia principal ou o problema discutido.
     3.  Listar os principais pontos, decisões tomadas ou ações sugeridas.
     4.  Incluir quaisquer links importantes que foram compartilhados na conversa.
     5.  Ser objetivo e direto.
+"""
+
+
+class SummaryCache:
+    """
+    Cache LRU persistente dos resumos, um por tópico. Cada entrada guarda o hash da sequência
+    (ID, edição) das mensagens resumidas e quantas eram, para detectar se o tópico mudou
+    ou se apenas recebeu mensagens novas.
+    O arquivo pode ser compartilhado por processos de shards: cada gravação relê o arquivo sob um
+    lock entre processos e acrescenta a entrada nova, sem descartar as gravadas pelos outros.
+    """
+
+    def __init__(self, path: str = SUMMARY_CACHE_PATH, max_entries: int = SUMMARY_CACHE_MAX_ENTRIES):
+        self.path, self.max_entries = path, max_entries
+        self._entries: Optional[OrderedDict] = None
+        self._lock = asyncio.Lock()
+
+    def _read_disk(self) -> OrderedDict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return OrderedDict(json.load(f))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return OrderedDict()
+
+    def _ensure_loaded(self) -> OrderedDict:
+        if self._entries is None:
+            self._entries = self._read_disk()
+        return self._entries
+
+    def get(self, thread_id: int) -> Optional[Dict[str, Any]]:
+        entries = self._ensure_loaded()
+        entry = entries.get(str(thread_id))
+        if entry is not None:
+            entries.move_to_end(str(thread_id))
+        return entry
+
+    def _write(self, data: str):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix=".summary-cache-", suffix=".tmp", dir=directory)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _trim(self, entries: OrderedDict):
+        while len(entries) > self.max_entries:
+            entries.popitem(last=False)
+
+    def _merge_and_write(self, key: str, entry: Dict[str, Any]):
+        with file_lock(self.path):
+            entries = self._read_disk()
+            entries.pop(key, None)
+            entries[key] = entry
+            self._trim(entries)
+            self._write(json.dumps(entries))
+
+    async def put(self, thread_id: int, signature_hash: str, message_count: int, summary: str):
+        entries = self._ensure_loaded()
+        entry = {"hash": signature_hash, "count": message_count, "summary": summary}
+        entries[str(thread_id)] = entry
+        entries.move_to_end(str(thread_id))
+        self._trim(entries)
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._merge_and_write, str(thread_id), entry)
+            except Exception as e:
+                print(f"Erro ao salvar o cache de resumos: {e}")
 
+
+summary_cache = SummaryCache()
+
+# Recebe a posição (1 = próximo a ser atendido) enquanto a chamada espera na fila
+QueueCallback = Callable[[int], Awaitable[None]]
+
+
+class GeminiPool:
+    """
+    Handle único do modelo do Gemini com uma fila FIFO de concorrência limitada.
+    Cada chamada tem timeout próprio e é repetida com backoff em erros transitórios.
+    Os avisos de posição são agrupados por callback (as janelas de um mesmo resumo compartilham o
+    callback), enviados só quando a posição muda e no máximo uma vez a cada QUEUE_NOTIFY_INTERVAL.
+    """
+
+    def __init__(self, model_name: str = GEMINI_MODEL_NAME, max_concurrency: int = LLM_MAX_CONCURRENCY,
+                 timeout: float = LLM_REQUEST_TIMEOUT, max_retries: int = LLM_MAX_RETRIES):
+        self.model_name, self.max_concurrency = model_name, max_concurrency
+        self.timeout, self.max_retries = timeout, max_retries
+        self._model = None
+        self._active = 0
+        self._waiters: deque = deque()  # (future, on_queue_position)
+        self._last_notified: Dict[QueueCallback, Tuple[int, float]] = {}  # {callback: (posição, horário do aviso)}
+        self._notifiers: Dict[QueueCallback, asyncio.Task] = {}  # Um aviso em andamento por callback
+
+    @property
+    def model(self):
+        if self._model is None:
+            # Modelo de IA configurado para ser eficiente e de alta qualidade
+            self._model = load_genai().GenerativeModel(self.model_name)
+        return self._model
+
+    @property
+    def queue_size(self) -> int:
+        return len(self._waiters)
+
+    def _position_of(self, callback: QueueCallback) -> Optional[int]:
+        """Melhor posição entre as chamadas na fila com este callback (None se não houver nenhuma)."""
+        for position, (_, waiter_callback) in enumerate(self._waiters, start=1):
+            if waiter_callback is callback:
+                return position
+        return None
+
+    def _notify_positions(self):
+        positions: Dict[QueueCallback, int] = {}
+        for position, (_, callback) in enumerate(self._waiters, start=1):
+            if callback:
+                positions.setdefault(callback, position)
+        now = time.monotonic()
+        for callback, (_, notified_at) in list(self._last_notified.items()):
+            if callback not in positions and callback not in self._notifiers and now - notified_at >= QUEUE_NOTIFY_INTERVAL:
+                del self._last_notified[callback]
+        for callback, position in positions.items():
+            last = self._last_notified.get(callback)
+            if callback not in self._notifiers and (last is None or last[0] != position):
+                self._notifiers[callback] = asyncio.create_task(self._notify_loop(callback))
+
+    async def _notify_loop(self, callback: QueueCallback):
+        """Envia a posição atual do callback, respeitando o intervalo mínimo, até ela parar de mudar."""
+        try:
+            while True:
+                position = self._position_of(callback)
+                last = self._last_notified.get(callback)
+                if position is None or (last and last[0] == position):
+                    return
+                wait = last[1] + QUEUE_NOTIFY_INTERVAL - time.monotonic() if last else 0
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                    continue  # A posição pode ter mudado durante a espera
+                self._last_notified[callback] = (position, time.monotonic())
+                await self._safe_notify(callback, position)
+        finally:
+            self._notifiers.pop(callback, None)
+
+    @staticmethod
+    async def _safe_notify(callback: QueueCallback, position: int):
+        try:
+            await callback(position)
+        except Exception as e:
+            print(f"Aviso: não foi possível informar a posição na fila: {e}")
+
+    async def _acquire(self, on_queue_position: Optional[QueueCallback]):
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((future, on_queue_position))
+        if on_queue_position:
+            self._notify_positions()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self._release()  # A vaga já tinha sido repassada para esta chamada
+            else:
+                self._waiters = deque(w for w in self._waiters if w[0] is not future)
+                self._notify_positions()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            future, _ = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)  # A vaga passa direto para o próximo da fila
+                self._notify_positions()
+                return
+        self._active -= 1
+
+    async def generate(self, prompt: str, on_queue_position: Optional[QueueCallback] = None) -> str:
+        attempt = 0
+        while True:
+            await self._acquire(on_queue_position)
+            try:
+                with metrics.timer("gemini_request_duration_seconds"):
+                    response = await asyncio.wait_for(self.model.generate_content_async(prompt), timeout=self.timeout)
+                metrics.inc("gemini_requests_total", result="ok")
+                usage = getattr(response, 'usage_metadata', None)
+                if usage:
+                    metrics.inc("gemini_tokens_total", getattr(usage, 'prompt_token_count', 0) or 0, kind="prompt")
+                    metrics.inc("gemini_tokens_total", getattr(usage, 'candidates_token_count', 0) or 0, kind="response")
+                return response.text
+            except _TRANSIENT_ERRORS as e:
+                metrics.inc("gemini_requests_total", result="retry" if attempt < self.max_retries else "error")
+                if attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                delay = random.uniform(0.5, 1.0) * min(30.0, 2 ** attempt)
+                print(f"Aviso: chamada ao Gemini falhou ({e!r}); nova tentativa {attempt}/{self.max_retries} em {delay:.1f}s.")
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+
+gemini_pool = GeminiPool()
+
+
+def _estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def _conversation_lines(messages: List[discord.Message]) -> List[str]:
+    """Retorna as falas dos usuários em ordem cronológica, uma linha por mensagem."""
+    # As mensagens vêm da mais nova para a mais antiga; mensagens de bots são ignoradas
+    return [f"{msg.author.display_name}: {msg.clean_content}" for msg in reversed(messages) if not msg.author.bot]
+
+def _message_signatures(messages: List[discord.Message]) -> List[str]:
+    """Assinaturas (ID e horário da última edição) das mensagens de usuários, na mesma ordem de _conversation_lines."""
+    return [f"{msg.id}:{msg.edited_at.timestamp() if msg.edited_at else ''}" for msg in reversed(messages) if not msg.author.bot]
+
+def _hash_signatures(signatures: List[str]) -> str:
+    return hashlib.sha256("\n".join(signatures).encode('utf-8')).hexdigest()
+
+def _format_conversation(messages: List[discord.Message]) -> str:
+    """Formata uma lista de mensagens do Discord em um texto único e legível."""
+    lines = _conversation_lines(messages)
+    return "\n".join(lines) + "\n" if lines else ""
+
+def _chunk_lines(lines: List[str], token_budget: int) -> List[str]:
+    """Agrupa as linhas em janelas que cabem no orçamento de tokens; linhas gigantes são cortadas."""
+    max_chars = token_budget * CHARS_PER_TOKEN
+    chunks, current, current_tokens = [], [], 0
+    for line in lines:
+        pieces = [line[i:i + max_chars] for i in range(0, len(line), max_chars)] or [line]
+        for piece in pieces:
+            piece_tokens = _estimate_tokens(piece)
+            if current and current_tokens + piece_tokens > token_budget:
+                chunks.append("\n".join(current))
+                current, current_tokens = [], 0
+            current.append(piece)
+            current_tokens += piece_tokens
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+def _build_summary_prompt(conversation: str) -> str:
+    # O prompt é a instrução que damos para a IA. É a parte mais importante.
+    return f"""
+    Você é um assistente especialista em resumir discussões de equipes.
+    Sua tarefa é ler a transcrição de uma conversa de um tópico do Discord e criar um resumo conciso e informativo em português.
+{SUMMARY_INSTRUCTIONS}
     Aqui está a transcrição da conversa:
     ---
     {conversation}
@@ -55,9 +329,133 @@ async def summarize_thread_content(messages: List[discord.Message]) -> str:
     Por favor, gere o resumo.
     """
 
+def _build_partial_prompt(conversation: str, index: int, total: int) -> str:
+    return f"""
+    Você é um assistente especialista em resumir discussões de equipes.
+    A transcrição abaixo é a parte {index} de {total} de uma conversa longa de um tópico do Discord.
+    Resuma esta parte em português, preservando decisões, ações sugeridas, responsáveis e todos os links compartilhados.
+    Não escreva introdução nem conclusão: este resumo parcial será combinado com os das outras partes.
+
+    Transcrição (parte {index} de {total}):
+    ---
+    {conversation}
+    ---
+    """
+
+def _build_reduce_prompt(partial_summaries: List[str], final: bool) -> str:
+    joined = "\n\n".join(f"Parte {i}:\n{summary}" for i, summary in enumerate(partial_summaries, start=1))
+    if not final:
+        return f"""
+    Combine os resumos parciais abaixo, de partes consecutivas de uma mesma conversa, em um único resumo parcial em português.
+    Preserve decisões, ações sugeridas e todos os links. Não escreva introdução nem conclusão.
+
+    ---
+    {joined}
+    ---
+    """
+    return f"""
+    Você é um assistente especialista em resumir discussões de equipes.
+    Abaixo estão resumos parciais, em ordem, de partes consecutivas de uma conversa longa de um tópico do Discord.
+    Sua tarefa é combiná-los em um único resumo conciso e informativo em português.
+{SUMMARY_INSTRUCTIONS}
+    Resumos parciais:
+    ---
+    {joined}
+    ---
+
+    Por favor, gere o resumo.
+    """
+
+def _build_update_prompt(previous_summary: str, new_conversation: str) -> str:
+    return f"""
+    Você é um assistente especialista em resumir discussões de equipes.
+    Abaixo está o resumo atual de uma conversa de um tópico do Discord e, em seguida, as mensagens novas enviadas depois dele.
+    Atualize o resumo em português para incorporar as mensagens novas, mantendo o mesmo formato.
+{SUMMARY_INSTRUCTIONS}
+    Resumo atual:
+    ---
+    {previous_summary}
+    ---
+
+    Mensagens novas:
+    ---
+    {new_conversation}
+    ---
+
+    Por favor, gere o resumo atualizado.
+    """
+
+async def _generate(prompt: str, on_queue_position: Optional[QueueCallback] = None) -> str:
+    return await gemini_pool.generate(prompt, on_queue_position)
+
+async def _reduce_summaries(partial_summaries: List[str], semaphore: asyncio.Semaphore, on_queue_position: Optional[QueueCallback] = None) -> str:
+    """Combina os resumos parciais; se não couberem em uma única chamada, combina em níveis."""
+    while _estimate_tokens("\n\n".join(partial_summaries)) > CHUNK_TOKEN_BUDGET and len(partial_summaries) > 1:
+        groups = _chunk_lines(partial_summaries, CHUNK_TOKEN_BUDGET)
+        if len(groups) >= len(partial_summaries):
+            break
+
+        async def reduce_group(group: str) -> str:
+            async with semaphore:
+                return await _generate(_build_reduce_prompt([group], final=False), on_queue_position)
+
+        partial_summaries = list(await asyncio.gather(*(reduce_group(group) for group in groups)))
+    return await _generate(_build_reduce_prompt(partial_summaries, final=True), on_queue_position)
+
+async def _summarize_lines(lines: List[str], on_queue_position: Optional[QueueCallback] = None) -> str:
+    """Resume as linhas da conversa: uma única chamada se couberem, ou map-reduce por janelas."""
+    chunks = _chunk_lines(lines, CHUNK_TOKEN_BUDGET)
+    if len(chunks) == 1:
+        return await _generate(_build_summary_prompt(chunks[0] + "\n"), on_queue_position)
+
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+    async def summarize_chunk(index: int, chunk: str) -> str:
+        async with semaphore:
+            return await _generate(_build_partial_prompt(chunk, index, len(chunks)), on_queue_position)
+
+    partial_summaries = await asyncio.gather(*(summarize_chunk(i, chunk) for i, chunk in enumerate(chunks, start=1)))
+    return await _reduce_summaries(list(partial_summaries), semaphore, on_queue_position)
+
+async def summarize_thread_content(messages: List[discord.Message], thread_id: Optional[int] = None, on_queue_position: Optional[QueueCallback] = None) -> str:
+    """
+    Usa a API do Gemini para resumir uma conversa de um tópico do Discord.
+    Conversas longas são divididas em janelas resumidas em paralelo (map) e depois combinadas (reduce).
+    Com `thread_id`, o resumo é guardado em cache: se nada mudou ele é reaproveitado, e se apenas
+    chegaram mensagens novas somente elas são enviadas ao modelo junto com o resumo anterior.
+    `on_queue_position` é chamado com a posição na fila sempre que a chamada precisar esperar.
+    """
+    if not load_genai():
+        return "Erro: A funcionalidade de IA não está configurada (API Key ausente)."
+
+    lines = _conversation_lines(messages)
+    if not lines:
+        return "" # Retorna vazio se não houver mensagens de usuários
+
+    signatures = _message_signatures(messages)
+    signature_hash = _hash_signatures(signatures)
+    cached = summary_cache.get(thread_id) if thread_id is not None else None
+    if cached and cached["hash"] == signature_hash:
+        metrics.cache_access("summary", hit=True)
+        return cached["summary"]
+
     try:
-        response = await model.generate_content_async(prompt)
-        return response.text
+        previous_count = cached["count"] if cached else 0
+        if cached and 0 < previous_count < len(signatures) and _hash_signatures(signatures[:previous_count]) == cached["hash"]:
+            # Só há mensagens novas: atualiza o resumo anterior com o que mudou
+            metrics.inc("cache_requests_total", cache="summary", result="incremental")
+            new_lines = lines[previous_count:]
+            new_conversation = "\n".join(new_lines)
+            if _estimate_tokens(new_conversation) > CHUNK_TOKEN_BUDGET:
+                new_conversation = await _summarize_lines(new_lines, on_queue_position)
+            summary = await _generate(_build_update_prompt(cached["summary"], new_conversation), on_queue_position)
+        else:
+            metrics.cache_access("summary", hit=False)
+            summary = await _summarize_lines(lines, on_queue_position)
     except Exception as e:
         print(f"Erro ao chamar a API do Gemini: {e}")
-        return f"Erro ao gerar o resumo: {e}"
\ No newline at end of file
+        return f"Erro ao gerar o resumo: {e}"
+
+    if thread_id is not None and summary:
+        await summary_cache.put(thread_id, signature_hash, len(signatures), summary)
+    return summary
@@ -0,0 +1,121 @@
+# import_profile.py
+#
+# Relatório do tempo de importação do bot (o que acontece antes de conectar ao gateway).
+# Importa o `bot` em processos novos com `python -X importtime`, com e sem a inicialização
+# preguiçosa (BOT_LAZY_INIT), e mostra o tempo total, os pacotes mais lentos e quais SDKs foram carregados:
+#
+#   python import_profile.py --runs 5 --output importacao.json
+
+import os
+import sys
+import json
+import argparse
+import tempfile
+import statistics
+import subprocess
+from collections import defaultdict
+from typing import Dict, Any, List, Optional, Tuple
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+# Módulos pesados acompanhados no relatório
+WATCHED_MODULES = ("discord", "notion_client", "httpx", "google.generativeai", "google.api_core", "flask", "config_views")
+
+_CHILD_CODE = (
+    "import sys, time, json\n"
+    "start = time.perf_counter()\n"
+    "import bot\n"
+    "elapsed = time.perf_counter() - start\n"
+    "print(json.dumps({'seconds': elapsed, 'loaded': [name for name in sys.argv[1:] if name in sys.modules]}))\n"
+)
+
+
+def _parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """Linhas do `-X importtime` como (módulo, self_us, cumulative_us)."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            entries.append((name.strip(), int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    return entries
+
+
+def run_once(lazy: bool) -> Dict[str, Any]:
+    """Importa o bot em um processo novo e retorna o tempo medido e o tempo por pacote de topo."""
+    # Diretório temporário como cwd: arquivos que o bot cria no modo completo (como a cópia local) não sujam o repositório
+    with tempfile.TemporaryDirectory(prefix="import-profile-") as workdir:
+        env = dict(os.environ, BOT_LAZY_INIT="true" if lazy else "false", PYTHONDONTWRITEBYTECODE="1",
+                   PYTHONPATH=os.pathsep.join(filter(None, [REPO_DIR, os.getenv("PYTHONPATH")])),
+                   NOTION_MIRROR_DB_PATH=os.path.join(workdir, "notion_mirror.db"))
+        # O NotionIntegration exige o token na construção; nenhuma chamada é feita durante a importação
+        env.setdefault("NOTION_TOKEN", "import-profile")
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", _CHILD_CODE, *WATCHED_MODULES],
+                                cwd=workdir, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"A importação do bot falhou (BOT_LAZY_INIT={lazy}):\n{result.stderr[-2000:]}")
+    summary = json.loads(result.stdout.strip().splitlines()[-1])
+
+    # Tempo próprio de cada módulo somado por pacote de topo (o cumulativo contaria os aninhados mais de uma vez)
+    packages: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in _parse_importtime(result.stderr):
+        packages[name.split(".")[0]] += self_us
+    return {"seconds": summary["seconds"], "loaded": summary["loaded"], "packages_us": dict(packages)}
+
+
+def profile(lazy: bool, runs: int) -> Dict[str, Any]:
+    samples = [run_once(lazy) for _ in range(runs)]
+    package_names = {name for sample in samples for name in sample["packages_us"]}
+    packages_ms = {name: round(statistics.median(sample["packages_us"].get(name, 0) for sample in samples) / 1000, 1) for name in package_names}
+    return {
+        "lazy": lazy,
+        "import_seconds_median": round(statistics.median(sample["seconds"] for sample in samples), 4),
+        "import_seconds_min": round(min(sample["seconds"] for sample in samples), 4),
+        "loaded_modules": samples[-1]["loaded"],
+        "top_packages_ms": dict(sorted(packages_ms.items(), key=lambda item: item[1], reverse=True)[:15]),
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=REPO_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Tempo de importação do bot (mediana de {report['runs']} execuções, commit {report['commit'] or '?'}):")
+    for mode in report["modes"]:
+        label = "preguiçosa" if mode["lazy"] else "completa"
+        print(f"\n  Inicialização {label}: {mode['import_seconds_median'] * 1000:.0f} ms (mínimo {mode['import_seconds_min'] * 1000:.0f} ms)")
+        print(f"    Carregados: {', '.join(mode['loaded_modules']) or 'nenhum dos módulos acompanhados'}")
+        for name, ms in list(mode["top_packages_ms"].items())[:8]:
+            print(f"    {name:<28} {ms:>8.1f} ms")
+    if len(report["modes"]) == 2:
+        eager, lazy = (mode["import_seconds_median"] for mode in sorted(report["modes"], key=lambda mode: mode["lazy"]))
+        if eager:
+            print(f"\nA inicialização preguiçosa economiza {(eager - lazy) * 1000:.0f} ms ({(eager - lazy) / eager:.0%}) na importação.")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Mede o tempo de importação do bot, com e sem a inicialização preguiçosa.")
+    parser.add_argument("--runs", type=int, default=3, help="importações por modo (é usada a mediana)")
+    parser.add_argument("--mode", choices=("both", "lazy", "eager"), default="both")
+    parser.add_argument("--output", help="arquivo JSON para salvar o relatório")
+    args = parser.parse_args(argv)
+
+    modes = {"both": (False, True), "lazy": (True,), "eager": (False,)}[args.mode]
+    report = {"commit": _git_commit(), "python": sys.version.split()[0], "runs": args.runs,
+              "modes": [profile(lazy, max(1, args.runs)) for lazy in modes]}
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"\nRelatório salvo em '{args.output}'.")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,172 @@
+# metrics.py
+
+import os
+import time
+import threading
+import contextlib
+from collections import deque
+from typing import Dict, Any, Optional, Tuple, List, Iterator
+
+# Porta do endpoint de métricas no formato do Prometheus (vazio = desativado)
+METRICS_PORT = os.getenv("METRICS_PORT", "")
+METRICS_HOST = os.getenv("METRICS_HOST", "127.0.0.1")
+# Amostras recentes mantidas por histograma para calcular os percentis
+HISTOGRAM_WINDOW = int(os.getenv("METRICS_HISTOGRAM_WINDOW", "2048"))
+QUANTILES = (0.5, 0.95, 0.99)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, Any]) -> LabelKey:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    """Contagem, soma e uma janela das amostras mais recentes (para os percentis)."""
+
+    def __init__(self, window: int = HISTOGRAM_WINDOW):
+        self.count, self.total = 0, 0.0
+        self.samples: deque = deque(maxlen=window)
+
+    def observe(self, value: float):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def quantiles(self) -> Dict[float, float]:
+        ordered = sorted(self.samples)
+        if not ordered:
+            return {q: 0.0 for q in QUANTILES}
+        return {q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] for q in QUANTILES}
+
+
+class MetricsRegistry:
+    """
+    Registro em memória de contadores e histogramas, com rótulos.
+    As métricas são atualizadas pelo loop do bot e lidas pela thread do servidor HTTP, daí o lock.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelKey, float]] = {}
+        self._histograms: Dict[str, Dict[LabelKey, Histogram]] = {}
+        self._help: Dict[str, str] = {}
+        self.started_at = time.time()
+
+    def describe(self, name: str, help_text: str):
+        self._help[name] = help_text
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._histograms.setdefault(name, {}).setdefault(key, Histogram()).observe(value)
+
+    @contextlib.contextmanager
+    def timer(self, name: str, **labels) -> Iterator[None]:
+        """Mede a duração (em segundos) do bloco; funciona também em torno de `await`."""
+        start = time.perf_counter()
+        status = "ok"
+        try:
+            yield
+        except BaseException:
+            status = "error"
+            raise
+        finally:
+            self.observe(name, time.perf_counter() - start, status=status, **labels)
+
+    def cache_access(self, cache: str, hit: bool):
+        self.inc("cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def counter_value(self, name: str, **labels) -> float:
+        with self._lock:
+            series = self._counters.get(name, {})
+            if labels:
+                return series.get(_label_key(labels), 0)
+            return sum(series.values())
+
+    def hit_rates(self) -> Dict[str, Tuple[float, int]]:
+        """Taxa de acerto e total de acessos de cada cache."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for key, value in self._counters.get("cache_requests_total", {}).items():
+                labels = dict(key)
+                totals.setdefault(labels.get("cache", "?"), {}).setdefault(labels.get("result", "?"), 0)
+                totals[labels.get("cache", "?")][labels.get("result", "?")] += value
+        return {
+            cache: (results.get("hit", 0) / max(1, sum(results.values())), int(sum(results.values())))
+            for cache, results in totals.items()
+        }
+
+    def histogram_summaries(self, name: str) -> List[Tuple[Dict[str, str], int, Dict[float, float]]]:
+        with self._lock:
+            series = list(self._histograms.get(name, {}).items())
+            return [(dict(key), hist.count, hist.quantiles()) for key, hist in series]
+
+    def render_prometheus(self) -> str:
+        """Exporta as métricas no formato de texto do Prometheus (histogramas como `summary`)."""
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help: lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help: lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} summary")
+                for key, hist in series.items():
+                    for quantile, value in hist.quantiles().items():
+                        lines.append(f"{name}{_format_labels(key, ('quantile', str(quantile)))} {value:.6f}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {hist.total:.6f}")
+                    lines.append(f"{name}_count{_format_labels(key)} {hist.count}")
+        if "process_uptime_seconds" in self._help: lines.append(f"# HELP process_uptime_seconds {self._help['process_uptime_seconds']}")
+        lines.append("# TYPE process_uptime_seconds gauge")
+        lines.append(f"process_uptime_seconds {time.time() - self.started_at:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+metrics.describe("notion_requests_total", "Chamadas à API do Notion por endpoint e resultado.")
+metrics.describe("notion_request_duration_seconds", "Duração das chamadas ao Notion (inclui a espera no agendador).")
+metrics.describe("gemini_requests_total", "Chamadas ao Gemini por resultado.")
+metrics.describe("gemini_tokens_total", "Tokens usados no Gemini (prompt e resposta).")
+metrics.describe("gemini_request_duration_seconds", "Duração das chamadas ao Gemini (inclui a fila).")
+metrics.describe("process_uptime_seconds", "Tempo (em segundos) desde o início do processo.")
+metrics.describe("discord_history_fetches_total", "Leituras do histórico de tópicos no Discord.")
+metrics.describe("discord_history_messages_total", "Mensagens lidas do histórico de tópicos.")
+metrics.describe("cache_requests_total", "Acessos aos caches internos por resultado (hit/miss).")
+metrics.describe("command_duration_seconds", "Duração dos comandos de barra.")
+metrics.describe("stage_duration_seconds", "Duração das etapas de montagem e criação dos cards.")
+metrics.describe("card_jobs_total", "Jobs de criação de cards por comando e resultado.")
+
+
+def start_metrics_server(port: str = METRICS_PORT, host: str = METRICS_HOST) -> Optional[threading.Thread]:
+    """Sobe o endpoint `/metrics` (Flask) em uma thread separada, se METRICS_PORT estiver definido."""
+    if not port:
+        return None
+    from flask import Flask, Response
+
+    app = Flask("metrics")
+
+    @app.route("/metrics")
+    def metrics_endpoint():
+        return Response(metrics.render_prometheus(), mimetype="text/plain; version=0.0.4")
+
+    thread = threading.Thread(target=lambda: app.run(host=host, port=int(port), use_reloader=False), name="metrics-http", daemon=True)
+    thread.start()
+    print(f"Métricas disponíveis em http://{host}:{port}/metrics")
+    return thread
@@ -1,67 +1,481 @@
 # notion_integration.py (Versão com correção na busca de multi-select)
 
-from notion_client import Client
 import os
 from dotenv import load_dotenv
 import re
-from datetime import datetime
-from typing import List, Optional, Dict, Any
+import copy
+import time
+import asyncio
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, Callable, Awaitable, AsyncIterator
 import discord
 
+from notion_scheduler import NotionRequestScheduler, PRIORITY_INTERACTIVE, PRIORITY_BACKGROUND
+from notion_mirror import NotionMirror, NOTION_MIRROR_DB_PATH, TEXT_PROPERTY_TYPES
+from metrics import metrics
+
 load_dotenv()
 
+# Tempo (em segundos) que o schema de uma base de dados fica em cache antes de ser buscado novamente
+SCHEMA_CACHE_TTL = float(os.getenv("NOTION_SCHEMA_CACHE_TTL", "300"))
+# Intervalo (em segundos) entre atualizações do diretório de usuários do Notion
+USER_DIRECTORY_TTL = float(os.getenv("NOTION_USER_DIRECTORY_TTL", "600"))
+# Quantidade de páginas buscadas por vez nos resultados de busca (máximo do Notion: 100)
+SEARCH_PAGE_SIZE = int(os.getenv("NOTION_SEARCH_PAGE_SIZE", "25"))
+# Limites da API do Notion por requisição
+MAX_BLOCKS_PER_REQUEST = 100
+MAX_RICH_TEXT_LENGTH = 2000
+MAX_RICH_TEXT_ITEMS = 100
+# Limite de requisições por segundo ao Notion, compartilhado por todos os servidores
+NOTION_REQUESTS_PER_SECOND = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3"))
+# Tentativas de criar uma página quando o resultado é incerto (timeout ou 5xx depois do envio)
+CREATE_PAGE_MAX_ATTEMPTS = 3
+# Janela (em segundos) em que o /num_cards responde direto do cache, sem consultar o Notion
+COUNT_CACHE_TTL = float(os.getenv("NOTION_COUNT_CACHE_TTL", "60"))
+# Intervalo (em segundos) entre recontagens completas, que detectam páginas arquivadas fora do bot
+COUNT_FULL_RECOUNT_INTERVAL = float(os.getenv("NOTION_COUNT_FULL_RECOUNT_INTERVAL", "3600"))
+# Cópia local das bases para o /busca: intervalo entre sincronizações e idade máxima aceita
+# antes de voltar a consultar o Notion diretamente (em segundos)
+NOTION_MIRROR_ENABLED = os.getenv("NOTION_MIRROR_ENABLED", "true").lower() not in ("0", "false", "no")
+NOTION_MIRROR_SYNC_INTERVAL = float(os.getenv("NOTION_MIRROR_SYNC_INTERVAL", "60"))
+NOTION_MIRROR_MAX_AGE = float(os.getenv("NOTION_MIRROR_MAX_AGE", "300"))
+NOTION_MIRROR_FULL_SYNC_INTERVAL = float(os.getenv("NOTION_MIRROR_FULL_SYNC_INTERVAL", "3600"))
+# Cache de páginas em memória (usado por get_page): quantidade máxima e validade em segundos
+PAGE_CACHE_MAX_ENTRIES = int(os.getenv("NOTION_PAGE_CACHE_MAX_ENTRIES", "500"))
+PAGE_CACHE_TTL = float(os.getenv("NOTION_PAGE_CACHE_TTL", "120"))
+
 class NotionAPIError(Exception):
     """Exceção customizada para erros da API do Notion."""
     pass
 
+class NotionConflictError(NotionAPIError):
+    """A página foi alterada por outra pessoa durante a edição; `conflicting` lista as propriedades afetadas."""
+    def __init__(self, message: str, current_page: dict, conflicting: List[str]):
+        super().__init__(message)
+        self.current_page, self.conflicting = current_page, conflicting
+
+def _normalize_name(value: str) -> str:
+    """Normaliza um nome para comparação: minúsculas, sem acentos e com espaços colapsados."""
+    value = unicodedata.normalize('NFKD', value)
+    value = "".join(c for c in value if not unicodedata.combining(c))
+    return " ".join(value.lower().split())
+
+
+class NotionUserDirectory:
+    """
+    Índice em memória dos usuários do workspace do Notion.
+    Busca todas as páginas de `users.list` e indexa e-mail exato, nome normalizado e prefixos,
+    para que resolver pessoas não custe nenhuma chamada à API enquanto o diretório estiver válido.
+    """
+    PREFIX_MAX_LEN = 20
+
+    def __init__(self, fetch_page: Callable[[Optional[str], bool], Awaitable[dict]], ttl: float = USER_DIRECTORY_TTL):
+        self._fetch_page = fetch_page
+        self.ttl = ttl
+        self._lock = asyncio.Lock()
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._loaded_at: Optional[float] = None
+        self._by_email: Dict[str, str] = {}
+        self._by_name: Dict[str, str] = {}
+        self._by_prefix: Dict[str, List[str]] = {}
+        self._names: List[tuple] = []  # (nome normalizado, id) na ordem retornada pela API
+        self._names_by_id: Dict[str, str] = {}
+        self._normalized_by_id: Dict[str, str] = {}
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.ttl
+
+    async def refresh(self, force: bool = False, background: bool = False):
+        """Recarrega todas as páginas de usuários e reconstrói os índices."""
+        async with self._lock:
+            if not force and not self.is_stale():
+                return
+            users, cursor = [], None
+            while True:
+                response = await self._fetch_page(cursor, background)
+                users.extend(response.get("results", []))
+                if not response.get("has_more") or not response.get("next_cursor"):
+                    break
+                cursor = response["next_cursor"]
+            self._build_index(users)
+            self._loaded_at = time.monotonic()
+
+    async def _background_refresh(self):
+        try:
+            await self.refresh(background=True)
+        except Exception as e:
+            print(f"Erro ao atualizar o diretório de usuários do Notion: {e}")
+
+    async def ensure_fresh(self):
+        """
+        Garante que o diretório esteja carregado. Se estiver apenas desatualizado,
+        continua respondendo com o índice atual e agenda a atualização em segundo plano.
+        """
+        if not self.is_loaded:
+            await self.refresh()
+        elif self.is_stale() and (self._refresh_task is None or self._refresh_task.done()):
+            self._refresh_task = asyncio.create_task(self._background_refresh())
+
+    def _build_index(self, users: List[dict]):
+        by_email, by_name, by_prefix, names, names_by_id, normalized_by_id = {}, {}, {}, [], {}, {}
+        for user in users:
+            user_id = user.get("id")
+            if not user_id: continue
+            user_email = (user.get("person") or {}).get("email")
+            if user_email:
+                by_email.setdefault(user_email.lower(), user_id)
+            user_name = user.get("name")
+            if not user_name: continue
+            names_by_id[user_id] = user_name
+            normalized = _normalize_name(user_name)
+            normalized_by_id[user_id] = normalized
+            by_name.setdefault(normalized, user_id)
+            names.append((normalized, user_id))
+            # Prefixos do nome completo e de cada palavra
+            for token in [normalized] + normalized.split(" ")[1:]:
+                for size in range(1, min(len(token), self.PREFIX_MAX_LEN) + 1):
+                    ids = by_prefix.setdefault(token[:size], [])
+                    if user_id not in ids: ids.append(user_id)
+        self._by_email, self._by_name, self._by_prefix = by_email, by_name, by_prefix
+        self._names, self._names_by_id, self._normalized_by_id = names, names_by_id, normalized_by_id
+
+    def lookup(self, search_term: str) -> Optional[str]:
+        """Resolve um nome ou e-mail para o ID do usuário usando apenas os índices em memória."""
+        if not isinstance(search_term, str) or not search_term.strip():
+            return None
+        user_id = self._by_email.get(search_term.strip().lower())
+        if user_id: return user_id
+
+        normalized = _normalize_name(search_term)
+        user_id = self._by_name.get(normalized)
+        if user_id: return user_id
+
+        candidates = self._by_prefix.get(normalized[:self.PREFIX_MAX_LEN], [])
+        for candidate_id in candidates:
+            if len(normalized) <= self.PREFIX_MAX_LEN or normalized in self._normalized_by_id[candidate_id]:
+                return candidate_id
+
+        for name, candidate_id in self._names:
+            if normalized in name:
+                return candidate_id
+        return None
+
+    def get_name(self, user_id: str) -> Optional[str]:
+        return self._names_by_id.get(user_id)
+
+
+# Expressões regulares compiladas uma única vez
+_DATABASE_ID_RE = re.compile(r"([a-f0-9]{32})")
+_RICH_TEXT_MARKUP_RE = re.compile(r'(\*\*.*?\*\*|_.*?_)')
+_BOLD_HEADING_RE = re.compile(r'^\*\*(.*?):\*\*$')
+# Datas aceitas na entrada: dd/mm/aaaa, dd-mm-aaaa, dd/mm/aa, dd-mm-aa e aaaa-mm-dd
+_DMY_DATE_RE = re.compile(r'^(\d{1,2})([/-])(\d{1,2})\2(\d{4}|\d{2})$')
+_ISO_DATE_RE = re.compile(r'^(\d{4})-(\d{1,2})-(\d{1,2})$')
+
+
+def _parse_date(value: str) -> Optional[str]:
+    """Converte uma data digitada pelo usuário para o formato ISO (aaaa-mm-dd), ou None se for inválida."""
+    value = value.strip()
+    match = _DMY_DATE_RE.match(value)
+    if match:
+        day, _, month, year_text = match.groups()
+        year = int(year_text)
+        if len(year_text) == 2:  # Mesma regra do %y: 00-68 => 2000, 69-99 => 1900
+            year += 2000 if year < 69 else 1900
+    else:
+        match = _ISO_DATE_RE.match(value)
+        if not match:
+            return None
+        year, month, day = match.groups()
+        year = int(year)
+    try:
+        return datetime(year, int(month), int(day)).strftime('%Y-%m-%d')
+    except ValueError:
+        return None
+
+
+def _plain_text(parts) -> str:
+    return "".join(part.get('plain_text', '') for part in parts or [])
+
+
+def _option_name(option) -> str:
+    return (option or {}).get('name', '')
+
+
+def _format_date_value(date_info) -> str:
+    start = (date_info or {}).get('start')
+    if not start:
+        return ''
+    # O Notion envia aaaa-mm-dd, às vezes seguido do horário
+    return f"{start[8:10]}/{start[5:7]}/{start[0:4]}"
+
+
+# Extratores de valor para exibição, por tipo de propriedade
+_PROPERTY_EXTRACTORS: Dict[str, Callable[[dict], str]] = {
+    'title': lambda prop: ((prop.get('title') or [{}])[0]).get('plain_text', ''),
+    'rich_text': lambda prop: _plain_text(prop.get('rich_text')),
+    'status': lambda prop: _option_name(prop.get('status')),
+    'select': lambda prop: _option_name(prop.get('select')),
+    'multi_select': lambda prop: ", ".join(_option_name(tag) for tag in prop.get('multi_select') or []),
+    'people': lambda prop: ", ".join(person.get('name', 'Usuário Desconhecido') for person in prop.get('people') or []),
+    'date': lambda prop: _format_date_value(prop.get('date')),
+    'url': lambda prop: prop.get('url') or '',
+    'number': lambda prop: '' if prop.get('number') is None else str(prop['number']),
+}
+
+
+def _format_select(value):
+    return {"select": {"name": str(value[0] if isinstance(value, list) else value)}}
+
+
+def _format_multi_select(value):
+    tags = value if isinstance(value, list) else [tag.strip() for tag in str(value).split(',') if tag.strip()]
+    return {"multi_select": [{"name": tag} for tag in tags]}
+
+
+def _format_date(value):
+    if not value or not isinstance(value, str): return None
+    iso_date = _parse_date(value)
+    if iso_date: return {"date": {"start": iso_date}}
+    print(f"Aviso: Não foi possível interpretar a data '{value}'.")
+    return None
+
+
+def _comparable_value(prop_type: str, data):
+    """Valor de uma propriedade em forma comparável, tanto no formato enviado à API quanto no retornado por ela."""
+    if prop_type in ('title', 'rich_text'):
+        return "".join(part.get('plain_text') or (part.get('text') or {}).get('content', '') for part in data or [])
+    if prop_type in ('select', 'status'):
+        return (data or {}).get('name')
+    if prop_type == 'multi_select':
+        return sorted(tag.get('name') for tag in data or [])
+    if prop_type == 'people':
+        return sorted(person.get('id', '').replace('-', '') for person in data or [])
+    if prop_type == 'date':
+        return ((data or {}).get('start') or '')[:10]
+    return data
+
+
+def _page_matches_properties(page: dict, properties: dict) -> bool:
+    """Indica se a página tem os mesmos valores que `properties` (payload de `pages.create`)."""
+    page_properties = page.get('properties') or {}
+    for name, sent in properties.items():
+        prop_type, value = next(iter(sent.items()))
+        current = page_properties.get(name)
+        if current is None or _comparable_value(prop_type, current.get(prop_type)) != _comparable_value(prop_type, value):
+            return False
+    return True
+
+
+class EmbedRenderer:
+    """
+    Monta embeds das páginas de uma base com um plano calculado uma única vez:
+    para cada propriedade exibida, o extrator correspondente ao seu tipo.
+    """
+
+    def __init__(self, property_types: Dict[str, str], display_properties: Optional[List[str]] = None):
+        names = display_properties if display_properties is not None else list(property_types)
+        self.plan = [(name, property_types.get(name), _PROPERTY_EXTRACTORS.get(property_types.get(name))) for name in names]
+
+    def render(self, page_result: dict, include_footer: bool = False) -> discord.Embed:
+        properties = page_result.get('properties', {})
+        title, fields = "Card sem título", []
+        for prop_name, prop_type, extractor in self.plan:
+            prop_data = properties.get(prop_name)
+            if not prop_data: continue
+            if prop_data.get('type') != prop_type:
+                # O schema mudou desde que o plano foi calculado
+                prop_type = prop_data.get('type')
+                extractor = _PROPERTY_EXTRACTORS.get(prop_type)
+            try:
+                value = extractor(prop_data) if extractor else ''
+            except (IndexError, TypeError, AttributeError):
+                value = ''
+            if prop_type == 'title':
+                title = value or title
+            elif value:
+                fields.append((prop_name, value))
+
+        embed = discord.Embed(title=f"📌 {title}", url=page_result.get('url', '#'), color=discord.Color.green())
+        for name, value in fields:
+            embed.add_field(name=name, value=value, inline=False)
+        if include_footer:
+            embed.set_footer(text="Resultado da busca")
+        return embed
+
+
+class PageCache:
+    """
+    Cache LRU das páginas completas retornadas pelo Notion, indexado pelo ID.
+    Uma página só substitui a versão em cache se o seu `last_edited_time` não for mais antigo,
+    para que uma resposta atrasada não sobrescreva uma edição mais recente.
+    """
+
+    def __init__(self, max_entries: int = PAGE_CACHE_MAX_ENTRIES, ttl: float = PAGE_CACHE_TTL):
+        self.max_entries, self.ttl = max_entries, ttl
+        self._entries: OrderedDict = OrderedDict()  # {page_id: (página, momento em que foi guardada)}
+
+    def get(self, page_id: str) -> Optional[dict]:
+        entry = self._entries.get(page_id)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[1] >= self.ttl:
+            del self._entries[page_id]
+            return None
+        self._entries.move_to_end(page_id)
+        return entry[0]
+
+    def put(self, page: dict):
+        if not page or not page.get('id'):
+            return
+        if page.get('archived') or page.get('in_trash'):
+            self.discard(page['id'])
+            return
+        current = self._entries.get(page['id'])
+        if current and (current[0].get('last_edited_time') or '') > (page.get('last_edited_time') or ''):
+            return
+        self._entries[page['id']] = (page, time.monotonic())
+        self._entries.move_to_end(page['id'])
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def discard(self, page_id: str):
+        self._entries.pop(page_id, None)
+
+
 class NotionIntegration:
     def __init__(self):
         self.token = os.getenv("NOTION_TOKEN")
         if not self.token:
             raise ValueError("O token do Notion (NOTION_TOKEN) não foi encontrado no seu ambiente.")
-        self.notion = Client(auth=self.token)
+        # Cliente assíncrono (criado no primeiro uso, junto com a importação do SDK do Notion)
+        self._client = None
+        # Todas as chamadas passam pelo agendador, que aplica o limite de taxa e as novas tentativas
+        self.scheduler = NotionRequestScheduler(rate=NOTION_REQUESTS_PER_SECOND, burst=max(1, int(NOTION_REQUESTS_PER_SECOND)))
+        # Cache de schema por base de dados: {database_id: {'properties', 'properties_to_ask', 'fetched_at'}}
+        self._schema_cache: Dict[str, Dict[str, Any]] = {}
+        self._schema_locks: Dict[str, asyncio.Lock] = {}
+        self.users = NotionUserDirectory(self._list_users_page)
+        # Contagem por base de dados: {database_id: {'page_ids', 'synced_at', 'checked_at', 'full_at'}}
+        self._count_cache: Dict[str, Dict[str, Any]] = {}
+        self._count_locks: Dict[str, asyncio.Lock] = {}
+        # Cópia local (SQLite) usada pelo /busca, aberta no primeiro uso
+        self._mirror: Optional[NotionMirror] = None
+        self._mirror_disabled = not NOTION_MIRROR_ENABLED
+        self._mirror_locks: Dict[str, asyncio.Lock] = {}
+        self.pages = PageCache()
+        # Renderizadores de embed por (base, propriedades exibidas), descartados junto com o schema
+        self._renderers: Dict[tuple, EmbedRenderer] = {}
+        # Formatadores de valor para a API, por tipo de propriedade ('people' é tratado à parte)
+        self._formatters: Dict[str, Callable[[Any], Optional[dict]]] = {
+            'title': lambda value: {"title": self._split_rich_text([{"text": {"content": str(value)}}])},
+            'rich_text': lambda value: {"rich_text": self._split_rich_text([{"text": {"content": str(value)}}])},
+            'url': lambda value: {"url": value},
+            'status': lambda value: {"status": {"name": str(value)}},
+            'select': _format_select,
+            'multi_select': _format_multi_select,
+            'date': _format_date,
+        }
+
+    @property
+    def notion(self):
+        """Cliente do Notion. As chamadas são assíncronas e não bloqueiam o loop de eventos do discord.py."""
+        if self._client is None:
+            from notion_client import AsyncClient
+            self._client = AsyncClient(auth=self.token)
+        return self._client
+
+    @notion.setter
+    def notion(self, client):
+        self._client = client
+
+    @property
+    def mirror(self) -> Optional[NotionMirror]:
+        """
+        Cópia local das bases, criada no primeiro acesso. Retorna None se NOTION_MIRROR_ENABLED for falso
+        ou se o arquivo não puder ser aberto: nesse caso a busca consulta o Notion diretamente.
+        """
+        if self._mirror is None and not self._mirror_disabled:
+            try:
+                self._mirror = NotionMirror(NOTION_MIRROR_DB_PATH)
+            except Exception as e:
+                # Caminho sem permissão, arquivo bloqueado ou corrompido, SQLite sem o tokenizador trigram...
+                self._mirror_disabled = True
+                print(f"Aviso: não foi possível abrir a cópia local em '{NOTION_MIRROR_DB_PATH}' ({e}); a busca usará o Notion diretamente.")
+        return self._mirror
 
-    def _format_property_value(self, prop_type: str, prop_value):
+    async def _format_property_value(self, prop_type: str, prop_value):
         """Função auxiliar para formatar um valor para a API do Notion."""
-        if prop_type == 'title': return {"title": [{"text": {"content": str(prop_value)}}]}
-        elif prop_type == 'rich_text': return {"rich_text": [{"text": {"content": str(prop_value)}}]}
-        elif prop_type == 'url': return {"url": prop_value}
-        elif prop_type == 'status': return {"status": {"name": str(prop_value)}}
-        elif prop_type == 'select':
-            value = prop_value[0] if isinstance(prop_value, list) else prop_value
-            return {"select": {"name": str(value)}}
-        elif prop_type == 'multi_select':
-            tags_to_add = prop_value if isinstance(prop_value, list) else [tag.strip() for tag in str(prop_value).split(',') if tag.strip()]
-            return {"multi_select": [{"name": tag} for tag in tags_to_add]}
-        elif prop_type == 'date':
-            if not prop_value or not isinstance(prop_value, str): return None
-            date_formats = ["%d/%m/%Y", "%d-%m-%Y", "%d/%m/%y", "%d-%m-%y", "%Y-%m-%d"]
-            date_obj = None
-            for fmt in date_formats:
-                try:
-                    date_obj = datetime.strptime(prop_value, fmt)
-                    break
-                except (ValueError, TypeError): continue
-            if date_obj: return {"date": {"start": date_obj.strftime('%Y-%m-%d')}}
-            else:
-                print(f"Aviso: Não foi possível interpretar a data '{prop_value}'.")
-                return None
-        elif prop_type == 'people':
+        formatter = self._formatters.get(prop_type)
+        if formatter: return formatter(prop_value)
+        if prop_type == 'people':
             if isinstance(prop_value, list):
                 return {"people": [{"id": user_id} for user_id in prop_value]}
             try:
-                user_id = self.search_id_person(str(prop_value))
+                user_id = await self.search_id_person(str(prop_value))
                 if user_id: return {"people": [{"id": user_id}]}
             except NotionAPIError as e: print(f"Aviso: {e}. Propriedade 'people' será ignorada.")
         return None
 
+    async def _request(self, endpoint: str, *args, priority: int = PRIORITY_INTERACTIVE, idempotent: bool = True, **kwargs):
+        """
+        Chama um endpoint do cliente (ex.: 'databases.query') através do agendador de requisições.
+        Endpoints que não podem ser repetidos às cegas (criação de páginas e blocos) usam `idempotent=False`.
+        """
+        method = self.notion
+        for part in endpoint.split('.'):
+            method = getattr(method, part)
+        try:
+            with metrics.timer("notion_request_duration_seconds", endpoint=endpoint):
+                response = await self.scheduler.run(method, *args, priority=priority, idempotent=idempotent, **kwargs)
+        except Exception:
+            metrics.inc("notion_requests_total", endpoint=endpoint, result="error")
+            raise
+        metrics.inc("notion_requests_total", endpoint=endpoint, result="ok")
+        return response
+
+    def _split_rich_text(self, rich_text: List[Dict]) -> List[Dict]:
+        """Divide objetos de rich text com mais de MAX_RICH_TEXT_LENGTH caracteres, mantendo anotações e links."""
+        split_items = []
+        for item in rich_text:
+            content = (item.get('text') or {}).get('content')
+            if item.get('type', 'text') != 'text' or not isinstance(content, str) or len(content) <= MAX_RICH_TEXT_LENGTH:
+                split_items.append(item)
+                continue
+            for start in range(0, len(content), MAX_RICH_TEXT_LENGTH):
+                split_items.append({**item, "text": {**item['text'], "content": content[start:start + MAX_RICH_TEXT_LENGTH]}})
+        return split_items
+
+    def _split_oversized_blocks(self, blocks: List[Dict]) -> List[Dict]:
+        """
+        Ajusta os blocos aos limites do Notion: textos longos são divididos e, se um bloco passar
+        de MAX_RICH_TEXT_ITEMS objetos de texto, ele é repetido em vários blocos do mesmo tipo.
+        """
+        adjusted_blocks = []
+        for block in blocks:
+            block_type = block.get('type')
+            body = block.get(block_type)
+            if not isinstance(body, dict) or 'rich_text' not in body:
+                adjusted_blocks.append(block)
+                continue
+            rich_text = self._split_rich_text(body['rich_text'])
+            for start in range(0, max(len(rich_text), 1), MAX_RICH_TEXT_ITEMS):
+                adjusted_blocks.append({**block, block_type: {**body, "rich_text": rich_text[start:start + MAX_RICH_TEXT_ITEMS]}})
+        return adjusted_blocks
+
     def _convert_text_to_notion_rich_text_objects(self, text_content: str):
         """
         Converte uma string de texto para uma lista de objetos Rich Text do Notion,
         interpretando **negrito** e _itálico_.
         """
         rich_text_objects = []
-        parts = re.split(r'(\*\*.*?\*\*|_.*?_)', text_content)
+        parts = _RICH_TEXT_MARKUP_RE.split(text_content)
 
         for part in parts:
             if not part:
@@ -97,7 +511,7 @@ class NotionIntegration:
             if not line:
                 continue
 
-            bold_heading_match = re.match(r'^\*\*(.*?):\*\*$', line.strip())
+            bold_heading_match = _BOLD_HEADING_RE.match(line)
             if bold_heading_match:
                 heading_text = bold_heading_match.group(1) + ":"
                 notion_blocks.append({
@@ -127,14 +541,24 @@ class NotionIntegration:
         return notion_blocks
 
     def extract_database_id(self, url):
-        match = re.search(r"([a-f0-9]{32})", url)
+        match = _DATABASE_ID_RE.search(url)
         if match: return match.group(1)
         return None
 
-    def search_in_database(self, url, search_term, filter_property, property_type="rich_text"):
-        database_id = self.extract_database_id(url)
-        if not database_id: raise NotionAPIError("ID da base de dados não encontrado na URL.")
-        
+    async def _build_search_filter(self, url, search_term, filter_property, property_type) -> Optional[Dict[str, Any]]:
+        """
+        Monta o filtro do `databases.query`; retorna None quando a busca com certeza não terá resultados.
+        Se `filter_property` for uma lista (ou None, para todas), o texto é buscado em várias propriedades.
+        """
+        if filter_property is None or isinstance(filter_property, (list, tuple)):
+            schema = await self.get_database_properties(url)
+            text_filters = [
+                {"property": name, data['type']: {"contains": search_term}}
+                for name, data in schema.items()
+                if data.get('type') in TEXT_PROPERTY_TYPES and (filter_property is None or name in filter_property)
+            ]
+            return {"or": text_filters} if text_filters else None
+
         # *** CORREÇÃO APLICADA AQUI ***
         # O objeto do filtro é construído dinamicamente
         filter_criteria = {
@@ -149,54 +573,317 @@ class NotionIntegration:
             # A correção principal: multi_select usa 'contains' em vez de 'equals'
             filter_criteria[property_type] = {"contains": search_term}
         elif property_type == "people":
-            pessoa_id = self.search_id_person(search_term)
+            pessoa_id = await self.search_id_person(search_term)
             if pessoa_id:
                 filter_criteria["people"] = {"contains": pessoa_id}
             else:
-                return {"results": []} 
+                return None
         # *** FIM DA CORREÇÃO ***
-        
+        return filter_criteria
+
+    async def _get_property_ids(self, url, property_names: List[str]) -> List[str]:
+        """Converte nomes de propriedades em IDs (usados pelo `filter_properties`), sempre incluindo o título."""
+        schema = await self.get_database_properties(url)
+        property_ids = [data['id'] for name, data in schema.items() if (name in property_names or data.get('type') == 'title') and data.get('id')]
+        return property_ids
+
+    async def iter_search_results(self, url, search_term, filter_property, property_type="rich_text", page_size: int = SEARCH_PAGE_SIZE, display_properties: Optional[List[str]] = None) -> AsyncIterator[List[Dict]]:
+        """
+        Gerador assíncrono que percorre os resultados da busca página a página pelo cursor do Notion.
+        Cada item produzido é um lote de páginas; o próximo lote só é buscado quando for consumido.
+        Se `display_properties` for informado, apenas essas propriedades (e o título) são transferidas.
+        Com a cópia local sincronizada, a busca é respondida por ela (inclusive com correspondência
+        aproximada); caso contrário, a consulta vai direto ao Notion.
+        `filter_property` pode ser uma lista de propriedades de texto, ou None para buscar em todas.
+        """
+        database_id = self.extract_database_id(url)
+        if not database_id: raise NotionAPIError("ID da base de dados não encontrado na URL.")
+
+        results = None
         try:
-            return self.notion.databases.query(database_id=database_id, filter=filter_criteria)
+            if await self._mirror_is_fresh(database_id):
+                # As páginas da cópia local não entram no cache de páginas: podem estar até
+                # NOTION_MIRROR_MAX_AGE segundos atrasadas e ganhariam a validade de uma leitura recente
+                results = await self._search_mirror(database_id, search_term, filter_property, property_type)
+        except NotionAPIError:
+            raise
         except Exception as e:
-            raise NotionAPIError(f"Erro ao buscar no Notion: {e}")
+            print(f"Aviso: falha ao buscar na cópia local ({e}); consultando o Notion diretamente.")
+        metrics.cache_access("search_mirror", hit=results is not None)
+        if results is not None:
+            for start in range(0, len(results), page_size):
+                yield results[start:start + page_size]
+            return
+
+        filter_criteria = await self._build_search_filter(url, search_term, filter_property, property_type)
+        if filter_criteria is None:
+            return
+
+        query = {"database_id": database_id, "filter": filter_criteria, "page_size": min(max(page_size, 1), 100)}
+        if display_properties:
+            property_ids = await self._get_property_ids(url, display_properties)
+            if property_ids: query["filter_properties"] = property_ids
+
+        while True:
+            try:
+                response = await self._request("databases.query", **query)
+            except Exception as e:
+                raise NotionAPIError(f"Erro ao buscar no Notion: {e}")
+            results = response.get('results', [])
+            if "filter_properties" not in query:
+                # Só páginas completas entram no cache (com filter_properties vêm apenas algumas propriedades)
+                for page in results:
+                    self.pages.put(page)
+            if results:
+                yield results
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            query["start_cursor"] = response['next_cursor']
+
+    async def search_in_database(self, url, search_term, filter_property, property_type="rich_text"):
+        """Busca todos os resultados (seguindo a paginação) e os retorna no formato `{"results": [...]}`."""
+        results = []
+        async for batch in self.iter_search_results(url, search_term, filter_property, property_type, page_size=100):
+            results.extend(batch)
+        return {"results": results}
+
+    def _get_cached_schema(self, database_id: str) -> Optional[Dict[str, Any]]:
+        entry = self._schema_cache.get(database_id)
+        if entry and time.monotonic() - entry['fetched_at'] < SCHEMA_CACHE_TTL:
+            return entry
+        return None
+
+    def invalidate_schema(self, url: Optional[str] = None):
+        """Descarta o schema em cache de uma base de dados (ou de todas, se nenhuma URL for informada)."""
+        if url is None:
+            self._schema_cache.clear()
+            self._renderers.clear()
+            return
+        database_id = self.extract_database_id(url)
+        if database_id:
+            self._schema_cache.pop(database_id, None)
+            for key in [key for key in self._renderers if key[0] == database_id]:
+                del self._renderers[key]
 
-    def get_database_properties(self, url):
+    async def get_database_properties(self, url):
         database_id = self.extract_database_id(url)
         if not database_id: raise NotionAPIError("ID da base de dados não encontrado na URL.")
-        try:
-            return self.notion.databases.retrieve(database_id)['properties']
-        except Exception as e: raise NotionAPIError(f"Erro ao obter propriedades do Notion: {e}")
 
-    def search_id_person(self, search_term: str):
-        if not isinstance(search_term, str) or not search_term:
-            return None
+        entry = self._get_cached_schema(database_id)
+        metrics.cache_access("schema", hit=entry is not None)
+        if entry: return entry['properties']
+
+        # Um lock por base evita que comandos simultâneos busquem o mesmo schema várias vezes
+        lock = self._schema_locks.setdefault(database_id, asyncio.Lock())
+        async with lock:
+            entry = self._get_cached_schema(database_id)
+            if entry: return entry['properties']
+            try:
+                properties = (await self._request("databases.retrieve", database_id))['properties']
+            except Exception as e: raise NotionAPIError(f"Erro ao obter propriedades do Notion: {e}")
+            self._schema_cache[database_id] = {'properties': properties, 'properties_to_ask': None, 'fetched_at': time.monotonic()}
+            return properties
+
+    async def _list_users_page(self, start_cursor: Optional[str] = None, background: bool = False) -> dict:
+        kwargs = {"page_size": 100}
+        if start_cursor: kwargs["start_cursor"] = start_cursor
+        return await self._request("users.list", priority=PRIORITY_BACKGROUND if background else PRIORITY_INTERACTIVE, **kwargs)
+
+    async def _ensure_user_directory(self):
         try:
-            users = self.notion.users.list()
-            search_term_lower = search_term.lower()
-            for user in users.get("results", []):
-                user_name = user.get("name")
-                if user_name and search_term_lower in user_name.lower():
-                    return user.get("id")
-                user_email = user.get("person", {}).get("email")
-                if user_email and user_email.lower() == search_term_lower:
-                    return user.get("id")
-            return None
+            await self.users.ensure_fresh()
         except Exception as e:
             print(f"Erro ao buscar usuários do Notion: {e}")
             raise NotionAPIError(f"Não foi possível buscar os usuários no Notion.")
 
-    def get_database_count(self, url):
+    async def search_id_person(self, search_term: str):
+        if not isinstance(search_term, str) or not search_term:
+            return None
+        await self._ensure_user_directory()
+        return self.users.lookup(search_term)
+
+    async def resolve_people(self, names: List[str]) -> List[Optional[str]]:
+        """Resolve vários nomes de uma vez; retorna os IDs na mesma ordem (None para quem não foi encontrado)."""
+        if not names:
+            return []
+        await self._ensure_user_directory()
+        return [self.users.lookup(name) for name in names]
+
+    async def _iter_page_ids(self, url, database_id: str, filter_criteria: Optional[dict] = None) -> AsyncIterator[str]:
+        """Percorre todas as páginas da base transferindo apenas o título, e produz os IDs."""
+        query = {"database_id": database_id, "page_size": 100, "filter_properties": await self._get_property_ids(url, [])}
+        if filter_criteria: query["filter"] = filter_criteria
+        while True:
+            response = await self._request("databases.query", **query)
+            for page in response.get('results', []):
+                yield page['id']
+            if not response.get('has_more') or not response.get('next_cursor'):
+                break
+            query["start_cursor"] = response['next_cursor']
+
+    async def get_database_count(self, url):
+        """
+        Conta as páginas da base. A contagem fica em cache por COUNT_CACHE_TTL segundos; depois disso
+        é atualizada de forma incremental (apenas páginas editadas desde a última sincronização)
+        e refeita por completo a cada COUNT_FULL_RECOUNT_INTERVAL segundos.
+        """
         database_id = self.extract_database_id(url)
         if not database_id: raise NotionAPIError("ID da base de dados não encontrado na URL.")
+
+        entry = self._count_cache.get(database_id)
+        if entry and time.monotonic() - entry['checked_at'] < COUNT_CACHE_TTL:
+            return len(entry['page_ids'])
+
+        lock = self._count_locks.setdefault(database_id, asyncio.Lock())
+        async with lock:
+            entry = self._count_cache.get(database_id)
+            now = time.monotonic()
+            if entry and now - entry['checked_at'] < COUNT_CACHE_TTL:
+                return len(entry['page_ids'])
+
+            sync_started = datetime.now(timezone.utc)
+            try:
+                if entry is None or now - entry['full_at'] >= COUNT_FULL_RECOUNT_INTERVAL:
+                    page_ids = {page_id async for page_id in self._iter_page_ids(url, database_id)}
+                    entry = {'page_ids': page_ids, 'full_at': now}
+                else:
+                    # O last_edited_time do Notion tem precisão de minutos, então a janela tem uma margem
+                    since = entry['synced_at'] - timedelta(minutes=1)
+                    edited_filter = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since.isoformat()}}
+                    async for page_id in self._iter_page_ids(url, database_id, edited_filter):
+                        entry['page_ids'].add(page_id)
+            except Exception as e: raise NotionAPIError(f"Erro ao contar páginas no Notion: {e}")
+
+            entry['synced_at'], entry['checked_at'] = sync_started, time.monotonic()
+            self._count_cache[database_id] = entry
+            return len(entry['page_ids'])
+
+    def _track_created_page(self, page: dict):
+        database_id = (page.get('parent') or {}).get('database_id', '').replace('-', '')
+        entry = self._count_cache.get(database_id)
+        if entry: entry['page_ids'].add(page['id'])
+
+    def _track_deleted_page(self, page_id: str):
+        for entry in self._count_cache.values():
+            entry['page_ids'].discard(page_id)
+
+    # --- CÓPIA LOCAL (BUSCA) ---
+
+    async def _mirror_is_fresh(self, database_id: str) -> bool:
+        return bool(self.mirror) and await self.mirror.is_fresh(database_id, NOTION_MIRROR_MAX_AGE)
+
+    async def _search_mirror(self, database_id: str, search_term, filter_property, property_type) -> List[Dict]:
+        if property_type == "people":
+            person_id = await self.search_id_person(search_term)
+            if not person_id:
+                return []
+            search_term = person_id
+        properties = None if filter_property is None else ([filter_property] if isinstance(filter_property, str) else list(filter_property))
+        return await self.mirror.search(database_id, search_term, properties, property_type)
+
+    async def _mirror_pages(self, pages: List[Dict]):
+        """Atualiza a cópia local com páginas criadas ou editadas pelo bot (falhas não interrompem o comando)."""
+        if not self.mirror:
+            return
         try:
-            query_result = self.notion.databases.query(database_id)
-            return len(query_result['results'])
-        except Exception as e: raise NotionAPIError(f"Erro ao contar páginas no Notion: {e}")
+            await self.mirror.upsert_pages(pages)
+        except Exception as e:
+            print(f"Aviso: não foi possível atualizar a cópia local da busca: {e}")
 
-    def insert_into_database(self, url, properties, children: Optional[List[Dict]] = None):
+    async def sync_mirror(self, url, full: bool = False):
+        """
+        Sincroniza a cópia local de uma base. Normalmente só as páginas editadas desde a última
+        sincronização são buscadas; a cada NOTION_MIRROR_FULL_SYNC_INTERVAL a base é relida por
+        completo, o que também remove as páginas arquivadas fora do bot.
+        """
+        database_id = self.extract_database_id(url)
+        if not self.mirror or not database_id:
+            return
+        lock = self._mirror_locks.setdefault(database_id, asyncio.Lock())
+        async with lock:
+            state = await self.mirror.get_state(database_id)
+            full = full or state is None or time.time() - state['full_at'] >= NOTION_MIRROR_FULL_SYNC_INTERVAL
+            query = {"database_id": database_id, "page_size": 100}
+            if not full:
+                # O last_edited_time do Notion tem precisão de minutos, então a janela tem uma margem
+                since = datetime.fromisoformat(state['synced_at']) - timedelta(minutes=1)
+                query["filter"] = {"timestamp": "last_edited_time", "last_edited_time": {"on_or_after": since.isoformat()}}
+
+            sync_started = datetime.now(timezone.utc)
+            seen_ids = set()
+            try:
+                while True:
+                    response = await self._request("databases.query", priority=PRIORITY_BACKGROUND, **query)
+                    pages = response.get('results', [])
+                    seen_ids.update(page['id'] for page in pages)
+                    await self.mirror.upsert_pages(pages)
+                    if not response.get('has_more') or not response.get('next_cursor'):
+                        break
+                    query["start_cursor"] = response['next_cursor']
+            except Exception as e:
+                raise NotionAPIError(f"Erro ao sincronizar a cópia local da base: {e}")
+            if full:
+                # Páginas criadas ou editadas durante a leitura não são removidas
+                await self.mirror.prune_database(database_id, seen_ids, edited_before=sync_started.strftime('%Y-%m-%dT%H:%M'))
+            await self.mirror.mark_synced(database_id, sync_started.isoformat(), full)
+
+    async def run_mirror_sync(self, get_urls: Callable[[], List[str]], interval: float = NOTION_MIRROR_SYNC_INTERVAL):
+        """Laço de sincronização em segundo plano das bases configuradas (`get_urls` retorna as URLs atuais)."""
+        if not self.mirror:
+            return
+        while True:
+            for url in dict.fromkeys(get_urls()):
+                try:
+                    await self.sync_mirror(url)
+                except Exception as e:
+                    print(f"Aviso: falha ao sincronizar a cópia local de {url}: {e}")
+            await asyncio.sleep(interval)
+
+    async def _find_created_page(self, database_id: str, properties: dict, created_since: datetime) -> Optional[dict]:
+        """
+        Procura a página criada por uma chamada incerta: mesmo título, criada desde `created_since` e com
+        as mesmas propriedades enviadas (outra pessoa pode ter criado um card com o mesmo título na janela).
+        """
+        title_name, title_value = next(((name, value['title']) for name, value in properties.items() if 'title' in value), (None, None))
+        title = "".join(part.get('text', {}).get('content', '') for part in title_value or [])
+        if not title:
+            return None
+        # O created_time do Notion tem precisão de minutos, então a janela tem uma margem
+        since = (created_since - timedelta(minutes=1)).isoformat()
+        response = await self._request("databases.query", database_id=database_id, page_size=100, filter={"and": [
+            {"property": title_name, "title": {"equals": title}},
+            {"timestamp": "created_time", "created_time": {"on_or_after": since}},
+        ]})
+        return next((page for page in response.get('results', []) if _page_matches_properties(page, properties)), None)
+
+    async def _create_page(self, payload: dict, created_since: Optional[datetime] = None) -> dict:
+        """
+        `pages.create` não é idempotente: depois de um timeout ou erro 5xx a página pode ter sido criada.
+        Nesses casos, antes de tentar de novo, confere se ela já existe na base.
+        """
+        database_id = payload['parent']['database_id']
+        created_since = created_since or datetime.now(timezone.utc)
+        attempt = 0
+        while True:
+            try:
+                return await self._request("pages.create", idempotent=False, **payload)
+            except Exception as e:
+                attempt += 1
+                if not self.scheduler.may_have_been_applied(e) or attempt >= CREATE_PAGE_MAX_ATTEMPTS:
+                    raise
+                page = await self._find_created_page(database_id, payload['properties'], created_since)
+                if page:
+                    print(f"Aviso: a criação da página falhou ({e!r}), mas ela foi encontrada no Notion ({page['id']}).")
+                    return page
+                print(f"Aviso: a criação da página falhou ({e!r}) e ela não foi encontrada; nova tentativa {attempt}/{CREATE_PAGE_MAX_ATTEMPTS - 1}.")
+
+    async def insert_into_database(self, url, properties, children: Optional[List[Dict]] = None, created_since: Optional[datetime] = None):
         """
         Cria uma nova página no Notion, com propriedades e, opcionalmente, conteúdo (children).
+        A página é criada com o primeiro lote de blocos e o restante é enviado em lotes de
+        MAX_BLOCKS_PER_REQUEST via `blocks.children.append`.
+        Se `created_since` for informado (nova tentativa depois de uma falha), uma página com o mesmo
+        título criada desde então é reaproveitada em vez de criar outra.
         """
         database_id = self.extract_database_id(url)
         if not database_id:
@@ -206,59 +893,71 @@ class NotionIntegration:
             "parent": {"database_id": database_id},
             "properties": properties
         }
-        if children:
-            payload["children"] = children
+        blocks = self._split_oversized_blocks(children) if children else []
+        if blocks:
+            payload["children"] = blocks[:MAX_BLOCKS_PER_REQUEST]
 
         try:
-            return self.notion.pages.create(**payload)
+            page = await self._find_created_page(database_id, properties, created_since) if created_since else None
+            if page is None:
+                page = await self._create_page(payload, created_since)
         except Exception as e:
             raise NotionAPIError(f"Erro ao criar a página no Notion: {e}")
+        self._track_created_page(page)
+        self.pages.put(page)
+        await self._mirror_pages([page])
+
+        for start in range(MAX_BLOCKS_PER_REQUEST, len(blocks), MAX_BLOCKS_PER_REQUEST):
+            try:
+                # Sem nova tentativa automática: depois de um timeout os blocos podem já ter sido adicionados
+                await self._request("blocks.children.append", idempotent=False, block_id=page['id'], children=blocks[start:start + MAX_BLOCKS_PER_REQUEST])
+            except Exception as e:
+                # A página já existe: o card é mantido, mas o conteúdo fica incompleto
+                print(f"Aviso: a página {page['id']} foi criada, mas parte do conteúdo não foi adicionada: {e}")
+                break
+        return page
 
-    def build_page_properties(self, db_url: str, title: str, properties_dict: dict):
-        schema = self.get_database_properties(db_url)
+    async def build_page_properties(self, db_url: str, title: str, properties_dict: dict):
+        schema = await self.get_database_properties(db_url)
         page_properties = {}
         title_prop_name = next((name for name, data in schema.items() if data['type'] == 'title'), None)
         if title_prop_name:
-            page_properties[title_prop_name] = self._format_property_value('title', title)
+            page_properties[title_prop_name] = await self._format_property_value('title', title)
 
         for prop_name, prop_value in properties_dict.items():
             prop_data = schema.get(prop_name)
             if not prop_data:
                 print(f"AVISO: A propriedade '{prop_name}' não foi encontrada na base de dados. Ela será ignorada.")
                 continue
-            formatted_prop = self._format_property_value(prop_data.get('type'), prop_value)
+            formatted_prop = await self._format_property_value(prop_data.get('type'), prop_value)
             if formatted_prop:
                 page_properties[prop_name] = formatted_prop
         return page_properties
 
-    def build_update_payload(self, prop_name: str, prop_type: str, prop_value):
-        formatted_prop = self._format_property_value(prop_type, prop_value)
+    async def build_update_payload(self, prop_name: str, prop_type: str, prop_value):
+        formatted_prop = await self._format_property_value(prop_type, prop_value)
         if formatted_prop:
             return {prop_name: formatted_prop}
         return {}
 
     def extract_value_from_property(self, prop_data, prop_type):
+        extractor = _PROPERTY_EXTRACTORS.get(prop_type)
+        if not extractor: return ''
         try:
-            if prop_type == 'title': return prop_data.get('title', [{}])[0].get('plain_text', '')
-            elif prop_type == 'rich_text': return "".join([part.get('plain_text', '') for part in prop_data.get('rich_text', [])])
-            elif prop_type == 'status': return prop_data.get('status', {}).get('name', '')
-            elif prop_type == 'select': return prop_data.get('select', {}).get('name', '')
-            elif prop_type == 'multi_select': return ", ".join([tag.get('name', '') for tag in prop_data.get('multi_select', [])])
-            elif prop_type == 'people': return ", ".join([person.get('name', 'Usuário Desconhecido') for person in prop_data.get('people', [])])
-            elif prop_type == 'date':
-                date_info = prop_data.get('date')
-                if date_info and date_info.get('start'):
-                    return datetime.fromisoformat(date_info['start']).strftime('%d/%m/%Y')
-                return ''
-            elif prop_type == 'url': return prop_data.get('url', '')
-            elif prop_type == 'number': return str(prop_data.get('number', ''))
-            return ''
+            return extractor(prop_data)
         except (IndexError, TypeError, AttributeError):
             return ''
 
+    async def get_properties_for_interaction(self, url):
+        all_props = await self.get_database_properties(url)
+        entry = self._schema_cache.get(self.extract_database_id(url))
+        if entry and entry['properties'] is all_props:
+            if entry['properties_to_ask'] is None:
+                entry['properties_to_ask'] = self._build_properties_to_ask(all_props)
+            return list(entry['properties_to_ask'])
+        return self._build_properties_to_ask(all_props)
 
-    def get_properties_for_interaction(self, url):
-        all_props = self.get_database_properties(url)
+    def _build_properties_to_ask(self, all_props: dict) -> List[Dict[str, Any]]:
         properties_to_ask, title_prop = [], None
         excluded_types = ['rollup', 'created_by', 'created_time', 'last_edited_by', 'last_edited_time', 'formula']
         for prop_name, prop_data in all_props.items():
@@ -278,45 +977,92 @@ class NotionIntegration:
             properties_to_ask.insert(0, title_prop)
         return properties_to_ask
 
+    def _get_renderer(self, page_result: dict, display_properties: Optional[List[str]]) -> EmbedRenderer:
+        database_id = (page_result.get('parent') or {}).get('database_id', '').replace('-', '')
+        key = (database_id, tuple(display_properties) if display_properties is not None else None)
+        renderer = self._renderers.get(key) if database_id else None
+        if renderer is None:
+            # Os tipos vêm do schema em cache ou, se ele não estiver carregado, da própria página
+            schema = (self._schema_cache.get(database_id) or {}).get('properties') or page_result.get('properties', {})
+            renderer = EmbedRenderer({name: data.get('type') for name, data in schema.items()}, display_properties)
+            if database_id: self._renderers[key] = renderer
+        return renderer
+
     def format_page_for_embed(self, page_result: dict, display_properties: Optional[List[str]] = None, include_footer: bool = False) -> Optional[discord.Embed]:
         if not page_result: return None
-        properties = page_result.get('properties', {})
-        page_url, title = page_result.get('url', '#'), "Card sem título"
-        fields = []
-        props_to_iterate = display_properties if display_properties is not None else list(properties.keys())
-
-        for prop_name in props_to_iterate:
-            prop_data = properties.get(prop_name)
-            if not prop_data: continue
-            prop_type = prop_data.get('type')
-            value = self.extract_value_from_property(prop_data, prop_type)
-            if prop_type == 'title':
-                title = value if value else title
-                continue
-            if value:
-                fields.append({'name': prop_name, 'value': str(value)})
-
-        embed = discord.Embed(title=f"📌 {title}", url=page_url, color=discord.Color.green())
-        for field in fields:
-            embed.add_field(name=field['name'], value=field['value'], inline=False)
-        if include_footer:
-            embed.set_footer(text="Resultado da busca")
-
-        return embed
+        return self._get_renderer(page_result, display_properties).render(page_result, include_footer)
 
-    def update_page(self, page_id: str, properties: dict):
+    async def update_page(self, page_id: str, properties: dict):
         try:
-            return self.notion.pages.update(page_id=page_id, properties=properties)
+            page = await self._request("pages.update", page_id=page_id, properties=properties)
         except Exception as e: raise NotionAPIError(f"Erro ao atualizar a página no Notion: {e}")
+        self.pages.put(page)
+        await self._mirror_pages([page])
+        return page
+
+    async def update_page_checked(self, page_id: str, properties: dict, original_page: dict):
+        """
+        Salva as alterações de uma sessão de edição em um único `pages.update`, depois de conferir se
+        a página mudou desde `original_page`. Se alguma das propriedades alteradas também foi editada
+        por outra pessoa, levanta NotionConflictError; mudanças em outras propriedades são preservadas.
+        (O last_edited_time do Notion tem precisão de minutos, então edições no mesmo minuto passam.)
+        """
+        current = await self.get_page(page_id, use_cache=False)
+        if current.get('last_edited_time') != original_page.get('last_edited_time'):
+            original_props, current_props = original_page.get('properties', {}), current.get('properties', {})
+            conflicting = [
+                name for name in properties
+                if self.extract_value_from_property(original_props.get(name, {}), original_props.get(name, {}).get('type'))
+                != self.extract_value_from_property(current_props.get(name, {}), current_props.get(name, {}).get('type'))
+            ]
+            if conflicting:
+                raise NotionConflictError("A página foi alterada por outra pessoa durante a edição.", current, conflicting)
+        return await self.update_page(page_id, properties)
 
-    def get_page(self, page_id: str):
+    def preview_page(self, page: dict, staged_properties: dict) -> dict:
+        """Cópia da página com as alterações pendentes aplicadas, no formato lido por `format_page_for_embed`."""
+        preview = copy.deepcopy(page)
+        properties = preview.setdefault('properties', {})
+        for prop_name, payload in staged_properties.items():
+            prop_type, value = next(iter(payload.items()))
+            value = copy.deepcopy(value)
+            if prop_type in ('title', 'rich_text'):
+                for part in value: part['plain_text'] = part.get('text', {}).get('content', '')
+            elif prop_type == 'people':
+                for person in value: person['name'] = self.users.get_name(person['id']) or 'Usuário Desconhecido'
+            properties[prop_name] = {**properties.get(prop_name, {}), 'type': prop_type, prop_type: value}
+        return preview
+
+    async def get_page(self, page_id: str, use_cache: bool = True):
+        """
+        Retorna a página, usando a versão em cache se ela ainda for válida.
+        O cache só guarda páginas lidas ou gravadas diretamente na API (nunca as da cópia local).
+        """
+        if use_cache:
+            page = self.pages.get(page_id)
+            metrics.cache_access("page", hit=page is not None)
+            if page: return page
         try:
-            return self.notion.pages.retrieve(page_id=page_id)
+            page = await self._request("pages.retrieve", page_id=page_id)
         except Exception as e: raise NotionAPIError(f"Erro ao buscar a página no Notion: {e}")
+        self.pages.put(page)
+        return page
 
-    def delete_page(self, page_id: str):
+    def get_cached_page(self, page_id: str) -> Optional[dict]:
+        """Versão em cache da página (ou None), sem nenhuma chamada à API."""
+        return self.pages.get(page_id)
+
+    async def delete_page(self, page_id: str):
         """Arquiva (deleta) uma página no Notion."""
         try:
-            return self.notion.pages.update(page_id=page_id, archived=True)
+            response = await self._request("pages.update", page_id=page_id, archived=True)
         except Exception as e:
-            raise NotionAPIError(f"Erro ao deletar (arquivar) a página no Notion: {e}")
\ No newline at end of file
+            raise NotionAPIError(f"Erro ao deletar (arquivar) a página no Notion: {e}")
+        self._track_deleted_page(page_id)
+        self.pages.discard(page_id)
+        if self.mirror:
+            try:
+                await self.mirror.remove_page(page_id)
+            except Exception as e:
+                print(f"Aviso: não foi possível remover a página {page_id} da cópia local: {e}")
+        return response
@@ -0,0 +1,258 @@
+# notion_mirror.py
+
+import os
+import json
+import time
+import sqlite3
+import asyncio
+import threading
+import unicodedata
+from difflib import SequenceMatcher
+from typing import Optional, Dict, Any, List, Iterable
+
+NOTION_MIRROR_DB_PATH = os.getenv("NOTION_MIRROR_DB_PATH", "notion_mirror.db")
+# Similaridade mínima (0 a 1) para um resultado aproximado ser aceito na busca
+FUZZY_MATCH_CUTOFF = float(os.getenv("NOTION_MIRROR_FUZZY_CUTOFF", "0.75"))
+# Quantidade de candidatos avaliados na busca aproximada
+FUZZY_CANDIDATES = 200
+
+# Tipos indexados como texto livre (busca por "contém")
+TEXT_PROPERTY_TYPES = ("title", "rich_text")
+# Tipos indexados por valor (busca por igualdade)
+VALUE_PROPERTY_TYPES = ("select", "status", "multi_select", "people")
+
+
+def _fold(value: str) -> str:
+    """Minúsculas, sem acentos e com espaços normalizados (usado na indexação e na busca)."""
+    value = unicodedata.normalize('NFKD', value or '')
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return " ".join(value.lower().split())
+
+
+def _property_text(prop: dict) -> str:
+    return "".join(part.get('plain_text', '') for part in prop.get(prop.get('type'), None) or [])
+
+
+def _property_values(prop: dict) -> List[str]:
+    prop_type = prop.get('type')
+    data = prop.get(prop_type)
+    if not data:
+        return []
+    if prop_type in ("select", "status"):
+        return [data['name']] if data.get('name') else []
+    if prop_type == "multi_select":
+        return [tag['name'] for tag in data if tag.get('name')]
+    if prop_type == "people":
+        return [person['id'] for person in data if person.get('id')]
+    return []
+
+
+def _fuzzy_score(term: str, text: str) -> float:
+    """Maior similaridade entre o termo e qualquer trecho do texto com a mesma quantidade de palavras."""
+    words, size = text.split(), max(1, len(term.split()))
+    if len(words) <= size:
+        return SequenceMatcher(None, term, text).ratio()
+    return max(SequenceMatcher(None, term, " ".join(words[i:i + size])).ratio() for i in range(len(words) - size + 1))
+
+
+class NotionMirror:
+    """
+    Cópia local (SQLite) das páginas das bases de dados configuradas, usada pelo /busca.
+    O texto das propriedades fica em um índice FTS5 com tokenizador trigram, o que permite buscas
+    por "contém" em qualquer trecho; select, status, multi_select e pessoas são indexados por valor.
+    A sincronização (feita pelo NotionIntegration) apenas grava aqui o que veio do Notion.
+    """
+
+    def __init__(self, db_path: str = NOTION_MIRROR_DB_PATH):
+        self.db_path = db_path
+        self._db_lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # O arquivo pode ser compartilhado por vários processos de shards
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.executescript("""
+            CREATE TABLE IF NOT EXISTS pages (
+                page_id TEXT PRIMARY KEY,
+                database_id TEXT NOT NULL,
+                last_edited_time TEXT,
+                data TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS pages_by_database ON pages (database_id, last_edited_time);
+            CREATE TABLE IF NOT EXISTS page_values (
+                page_id TEXT NOT NULL,
+                database_id TEXT NOT NULL,
+                prop_name TEXT NOT NULL,
+                value TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS page_values_lookup ON page_values (database_id, prop_name, value);
+            CREATE INDEX IF NOT EXISTS page_values_by_page ON page_values (page_id);
+            CREATE VIRTUAL TABLE IF NOT EXISTS page_text USING fts5(
+                content, page_id UNINDEXED, database_id UNINDEXED, prop_name UNINDEXED, tokenize='trigram'
+            );
+            CREATE TABLE IF NOT EXISTS sync_state (
+                database_id TEXT PRIMARY KEY,
+                synced_at TEXT NOT NULL,
+                checked_at REAL NOT NULL,
+                full_at REAL NOT NULL
+            );
+        """)
+        self._conn.commit()
+
+    # --- ESCRITA ---
+
+    def _delete_page_rows(self, page_id: str):
+        self._conn.execute("DELETE FROM pages WHERE page_id = ?", (page_id,))
+        self._conn.execute("DELETE FROM page_values WHERE page_id = ?", (page_id,))
+        self._conn.execute("DELETE FROM page_text WHERE page_id = ?", (page_id,))
+
+    def _upsert_pages_sync(self, pages: Iterable[dict]):
+        with self._db_lock:
+            for page in pages:
+                page_id = page['id']
+                database_id = (page.get('parent') or {}).get('database_id', '').replace('-', '')
+                if not database_id:
+                    continue
+                self._delete_page_rows(page_id)
+                if page.get('archived') or page.get('in_trash'):
+                    continue
+                self._conn.execute(
+                    "INSERT INTO pages (page_id, database_id, last_edited_time, data) VALUES (?, ?, ?, ?)",
+                    (page_id, database_id, page.get('last_edited_time'), json.dumps(page))
+                )
+                for prop_name, prop in (page.get('properties') or {}).items():
+                    prop_type = prop.get('type')
+                    if prop_type in TEXT_PROPERTY_TYPES:
+                        text = _fold(_property_text(prop))
+                        if text:
+                            self._conn.execute("INSERT INTO page_text (content, page_id, database_id, prop_name) VALUES (?, ?, ?, ?)", (text, page_id, database_id, prop_name))
+                    elif prop_type in VALUE_PROPERTY_TYPES:
+                        self._conn.executemany(
+                            "INSERT INTO page_values (page_id, database_id, prop_name, value) VALUES (?, ?, ?, ?)",
+                            [(page_id, database_id, prop_name, value) for value in _property_values(prop)]
+                        )
+            self._conn.commit()
+
+    def _remove_page_sync(self, page_id: str):
+        with self._db_lock:
+            self._delete_page_rows(page_id)
+            self._conn.commit()
+
+    def _prune_database_sync(self, database_id: str, keep_ids: set, edited_before: str):
+        """Remove as páginas que não apareceram em uma sincronização completa (arquivadas fora do bot)."""
+        with self._db_lock:
+            rows = self._conn.execute("SELECT page_id FROM pages WHERE database_id = ? AND last_edited_time < ?", (database_id, edited_before))
+            stale = [row['page_id'] for row in rows if row['page_id'] not in keep_ids]
+            for page_id in stale:
+                self._delete_page_rows(page_id)
+            self._conn.commit()
+
+    def _mark_synced_sync(self, database_id: str, synced_at: str, full: bool):
+        now = time.time()
+        with self._db_lock:
+            self._conn.execute("""
+                INSERT INTO sync_state (database_id, synced_at, checked_at, full_at) VALUES (?, ?, ?, ?)
+                ON CONFLICT(database_id) DO UPDATE SET synced_at = excluded.synced_at, checked_at = excluded.checked_at,
+                    full_at = CASE WHEN ? THEN excluded.full_at ELSE sync_state.full_at END
+            """, (database_id, synced_at, now, now, int(full)))
+            self._conn.commit()
+
+    async def upsert_pages(self, pages: List[dict]):
+        await asyncio.to_thread(self._upsert_pages_sync, pages)
+
+    async def remove_page(self, page_id: str):
+        await asyncio.to_thread(self._remove_page_sync, page_id)
+
+    async def prune_database(self, database_id: str, keep_ids: set, edited_before: str):
+        await asyncio.to_thread(self._prune_database_sync, database_id, keep_ids, edited_before)
+
+    async def mark_synced(self, database_id: str, synced_at: str, full: bool):
+        await asyncio.to_thread(self._mark_synced_sync, database_id, synced_at, full)
+
+    # --- LEITURA ---
+
+    def _get_state_sync(self, database_id: str) -> Optional[Dict[str, Any]]:
+        with self._db_lock:
+            row = self._conn.execute("SELECT * FROM sync_state WHERE database_id = ?", (database_id,)).fetchone()
+        return dict(row) if row else None
+
+    async def get_state(self, database_id: str) -> Optional[Dict[str, Any]]:
+        # Em uma thread, como as demais leituras: o lock pode estar com uma gravação em lote da sincronização
+        return await asyncio.to_thread(self._get_state_sync, database_id)
+
+    async def is_fresh(self, database_id: str, max_age: float) -> bool:
+        state = await self.get_state(database_id)
+        return bool(state) and time.time() - state['checked_at'] < max_age
+
+    def _load_pages(self, page_ids: List[str]) -> List[dict]:
+        if not page_ids:
+            return []
+        placeholders = ",".join("?" * len(page_ids))
+        rows = self._conn.execute(
+            f"SELECT data FROM pages WHERE page_id IN ({placeholders}) ORDER BY last_edited_time DESC", page_ids
+        ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+
+    def _text_matches(self, database_id: str, term: str, properties: Optional[List[str]]) -> List[str]:
+        prop_clause, params = "", [database_id]
+        if properties is not None:
+            prop_clause = f" AND prop_name IN ({','.join('?' * len(properties))})"
+            params += properties
+        if len(term) >= 3:
+            query = f"SELECT DISTINCT page_id FROM page_text WHERE page_text MATCH ? AND database_id = ?{prop_clause}"
+            params.insert(0, '"' + term.replace('"', '""') + '"')
+        else:
+            # Termos com menos de 3 letras não formam um trigrama; a busca percorre o texto indexado
+            escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            query = f"SELECT DISTINCT page_id FROM page_text WHERE content LIKE ? ESCAPE '\\' AND database_id = ?{prop_clause}"
+            params.insert(0, f"%{escaped}%")
+        return [row['page_id'] for row in self._conn.execute(query, params)]
+
+    def _fuzzy_text_matches(self, database_id: str, term: str, properties: Optional[List[str]]) -> List[str]:
+        """Busca aproximada: candidatos que compartilham trigramas com o termo, filtrados pela similaridade."""
+        trigrams = {term[i:i + 3] for i in range(len(term) - 2)}
+        if not trigrams:
+            return []
+        prop_clause, params = "", [" OR ".join('"' + t.replace('"', '""') + '"' for t in trigrams), database_id]
+        if properties is not None:
+            prop_clause = f" AND prop_name IN ({','.join('?' * len(properties))})"
+            params += properties
+        rows = self._conn.execute(
+            f"SELECT page_id, content FROM page_text WHERE page_text MATCH ? AND database_id = ?{prop_clause} ORDER BY rank LIMIT {FUZZY_CANDIDATES}",
+            params
+        ).fetchall()
+        scores: Dict[str, float] = {}
+        for row in rows:
+            score = _fuzzy_score(term, row['content'])
+            if score >= FUZZY_MATCH_CUTOFF:
+                scores[row['page_id']] = max(score, scores.get(row['page_id'], 0.0))
+        return sorted(scores, key=scores.get, reverse=True)
+
+    def _value_matches(self, database_id: str, value: str, properties: List[str]) -> List[str]:
+        rows = self._conn.execute(
+            f"SELECT DISTINCT page_id FROM page_values WHERE database_id = ? AND value = ? AND prop_name IN ({','.join('?' * len(properties))})",
+            [database_id, value] + properties
+        )
+        return [row['page_id'] for row in rows]
+
+    def _search_sync(self, database_id: str, term: str, properties: Optional[List[str]], property_type: str, fuzzy: bool) -> List[dict]:
+        with self._db_lock:
+            if property_type in VALUE_PROPERTY_TYPES:
+                return self._load_pages(self._value_matches(database_id, term, properties or []))
+            folded = _fold(term)
+            if not folded:
+                return []
+            page_ids = self._text_matches(database_id, folded, properties)
+            if page_ids or not fuzzy:
+                return self._load_pages(page_ids)
+            # Nenhum resultado exato: tenta uma busca aproximada, mantendo a ordem por similaridade
+            fuzzy_ids = self._fuzzy_text_matches(database_id, folded, properties)
+            pages = {page['id']: page for page in self._load_pages(fuzzy_ids)}
+            return [pages[page_id] for page_id in fuzzy_ids if page_id in pages]
+
+    async def search(self, database_id: str, term: str, properties: Optional[List[str]] = None, property_type: str = "rich_text", fuzzy: bool = True) -> List[dict]:
+        """
+        Busca páginas na cópia local. Para texto, `properties=None` pesquisa todas as propriedades de texto;
+        para select/status/multi_select o termo é o nome da opção e para pessoas, o ID do usuário no Notion.
+        """
+        return await asyncio.to_thread(self._search_sync, database_id, term, properties, property_type, fuzzy)
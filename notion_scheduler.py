@@ -0,0 +1,154 @@
+# notion_scheduler.py
+
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Tuple
+
+# Prioridades: quanto menor o número, antes a chamada é atendida
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BACKGROUND = 10
+
+_RETRYABLE_STATUS = {500, 502, 503, 504}
+
+
+class NotionRequestScheduler:
+    """
+    Agendador global das chamadas ao Notion.
+    Usa um token bucket (o Notion aceita ~3 requisições por segundo por integração), atende primeiro
+    as chamadas interativas, respeita o `Retry-After` das respostas 429 e repete erros transitórios
+    com backoff exponencial com jitter.
+    """
+
+    def __init__(self, rate: float = 3.0, burst: int = 3, max_retries: int = 5, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.rate, self.capacity = rate, float(burst)
+        self.max_retries, self.base_delay, self.max_delay = max_retries, base_delay, max_delay
+        self._tokens = float(burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._waiters: List[Tuple[int, int, asyncio.Future]] = []
+        self._sequence = itertools.count()
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._new_waiter = asyncio.Event()
+
+    @property
+    def queue_size(self) -> int:
+        return sum(1 for _, _, future in self._waiters if not future.done())
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def _time_until_token(self) -> float:
+        self._refill()
+        paused_for = self._paused_until - time.monotonic()
+        if paused_for > 0:
+            return paused_for
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def _dispatch(self):
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.done():
+                heapq.heappop(self._waiters)
+                continue
+            delay = self._time_until_token()
+            if delay > 0:
+                # Acorda antes se chegar alguém novo, para reavaliar quem tem prioridade
+                self._new_waiter.clear()
+                try:
+                    await asyncio.wait_for(self._new_waiter.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._waiters)
+            self._tokens -= 1
+            future.set_result(None)
+
+    async def _acquire(self, priority: int):
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        self._new_waiter.set()
+        if self._dispatcher is None or self._dispatcher.done():
+            self._dispatcher = asyncio.create_task(self._dispatch())
+        await future
+
+    @staticmethod
+    def _classify(error: Exception) -> Optional[str]:
+        """
+        Classifica o erro: 'rate_limited' (429), 'not_sent' (a requisição nem chegou ao Notion),
+        'maybe_applied' (timeout ou 5xx depois do envio: o Notion pode ter executado a chamada)
+        ou None para erros que não são transitórios.
+        """
+        # Importados aqui para não carregar o SDK do Notion antes do primeiro uso do cliente
+        import httpx
+        from notion_client import APIErrorCode, APIResponseError
+        from notion_client.errors import HTTPResponseError, RequestTimeoutError
+
+        if isinstance(error, APIResponseError) and (error.code == APIErrorCode.RateLimited or getattr(error, 'status', None) == 429):
+            return 'rate_limited'
+        # O notion_client converte os timeouts do httpx em RequestTimeoutError; a fase fica no erro original
+        cause = (error.__cause__ or error.__context__) if isinstance(error, RequestTimeoutError) else error
+        if isinstance(cause, (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout)):
+            return 'not_sent'
+        if (
+            isinstance(error, (RequestTimeoutError, httpx.TransportError))
+            or (isinstance(error, APIResponseError) and error.code in (APIErrorCode.InternalServerError, APIErrorCode.ServiceUnavailable))
+            or (isinstance(error, HTTPResponseError) and getattr(error, 'status', None) in _RETRYABLE_STATUS)
+        ):
+            return 'maybe_applied'
+        return None
+
+    def may_have_been_applied(self, error: Exception) -> bool:
+        """Indica se uma chamada que falhou pode ter sido executada mesmo assim pelo Notion."""
+        return self._classify(error) == 'maybe_applied'
+
+    def _retry_delay(self, error: Exception, attempt: int, idempotent: bool = True) -> Optional[float]:
+        """Retorna quanto esperar antes de repetir a chamada, ou None se ela não deve ser repetida."""
+        kind = self._classify(error)
+        if kind == 'rate_limited':
+            retry_after = self._parse_retry_after(getattr(error, 'headers', None))
+            delay = retry_after if retry_after is not None else self._backoff(attempt)
+            # A pausa vale para todas as chamadas: insistir só prolonga o bloqueio
+            self._paused_until = max(self._paused_until, time.monotonic() + delay)
+            return delay
+        if kind == 'not_sent' or (kind == 'maybe_applied' and idempotent):
+            return self._backoff(attempt)
+        return None
+
+    def _backoff(self, attempt: int) -> float:
+        delay = min(self.max_delay, self.base_delay * (2 ** attempt))
+        return random.uniform(delay / 2, delay)
+
+    @staticmethod
+    def _parse_retry_after(headers) -> Optional[float]:
+        if not headers:
+            return None
+        try:
+            return max(0.0, float(headers.get('Retry-After')))
+        except (TypeError, ValueError):
+            return None
+
+    async def run(self, func: Callable[..., Awaitable[Any]], *args, priority: int = PRIORITY_INTERACTIVE, idempotent: bool = True, **kwargs) -> Any:
+        """
+        Executa `func(*args, **kwargs)` respeitando o limite de taxa e repetindo erros transitórios.
+        Com `idempotent=False` (ex.: `pages.create`), só 429 e falhas antes do envio são repetidos:
+        depois de um timeout ou 5xx a chamada pode já ter sido aplicada, e o erro é repassado.
+        """
+        attempt = 0
+        while True:
+            await self._acquire(priority)
+            try:
+                return await func(*args, **kwargs)
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, idempotent)
+                if delay is None or attempt >= self.max_retries:
+                    raise
+                attempt += 1
+                print(f"Aviso: chamada ao Notion falhou ({e}); nova tentativa {attempt}/{self.max_retries} em {delay:.1f}s.")
+                await asyncio.sleep(delay)
@@ -0,0 +1,103 @@
+# sharding.py
+
+import os
+import sys
+import time
+import contextlib
+import subprocess
+from typing import Optional, List, Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _parse_shard_ids(value: str) -> Optional[List[int]]:
+    ids = [int(part) for part in value.replace(" ", "").split(",") if part]
+    return ids or None
+
+
+# Total de shards do bot (vazio = quantidade recomendada pelo Discord)
+DISCORD_SHARD_COUNT = int(os.getenv("DISCORD_SHARD_COUNT")) if os.getenv("DISCORD_SHARD_COUNT") else None
+# Shards atendidos por este processo, separados por vírgula (vazio = todos)
+DISCORD_SHARD_IDS = _parse_shard_ids(os.getenv("DISCORD_SHARD_IDS", ""))
+# Quantidade de processos iniciados pelo `python bot.py` (cada um com uma parte dos shards)
+DISCORD_SHARD_PROCESSES = int(os.getenv("DISCORD_SHARD_PROCESSES", "1"))
+
+
+def shard_for_guild(guild_id: int, shard_count: int) -> int:
+    """Shard que recebe os eventos do servidor (fórmula da documentação do Discord)."""
+    return (int(guild_id) >> 22) % shard_count
+
+
+def owns_guild(guild_id: Optional[int]) -> bool:
+    """Indica se o servidor é atendido por este processo (sempre verdadeiro sem shards explícitos)."""
+    if guild_id is None or not DISCORD_SHARD_IDS or not DISCORD_SHARD_COUNT:
+        return True
+    return shard_for_guild(guild_id, DISCORD_SHARD_COUNT) in DISCORD_SHARD_IDS
+
+
+@contextlib.contextmanager
+def file_lock(path: str, timeout: float = 30.0) -> Iterator[None]:
+    """
+    Lock exclusivo entre processos baseado em um arquivo `<path>.lock`.
+    Protege os arquivos compartilhados pelos processos de shards (configurações e cache de resumos)
+    durante o ciclo leitura + mescla + escrita.
+    """
+    with open(f"{path}.lock", "a+") as lock_file:
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if fcntl:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+                break
+            except OSError:
+                if time.monotonic() >= deadline:
+                    raise TimeoutError(f"Não foi possível obter o lock de '{path}'.")
+                time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def launch_shard_processes(script: str, processes: int = DISCORD_SHARD_PROCESSES, shard_count: Optional[int] = DISCORD_SHARD_COUNT) -> int:
+    """
+    Inicia um processo do bot por grupo de shards e espera todos terminarem.
+    Os shards são distribuídos em rodízio; o limite de requisições ao Notion (que vale para a
+    integração inteira) e a porta de métricas são divididos entre os processos.
+    """
+    shard_count = shard_count or processes
+    groups = [list(range(shard_count))[index::processes] for index in range(processes)]
+    notion_rate = float(os.getenv("NOTION_REQUESTS_PER_SECOND", "3")) / processes
+    metrics_port = os.getenv("METRICS_PORT", "")
+
+    children = []
+    for index, shard_ids in enumerate(group for group in groups if group):
+        env = dict(os.environ,
+                   DISCORD_SHARD_COUNT=str(shard_count),
+                   DISCORD_SHARD_IDS=",".join(map(str, shard_ids)),
+                   DISCORD_SHARD_PROCESSES="1",
+                   NOTION_REQUESTS_PER_SECOND=str(notion_rate))
+        if metrics_port:
+            env["METRICS_PORT"] = str(int(metrics_port) + index)
+        children.append(subprocess.Popen([sys.executable, script], env=env))
+        print(f"Processo {index + 1} iniciado com os shards {shard_ids} de {shard_count}.")
+
+    try:
+        return max(child.wait() for child in children)
+    except KeyboardInterrupt:
+        for child in children:
+            child.terminate()
+        for child in children:
+            child.wait()
+        return 0
@@ -1,113 +1,283 @@
 # ui_components.py (Versão com correção do custom_id)
 
+import os
 import discord
 from discord import Interaction, SelectOption, ButtonStyle, Color
 from discord.ui import View, Button, Select, Modal, TextInput
 import asyncio
-from typing import List, Optional, Dict, Any
+import contextlib
+import weakref
+from collections import Counter
+from collections import OrderedDict
+from typing import List, Optional, Dict, Any, AsyncIterator, Awaitable, Union, TYPE_CHECKING
 from datetime import datetime
 
 # Módulos locais
-from notion_integration import NotionIntegration, NotionAPIError
+from notion_integration import NotionIntegration, NotionAPIError, NotionConflictError
 from config_utils import save_config, load_config
-from ia_processor import summarize_thread_content
+from ia_processor import summarize_thread_content, QueueCallback
+from metrics import metrics
+
+if TYPE_CHECKING:
+    from card_jobs import CardJobQueue
+
+# Quantidade de mensagens lidas de um tópico; com o resumo por IA ativo, o histórico lido é maior
+THREAD_HISTORY_LIMIT = 100
+SUMMARY_HISTORY_LIMIT = int(os.getenv("AI_SUMMARY_HISTORY_LIMIT", "5000"))
+# Tempo limite (em segundos) de cada seção do corpo do card; o resumo por IA inclui a espera na fila
+PAGE_STAGE_TIMEOUT = float(os.getenv("PAGE_STAGE_TIMEOUT", "30"))
+AI_SUMMARY_STAGE_TIMEOUT = float(os.getenv("AI_SUMMARY_STAGE_TIMEOUT", "300"))
+# Embeds já montados que cada PaginationView mantém em memória, e quantos são preparados adiante
+EMBED_CACHE_SIZE = 20
+EMBED_PRERENDER_AHEAD = 3
+
+# --- HISTÓRICO DE TÓPICOS ---
+
+class ThreadSnapshot:
+    """
+    Histórico de um tópico buscado uma única vez por comando.
+    Expõe as mensagens, os participantes, os anexos e a mensagem inicial para os construtores do card,
+    evitando que cada etapa percorra `thread.history()` de novo.
+    Com o resumo por IA o histórico lido é maior, mas participantes e anexos continuam vindo só das
+    THREAD_HISTORY_LIMIT mensagens mais recentes, para que o conteúdo do card não mude.
+    """
+
+    def __init__(self, thread: discord.Thread, messages: List[discord.Message], limit: Optional[int]):
+        self.thread = thread
+        self.messages = messages  # Da mais nova para a mais antiga, como em thread.history()
+        self.limit = limit
+        self.card_messages = messages[:THREAD_HISTORY_LIMIT]
+        self._participants: Optional[set] = None
+        self._attachments: Optional[List[Dict[str, str]]] = None
+
+    @classmethod
+    async def fetch(cls, thread: discord.Thread, limit: Optional[int] = 100) -> "ThreadSnapshot":
+        with metrics.timer("stage_duration_seconds", stage="historico"):
+            messages = [message async for message in thread.history(limit=limit)]
+        metrics.inc("discord_history_fetches_total")
+        metrics.inc("discord_history_messages_total", len(messages))
+        return cls(thread, messages, limit)
+
+    @classmethod
+    async def fetch_for_command(cls, thread: discord.Thread, config: dict, command_name: str) -> "ThreadSnapshot":
+        """Busca o histórico com o limite adequado às funções ativadas para o comando."""
+        limit = SUMMARY_HISTORY_LIMIT if command_name in config.get('ai_summary_for_commands', []) else THREAD_HISTORY_LIMIT
+        return await cls.fetch(thread, limit=limit)
+
+    @property
+    def is_complete(self) -> bool:
+        """Indica se o histórico inteiro do tópico cabe no snapshot."""
+        return self.limit is None or len(self.messages) < self.limit
+
+    @property
+    def participants(self) -> set:
+        if self._participants is None:
+            self._participants = {message.author for message in self.card_messages if not message.author.bot}
+        return self._participants
+
+    @property
+    def attachments(self) -> List[Dict[str, str]]:
+        if self._attachments is None:
+            self._attachments = []
+            for message in self.card_messages:
+                for attachment in message.attachments:
+                    content_type = attachment.content_type or ''
+                    if content_type.startswith(('image/', 'video/')) or attachment.filename.lower().endswith(('.gif')):
+                        self._attachments.append({
+                            "type": content_type.split('/')[0],
+                            "url": attachment.url,
+                            "filename": attachment.filename
+                        })
+        return self._attachments
+
+    async def get_starter_message(self) -> Optional[discord.Message]:
+        """
+        Busca a primeira mensagem do tópico (a que o iniciou), reaproveitando o histórico já carregado.
+        """
+        for message in self.messages:
+            if message.id == self.thread.id:
+                return message
+        try:
+            return await self.thread.fetch_message(self.thread.id)
+        except (discord.NotFound, discord.Forbidden):
+            # Se o snapshot tem o histórico completo, a mensagem mais antiga já está aqui
+            if self.is_complete:
+                return self.messages[-1] if self.messages else None
+            async for message in self.thread.history(limit=1, oldest_first=True):
+                return message
+        return None
+
+
+# --- REGISTRO DE VIEWS ---
+
+# Views vivas (referências fracas: o registro não impede que sejam liberadas)
+_live_views: "weakref.WeakSet[View]" = weakref.WeakSet()
+
+
+class TrackedView(View):
+    """View contabilizada em `live_view_stats`."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        _live_views.add(self)
+
+
+def _process_rss_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def live_view_stats(client: Optional[discord.Client] = None) -> Dict[str, Any]:
+    """Quantidade de views ativas por classe, views persistentes no discord.py e memória do processo."""
+    counts = Counter(type(view).__name__ for view in list(_live_views) if not view.is_finished())
+    return {
+        "views": dict(counts),
+        "total": sum(counts.values()),
+        "persistent": len(client.persistent_views) if client else None,
+        "rss_bytes": _process_rss_bytes(),
+    }
+
 
 # --- FUNÇÕES AUXILIARES DE UI ---
 
-async def get_first_message(thread: discord.Thread) -> Optional[discord.Message]:
+async def get_first_message(snapshot: ThreadSnapshot) -> Optional[discord.Message]:
     """
     Busca a primeira mensagem de um tópico (a que o iniciou).
     """
-    try:
-        # A propriedade starter_message é a forma mais confiável
-        return await thread.fetch_message(thread.id)
-    except (discord.NotFound, discord.Forbidden):
-        # Fallback para o histórico se o starter_message falhar
-        async for message in thread.history(limit=1, oldest_first=True):
-            return message
-    return None
-
-async def get_topic_participants(thread: discord.Thread, limit: int = 100) -> set[discord.Member]:
+    return await snapshot.get_starter_message()
+
+async def get_topic_participants(snapshot: ThreadSnapshot) -> set[discord.Member]:
     """Busca os participantes únicos de um tópico com base no histórico de mensagens."""
-    participants = set()
-    async for message in thread.history(limit=limit):
-        if not message.author.bot:
-            participants.add(message.author)
-    return participants
+    return snapshot.participants
 
-async def get_thread_attachments(thread: discord.Thread, limit: int = 100) -> List[Dict[str, str]]:
+async def get_thread_attachments(snapshot: ThreadSnapshot) -> List[Dict[str, str]]:
     """
     Busca URLs de anexos de imagens, GIFs e vídeos em um tópico.
     Retorna uma lista de dicionários com 'type' e 'url'.
     """
-    attachments_data = []
-    async for message in thread.history(limit=limit):
-        if message.attachments:
-            for attachment in message.attachments:
-                if attachment.content_type.startswith(('image/', 'video/')) or attachment.filename.lower().endswith(('.gif')):
-                    attachments_data.append({
-                        "type": attachment.content_type.split('/')[0],
-                        "url": attachment.url,
-                        "filename": attachment.filename
-                    })
-    return attachments_data
-
-
-async def _build_notion_page_content(config: dict, thread_context: Optional[discord.Thread], notion_integration: NotionIntegration, command_name: str) -> Optional[List[Dict]]:
+    return snapshot.attachments
+
+
+async def run_stage(name: str, coro: Awaitable[Any], timeout: float, default: Any = None) -> Any:
+    """
+    Executa uma etapa com tempo limite. Se ela falhar ou demorar demais, o erro é registrado
+    e `default` é retornado, sem interromper as etapas que rodam em paralelo.
+    """
+    try:
+        with metrics.timer("stage_duration_seconds", stage=name):
+            return await asyncio.wait_for(coro, timeout)
+    except asyncio.TimeoutError:
+        print(f"Aviso: a etapa '{name}' excedeu {timeout:.0f}s e foi ignorada.")
+    except Exception as e:
+        print(f"Aviso: a etapa '{name}' falhou e foi ignorada: {e}")
+    return default
+
+
+async def _build_notion_page_content(config: dict, thread_context: Optional[discord.Thread], notion_integration: NotionIntegration, command_name: str, snapshot: Optional[ThreadSnapshot] = None, on_queue_position: Optional[QueueCallback] = None) -> Optional[List[Dict]]:
     """
     Constrói o corpo da página do Notion com base nas configurações ativadas para o comando específico.
+    Se um `ThreadSnapshot` for informado, o histórico do tópico não é buscado novamente.
+    `on_queue_position` é repassado ao resumo por IA para informar a posição do usuário na fila.
+    As seções são montadas em paralelo; uma seção que falhar ou estourar o tempo é omitida.
     """
-    page_content = []
     if not thread_context:
         return None
+    if snapshot is None:
+        snapshot = await ThreadSnapshot.fetch_for_command(thread_context, config, command_name)
 
     # 1. Captura da Primeira Mensagem
-    if command_name in config.get('capture_first_message_for_commands', []):
-        first_message = await get_first_message(thread_context)
-        if first_message and first_message.content:
-            page_content.extend([
-                {"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "✉️ Mensagem Inicial"}}]}},
-                {"object": "block", "type": "quote", "quote": {"rich_text": notion_integration._convert_text_to_notion_rich_text_objects(first_message.content)}},
-                {"object": "block", "type": "divider", "divider": {}}
-            ])
+    async def first_message_blocks() -> List[Dict]:
+        if command_name not in config.get('capture_first_message_for_commands', []):
+            return []
+        first_message = await get_first_message(snapshot)
+        if not (first_message and first_message.content):
+            return []
+        return [
+            {"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "✉️ Mensagem Inicial"}}]}},
+            {"object": "block", "type": "quote", "quote": {"rich_text": notion_integration._convert_text_to_notion_rich_text_objects(first_message.content)}},
+            {"object": "block", "type": "divider", "divider": {}}
+        ]
 
     # 2. Resumo da IA
-    if command_name in config.get('ai_summary_for_commands', []):
-        messages = [msg async for msg in thread_context.history(limit=100)]
-        if messages:
-            summary_text = await summarize_thread_content(messages)
-            if summary_text and not summary_text.startswith("Erro:"):
-                page_content.append({"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "🤖 Resumo da IA"}}]}})
-                parsed_summary_blocks = notion_integration._parse_summary_to_notion_blocks(summary_text)
-                page_content.extend(parsed_summary_blocks)
+    async def summary_blocks() -> List[Dict]:
+        if command_name not in config.get('ai_summary_for_commands', []) or not snapshot.messages:
+            return []
+        summary_text = await summarize_thread_content(snapshot.messages, thread_id=thread_context.id, on_queue_position=on_queue_position)
+        if not summary_text or summary_text.startswith("Erro:"):
+            return []
+        return [{"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "🤖 Resumo da IA"}}]}}] \
+            + notion_integration._parse_summary_to_notion_blocks(summary_text)
 
     # 3. Anexos
-    attachments = await get_thread_attachments(thread_context)
-    if attachments:
-        if page_content:
-            page_content.append({"object": "block", "type": "divider", "divider": {}})
-        page_content.append({"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "📎 Anexos do Tópico"}}]}})
+    async def attachment_blocks() -> List[Dict]:
+        attachments = await get_thread_attachments(snapshot)
+        if not attachments:
+            return []
+        blocks = [{"object": "block", "type": "heading_2", "heading_2": {"rich_text": [{"type": "text", "text": {"content": "📎 Anexos do Tópico"}}]}}]
         for att in attachments:
             block_type = 'image' if att['type'] == 'image' else 'paragraph'
             content = {"type": "external", "external": {"url": att['url']}} if block_type == 'image' else {"rich_text": [{"type": "text", "text": {"content": f"Vídeo/GIF ({att['filename']}): "}}, {"type": "text", "text": {"content": att['url'], "link": {"url": att['url']}}}]}
-            page_content.append({"object": "block", "type": block_type, block_type: content})
+            blocks.append({"object": "block", "type": block_type, block_type: content})
+        return blocks
+
+    first_message, summary, attachments = await asyncio.gather(
+        run_stage("primeira mensagem", first_message_blocks(), PAGE_STAGE_TIMEOUT, default=[]),
+        run_stage("resumo da IA", summary_blocks(), AI_SUMMARY_STAGE_TIMEOUT, default=[]),
+        run_stage("anexos", attachment_blocks(), PAGE_STAGE_TIMEOUT, default=[]),
+    )
+
+    page_content = first_message + summary
+    if attachments:
+        if page_content:
+            page_content.append({"object": "block", "type": "divider", "divider": {}})
+        page_content.extend(attachments)
 
     return page_content if page_content else None
 
 
+def queue_position_notifier(interaction: Interaction) -> QueueCallback:
+    """Cria um callback que mostra ao usuário sua posição na fila do resumo por IA."""
+    async def notify(position: int):
+        try:
+            await interaction.edit_original_response(content=f"⏳ O resumo por IA está na fila (posição {position}). Aguarde, o card será criado em seguida...")
+        except discord.HTTPException:
+            pass
+    return notify
+
+
 async def start_editing_flow(interaction: Interaction, page_id_to_edit: str, config: dict, notion: NotionIntegration):
+    """
+    Sessão de edição de um card: as alterações ficam pendentes (com uma prévia do resultado)
+    e são salvas de uma só vez no final, depois de uma verificação de conflito.
+    """
     try:
-        all_db_props = notion.get_properties_for_interaction(config['notion_url'])
+        all_db_props, original_page = await asyncio.gather(
+            notion.get_properties_for_interaction(config['notion_url']),
+            notion.get_page(page_id_to_edit)
+        )
         editable_props = [p for p in all_db_props if p['name'] in config.get('create_properties', [])]
+        display_names = config.get('display_properties', [])
+        staged: Dict[str, Any] = {}  # {nome da propriedade: payload do Notion}
+
+        def preview_embed() -> Optional[discord.Embed]:
+            if not staged: return None
+            embed = notion.format_page_for_embed(notion.preview_page(original_page, staged), display_properties=display_names)
+            if embed:
+                embed.color = Color.orange()
+                embed.set_footer(text=f"Prévia — {len(staged)} alteração(ões) ainda não salva(s)")
+            return embed
 
         prop_msg = await interaction.followup.send("Iniciando edição...", ephemeral=True)
 
         while True:
             prop_select_view = View(timeout=180.0)
-            prop_select = Select(placeholder="Escolha uma propriedade para editar...", options=[SelectOption(label=p['name'], description=f"Tipo: {p['type']}") for p in editable_props[:25]])
+            prop_select = Select(placeholder="Escolha uma propriedade para editar...", options=[SelectOption(label=p['name'], description=f"Tipo: {p['type']}{' (alterada)' if p['name'] in staged else ''}") for p in editable_props[:25]])
             prop_select_view.add_item(prop_select)
 
-            await prop_msg.edit(content="Qual propriedade você quer alterar agora?", view=prop_select_view)
+            await prop_msg.edit(content="Qual propriedade você quer alterar agora?", embed=preview_embed(), view=prop_select_view)
 
             prop_choice_interaction = None
             async def prop_select_callback(inter: Interaction):
@@ -119,8 +289,9 @@ async def start_editing_flow(interaction: Interaction, page_id_to_edit: str, con
             await prop_select_view.wait()
 
             if prop_choice_interaction is None:
-                await prop_msg.edit(content="⌛ Edição cancelada ou tempo esgotado.", view=None)
-                break
+                discarded = " As alterações pendentes foram descartadas." if staged else ""
+                await prop_msg.edit(content=f"⌛ Edição cancelada ou tempo esgotado.{discarded}", embed=None, view=None)
+                return
 
             selected_prop_name = prop_select.values[0]
             selected_prop_details = next((p for p in editable_props if p['name'] == selected_prop_name), None)
@@ -170,20 +341,38 @@ async def start_editing_flow(interaction: Interaction, page_id_to_edit: str, con
                 await asyncio.sleep(5)
                 continue
 
-            await prop_msg.edit(content=f"⚙️ Atualizando propriedade...", view=None)
-            properties_payload = notion.build_update_payload(selected_prop_name, prop_type, new_value)
-            notion.update_page(page_id_to_edit, properties_payload)
+            properties_payload = await notion.build_update_payload(selected_prop_name, prop_type, new_value)
+            if not properties_payload:
+                await prop_msg.edit(content=f"❌ Valor inválido para **{selected_prop_name}**.", view=None)
+                await asyncio.sleep(5)
+                continue
+            staged.update(properties_payload)
 
             continue_view = ContinueEditingView(interaction.user.id)
-            await prop_msg.edit(content=f"✅ Propriedade **{selected_prop_name}** atualizada!\nDeseja continuar editando?", view=continue_view)
+            await prop_msg.edit(content=f"📝 **{selected_prop_name}** alterada (ainda não salva).\nDeseja continuar editando?", embed=preview_embed(), view=continue_view)
             await continue_view.wait()
 
-            if continue_view.choice == 'finish':
-                await prop_msg.edit(content="Finalizando...", view=None)
+            if continue_view.choice == 'discard':
+                await prop_msg.edit(content="🗑️ Alterações descartadas. O card não foi modificado.", embed=None, view=None)
+                return
+            if continue_view.choice != 'continue':
                 break
 
-        final_page_data = notion.get_page(page_id_to_edit)
-        display_names = config.get('display_properties', [])
+        await prop_msg.edit(content=f"⚙️ Salvando {len(staged)} alteração(ões)...", view=None)
+        try:
+            final_page_data = await notion.update_page_checked(page_id_to_edit, staged, original_page)
+        except NotionConflictError as e:
+            conflict_view = ConflictView(interaction.user.id)
+            await prop_msg.edit(
+                content=f"⚠️ **Conflito:** outra pessoa alterou {', '.join(f'**{name}**' for name in e.conflicting)} enquanto você editava.\nDeseja sobrescrever com os seus valores?",
+                embed=notion.format_page_for_embed(e.current_page, display_properties=display_names), view=conflict_view
+            )
+            await conflict_view.wait()
+            if not conflict_view.overwrite:
+                await prop_msg.edit(content="❌ Edição cancelada. As alterações não foram salvas.", embed=None, view=None)
+                return
+            final_page_data = await notion.update_page(page_id_to_edit, staged)
+
         final_embed = notion.format_page_for_embed(final_page_data, display_properties=display_names)
 
         if final_embed:
@@ -203,7 +392,7 @@ async def start_editing_flow(interaction: Interaction, page_id_to_edit: str, con
 
 # --- CLASSES DE UI ---
 
-class SelectView(View):
+class SelectView(TrackedView):
     def __init__(self, select_component: Select, author_id: int, timeout=180.0):
         super().__init__(timeout=timeout)
         self.select_component, self.author_id = select_component, author_id
@@ -214,18 +403,45 @@ class SelectView(View):
             return False
         return True
 
-class CardActionView(View):
-    def __init__(self, author_id: int, page_id: str, config: dict, notion: NotionIntegration):
-        super().__init__(timeout=None)
-        self.author_id, self.page_id, self.config, self.notion = author_id, page_id, config, notion
+def _config_for_interaction(interaction: Interaction) -> Optional[dict]:
+    """Configuração do canal da interação (em tópicos, a do canal pai)."""
+    channel = interaction.channel
+    config_channel_id = channel.parent_id if isinstance(channel, discord.Thread) else channel.id
+    return load_config(interaction.guild_id, config_channel_id)
 
-    @discord.ui.button(label="✏️ Editar", style=ButtonStyle.secondary)
-    async def edit_button(self, interaction: Interaction, button: Button):
+
+class CardEditButton(discord.ui.DynamicItem[Button], template=r'card:edit:(?P<page_id>[0-9a-fA-F-]{32,36})'):
+    """Botão "Editar" dos cards publicados; o estado vem do custom_id, então sobrevive a reinícios."""
+
+    def __init__(self, page_id: str):
+        super().__init__(Button(label="✏️ Editar", style=ButtonStyle.secondary, custom_id=f"card:edit:{page_id}"))
+        self.page_id = page_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: Interaction, item: Button, match):
+        return cls(match['page_id'])
+
+    async def callback(self, interaction: Interaction):
+        config = _config_for_interaction(interaction)
+        if not config or 'notion_url' not in config:
+            return await interaction.response.send_message("❌ O Notion não está configurado para este canal.", ephemeral=True)
         await interaction.response.send_message("Iniciando modo de edição para este card...", ephemeral=True)
-        await start_editing_flow(interaction, self.page_id, self.config, self.notion)
+        await start_editing_flow(interaction, self.page_id, config, interaction.client.notion)
 
-    @discord.ui.button(label="🗑️ Excluir", style=ButtonStyle.danger)
-    async def delete_button(self, interaction: Interaction, button: Button):
+
+class CardDeleteButton(discord.ui.DynamicItem[Button], template=r'card:delete:(?P<page_id>[0-9a-fA-F-]{32,36})'):
+    """Botão "Excluir" dos cards publicados; o estado vem do custom_id, então sobrevive a reinícios."""
+
+    def __init__(self, page_id: str):
+        super().__init__(Button(label="🗑️ Excluir", style=ButtonStyle.danger, custom_id=f"card:delete:{page_id}"))
+        self.page_id = page_id
+
+    @classmethod
+    async def from_custom_id(cls, interaction: Interaction, item: Button, match):
+        return cls(match['page_id'])
+
+    async def callback(self, interaction: Interaction):
+        page_id, notion = self.page_id, interaction.client.notion
         confirm_view = View(timeout=60.0)
         yes_button, no_button = Button(label="Sim, excluir!", style=ButtonStyle.danger), Button(label="Cancelar", style=ButtonStyle.secondary)
         confirm_view.add_item(yes_button); confirm_view.add_item(no_button)
@@ -234,13 +450,14 @@ class CardActionView(View):
             confirm_view.stop()
             try:
                 await inter.response.defer(ephemeral=True, thinking=True)
-                self.notion.delete_page(self.page_id)
-                for item in self.children: item.disabled = True
+                await notion.delete_page(page_id)
                 original_embed = interaction.message.embeds[0]
                 original_embed.title = f"[EXCLUÍDO] {original_embed.title}"
                 original_embed.color = Color.dark_gray()
                 original_embed.description = "Este card foi excluído."
-                await interaction.message.edit(embed=original_embed, view=self)
+                disabled_view = CardActionView(page_id, disabled=True)
+                await interaction.message.edit(embed=original_embed, view=disabled_view)
+                disabled_view.stop()
                 await inter.followup.send("✅ Card excluído com sucesso!", ephemeral=True)
             except Exception as e: await inter.followup.send(f"🔴 Erro ao excluir o card: {e}", ephemeral=True)
 
@@ -249,31 +466,153 @@ class CardActionView(View):
         await interaction.response.send_message("⚠️ **Você tem certeza que deseja excluir este card?**", view=confirm_view, ephemeral=True)
 
 
-class PaginationView(View):
-    def __init__(self, author: discord.Member, results: list, config: dict, notion: NotionIntegration, actions: List[str] = []):
+class CardActionView(TrackedView):
+    """
+    Botões de ação dos cards publicados. Os cliques são tratados pelos DynamicItems registrados no bot,
+    então a view só é usada para enviar a mensagem: use `send_card_with_actions`, que a descarta em seguida.
+    """
+
+    def __init__(self, page_id: str, disabled: bool = False):
+        super().__init__(timeout=None)
+        for button in (CardEditButton(page_id), CardDeleteButton(page_id)):
+            button.item.disabled = disabled
+            self.add_item(button)
+
+
+async def send_card_with_actions(destination: discord.abc.Messageable, config: dict, page_id: str, **kwargs) -> discord.Message:
+    """Envia um card com os botões de ação (se ativados) sem manter uma view em memória."""
+    view = CardActionView(page_id) if config.get('action_buttons_enabled', True) else None
+    if view: kwargs["view"] = view
+    message = await destination.send(**kwargs)
+    if view:
+        # Remove a view do ViewStore do discord.py: os botões continuam funcionando pelos DynamicItems
+        view.stop()
+    return message
+
+
+class PaginationView(TrackedView):
+    def __init__(self, author: discord.Member, results: list, config: dict, notion: NotionIntegration, actions: List[str] = [], result_stream: Optional[AsyncIterator[List[Dict]]] = None):
         super().__init__(timeout=300.0)
-        self.author, self.results, self.config, self.actions = author, results, config, actions
-        self.notion, self.current_page, self.total_pages = notion, 0, len(results)
+        self.author, self.results, self.config, self.actions = author, list(results), config, actions
+        self.notion, self.current_page = notion, 0
+        # Lotes seguintes da busca: só são buscados no Notion quando o usuário chega ao fim do que já está em memória
+        self.result_stream = result_stream
+        self._fetch_lock = asyncio.Lock()
+        self._prefetch_task: Optional[asyncio.Task] = None
+        # Embeds renderidos: {(page_id, last_edited_time): embed}, em ordem de uso (LRU)
+        self._embeds: OrderedDict = OrderedDict()
+        self._prerender_handle: Optional[asyncio.Handle] = None
         if 'edit' not in self.actions: self.remove_item(self.edit_button)
         if 'delete' not in self.actions: self.remove_item(self.delete_button)
         if 'share' not in self.actions: self.remove_item(self.share_button)
 
+    @classmethod
+    async def from_search(cls, author: discord.Member, config: dict, notion: NotionIntegration, search_term: str, property_name: Union[str, List[str]], property_type: str, actions: List[str] = []) -> Optional["PaginationView"]:
+        """Cria a view a partir do primeiro lote de uma busca; retorna None se não houver resultados."""
+        stream = notion.iter_search_results(config['notion_url'], search_term, property_name, property_type, display_properties=config.get('display_properties') or None)
+        try:
+            with metrics.timer("stage_duration_seconds", stage="busca.consulta"):
+                first_batch = await stream.__anext__()
+        except StopAsyncIteration:
+            return None
+        view = cls(author, first_batch, config, notion, actions=actions, result_stream=stream)
+        view.update_nav_buttons()
+        return view
+
+    @property
+    def total_pages(self) -> int: return len(self.results)
+
+    @property
+    def has_more(self) -> bool: return self.result_stream is not None
+
+    def results_summary(self) -> str:
+        return f"✅ **{self.total_pages}{'+' if self.has_more else ''}** resultado(s) encontrado(s)!"
+
+    async def _fetch_next_batch(self):
+        async with self._fetch_lock:
+            if self.result_stream is None: return
+            try:
+                self.results.extend(await self.result_stream.__anext__())
+            except StopAsyncIteration:
+                self.result_stream = None
+
+    async def _prefetch(self):
+        try:
+            await self._fetch_next_batch()
+        except NotionAPIError as e:
+            print(f"Erro ao buscar a próxima página de resultados: {e}")
+
+    def _maybe_prefetch(self):
+        """Busca o próximo lote em segundo plano quando o usuário se aproxima do fim do buffer."""
+        if self.has_more and self.current_page >= self.total_pages - 2 and (self._prefetch_task is None or self._prefetch_task.done()):
+            self._prefetch_task = asyncio.create_task(self._prefetch())
+
+    def _release_embeds(self):
+        if self._prerender_handle:
+            self._prerender_handle.cancel()
+            self._prerender_handle = None
+        self._embeds.clear()
+
+    def stop(self):
+        super().stop()
+        self._release_embeds()
+
+    async def on_timeout(self):
+        self._release_embeds()
+        self.results.clear()
+        if self._prefetch_task and not self._prefetch_task.done():
+            self._prefetch_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._prefetch_task
+        if self.result_stream is not None:
+            await self.result_stream.aclose()
+            self.result_stream = None
+
     async def interaction_check(self, interaction: Interaction) -> bool:
         if interaction.user.id != self.author.id:
             await interaction.response.send_message("Você não pode interagir com os botões de outra pessoa.", ephemeral=True)
             return False
         return True
 
-    def get_current_page_data(self): return self.results[self.current_page]
+    def _page_data(self, index: int):
+        # Se a página foi editada depois da busca, a versão mais recente está no cache do NotionIntegration
+        page = self.results[index]
+        return self.notion.get_cached_page(page['id']) or page
+
+    def get_current_page_data(self): return self._page_data(self.current_page)
+
+    def _render(self, index: int) -> discord.Embed:
+        """Embed do resultado `index`, reaproveitado enquanto a página não for editada."""
+        page_data = self._page_data(index)
+        key = (page_data['id'], page_data.get('last_edited_time'))
+        embed = self._embeds.get(key)
+        if embed is None:
+            embed = self.notion.format_page_for_embed(page_result=page_data, display_properties=self.config.get('display_properties', []), include_footer=True)
+            self._embeds[key] = embed
+            while len(self._embeds) > EMBED_CACHE_SIZE:
+                self._embeds.popitem(last=False)
+        else:
+            self._embeds.move_to_end(key)
+        return embed
+
+    def _prerender(self):
+        """Renderiza os próximos resultados depois que a resposta atual já foi enviada."""
+        self._prerender_handle = None
+        for index in range(self.current_page + 1, min(self.current_page + 1 + EMBED_PRERENDER_AHEAD, self.total_pages)):
+            self._render(index)
 
     async def get_page_embed(self) -> discord.Embed:
-        embed = self.notion.format_page_for_embed(page_result=self.get_current_page_data(), display_properties=self.config.get('display_properties', []), include_footer=True)
-        embed.set_footer(text=f"Card {self.current_page + 1} de {self.total_pages}")
+        # Cópia: o rodapé muda com a posição e não pode ficar gravado no embed em cache
+        embed = self._render(self.current_page).copy()
+        embed.set_footer(text=f"Card {self.current_page + 1} de {self.total_pages}{'+' if self.has_more else ''}")
+        if self._prerender_handle is None:
+            self._prerender_handle = asyncio.get_running_loop().call_soon(self._prerender)
         return embed
 
     def update_nav_buttons(self):
         self.previous_button.disabled = self.current_page == 0
-        self.next_button.disabled = self.current_page >= self.total_pages - 1
+        self.next_button.disabled = self.current_page >= self.total_pages - 1 and not self.has_more
+        self._maybe_prefetch()
 
     @discord.ui.button(label="⬅️", style=ButtonStyle.secondary, row=0)
     async def previous_button(self, interaction: Interaction, button: Button):
@@ -283,6 +622,13 @@ class PaginationView(View):
 
     @discord.ui.button(label="➡️", style=ButtonStyle.secondary, row=0)
     async def next_button(self, interaction: Interaction, button: Button):
+        if self.current_page >= self.total_pages - 1 and self.has_more:
+            try:
+                await self._fetch_next_batch()
+            except NotionAPIError as e:
+                # Continua no card atual; o usuário pode tentar avançar de novo
+                print(f"Erro ao buscar a próxima página de resultados: {e}")
+                return await interaction.response.send_message(f"🔴 Não foi possível carregar mais resultados: {e}", ephemeral=True)
         if self.current_page < self.total_pages - 1: self.current_page += 1
         self.update_nav_buttons()
         await interaction.response.edit_message(embed=await self.get_page_embed(), view=self)
@@ -302,7 +648,7 @@ class PaginationView(View):
         async def yes_callback(inter: Interaction):
             await inter.response.defer(ephemeral=True, thinking=True)
             try:
-                self.notion.delete_page(page_id)
+                await self.notion.delete_page(page_id)
                 await interaction.edit_original_response(content="✅ Card excluído com sucesso.", view=None, embed=None)
                 await inter.followup.send("Confirmado!", ephemeral=True)
             except Exception as e: await inter.followup.send(f"🔴 Erro ao excluir: {e}", ephemeral=True)
@@ -317,8 +663,7 @@ class PaginationView(View):
         page_data = self.get_current_page_data()
         share_embed = self.notion.format_page_for_embed(page_data, self.config.get('display_properties', []))
         if share_embed:
-            action_view = CardActionView(interaction.user.id, page_data['id'], self.config, self.notion) if self.config.get('action_buttons_enabled', True) else None
-            await interaction.channel.send(f"{interaction.user.mention} compartilhou:", embed=share_embed, view=action_view)
+            await send_card_with_actions(interaction.channel, self.config, page_data['id'], content=f"{interaction.user.mention} compartilhou:", embed=share_embed)
             await interaction.followup.send("✅ Card exibido no canal!", ephemeral=True)
         else: await interaction.followup.send("❌ Não foi possível gerar o embed.", ephemeral=True)
 
@@ -326,25 +671,22 @@ class PaginationView(View):
 class SearchModal(Modal):
     def __init__(self, notion: NotionIntegration, config: dict, selected_property: dict):
         self.notion, self.config, self.selected_property = notion, config, selected_property
-        super().__init__(title=f"Buscar por '{self.selected_property['name']}'")
+        super().__init__(title=f"Buscar por '{self.selected_property.get('label') or self.selected_property['name']}'"[:45])
         self.search_term_input = TextInput(label="Digite o termo para procurar", style=discord.TextStyle.short, placeholder="Ex: 'Card de Teste'", required=True)
         self.add_item(self.search_term_input)
 
     async def on_submit(self, interaction: Interaction):
         await interaction.response.defer(thinking=True, ephemeral=True)
         try:
-            cards = self.notion.search_in_database(self.config['notion_url'], self.search_term_input.value, self.selected_property['name'], self.selected_property['type'])
-            results = cards.get('results', [])
-            if not results: return await interaction.followup.send(f"❌ Nenhum resultado para **'{self.search_term_input.value}'**.", ephemeral=True)
+            view = await PaginationView.from_search(interaction.user, self.config, self.notion, self.search_term_input.value, self.selected_property['name'], self.selected_property['type'], actions=['edit', 'delete', 'share'])
+            if not view: return await interaction.followup.send(f"❌ Nenhum resultado para **'{self.search_term_input.value}'**.", ephemeral=True)
             
-            await interaction.followup.send(f"✅ **{len(results)}** resultado(s) encontrado(s)!", ephemeral=True)
-            view = PaginationView(interaction.user, results, self.config, self.notion, actions=['edit', 'delete', 'share'])
-            view.update_nav_buttons()
+            await interaction.followup.send(view.results_summary(), ephemeral=True)
             await interaction.followup.send(embed=await view.get_page_embed(), view=view, ephemeral=True)
         except Exception as e: await interaction.followup.send(f"🔴 **Erro inesperado:**\n`{e}`", ephemeral=True)
 
 
-class PublishView(View):
+class PublishView(TrackedView):
     def __init__(self, author_id: int, embed_to_publish: discord.Embed, page_id: str, config: dict, notion: NotionIntegration):
         super().__init__(timeout=300.0)
         self.author_id, self.embed, self.page_id, self.config, self.notion = author_id, embed_to_publish, page_id, config, notion
@@ -364,16 +706,15 @@ class PublishView(View):
         else:
             await interaction.response.edit_message(content="✅ Card publicado no tópico!", view=self)
 
-        action_view = CardActionView(self.author_id, self.page_id, self.config, self.notion) if self.config.get('action_buttons_enabled', True) else None
-        await interaction.channel.send(embed=self.embed, view=action_view)
+        await send_card_with_actions(interaction.channel, self.config, self.page_id, embed=self.embed)
         self.stop()
 
 
-class CardSelectPropertiesView(View):
-    def __init__(self, author_id: int, config: dict, all_properties: list, select_props: list, collected_from_modal: dict, thread_context: Optional[discord.Thread], notion: NotionIntegration):
+class CardSelectPropertiesView(TrackedView):
+    def __init__(self, author_id: int, config: dict, all_properties: list, select_props: list, collected_from_modal: dict, thread_context: Optional[discord.Thread], notion: NotionIntegration, job_queue: "CardJobQueue"):
         super().__init__(timeout=300.0)
         self.author_id, self.config, self.all_properties, self.select_props = author_id, config, all_properties, select_props
-        self.collected_properties, self.thread_context, self.notion = collected_from_modal.copy(), thread_context, notion
+        self.collected_properties, self.thread_context, self.notion, self.job_queue = collected_from_modal.copy(), thread_context, notion, job_queue
 
         for prop in self.select_props:
             options = [SelectOption(label=opt) for opt in prop.get('options', [])[:25]]
@@ -407,31 +748,19 @@ class CardSelectPropertiesView(View):
             
             if self.config.get('individual_person_prop'): self.collected_properties[self.config.get('individual_person_prop')] = interaction.user.display_name
             if self.config.get('topic_link_property_name') and self.thread_context: self.collected_properties[self.config.get('topic_link_property_name')] = self.thread_context.jump_url
-            if self.config.get('collective_person_prop') and self.thread_context:
-                participants = await get_topic_participants(self.thread_context)
-                self.collected_properties[self.config.get('collective_person_prop')] = [uid for uid in [self.notion.search_id_person(m.display_name) for m in participants] if uid]
-
-            page_content = await _build_notion_page_content(self.config, self.thread_context, self.notion, command_name="card")
-            page_properties = self.notion.build_page_properties(self.config['notion_url'], title_value, self.collected_properties)
-            response = self.notion.insert_into_database(self.config['notion_url'], page_properties, children=page_content)
-
-            if self.config.get('rename_topic_enabled') and self.thread_context and not self.thread_context.name.startswith("[Card]"):
-                await self.thread_context.edit(name=f"[Card] {self.thread_context.name}")
 
-            await interaction.edit_original_response(content="✅ Card criado! Veja abaixo.", view=None)
-            success_embed = self.notion.format_page_for_embed(response, self.config.get('display_properties', []))
-            success_embed.title = f"✅ Card '{success_embed.title.replace('📌 ', '')}' Criado!"
-            success_embed.color = Color.purple()
-            publish_view = PublishView(interaction.user.id, success_embed, response['id'], self.config, self.notion)
-            await interaction.followup.send("Use o botão para exibir para todos.", embed=success_embed, view=publish_view, ephemeral=True)
+            # Participantes, conteúdo e criação da página rodam em segundo plano (card_jobs)
+            await self.job_queue.enqueue(interaction, "card", title_value, self.collected_properties)
+            await interaction.edit_original_response(content="⏳ Criando o card... Você será avisado aqui assim que ele estiver pronto.", view=None)
 
         except Exception as e: await interaction.followup.send(f"🔴 **Erro inesperado:**\n`{e}`", ephemeral=True)
 
 
 class CardModal(Modal):
-    def __init__(self, notion: NotionIntegration, config: dict, all_properties: list, text_props: list, select_props: list, thread_context: Optional[discord.Thread], topic_title: Optional[str]):
+    def __init__(self, notion: NotionIntegration, config: dict, all_properties: list, text_props: list, select_props: list, thread_context: Optional[discord.Thread], topic_title: Optional[str], job_queue: "CardJobQueue"):
         super().__init__(title="Criar Novo Card (Etapa 1)")
         self.notion, self.config, self.all_properties, self.text_props, self.select_props, self.thread_context = notion, config, all_properties, text_props, select_props, thread_context
+        self.job_queue = job_queue
         self.text_inputs = {}
         for prop in self.text_props:
             style = discord.TextStyle.paragraph if any(k in prop['name'].lower() for k in ["desc", "detalhe"]) else discord.TextStyle.short
@@ -449,31 +778,19 @@ class CardModal(Modal):
 
                 if self.config.get('individual_person_prop'): collected[self.config.get('individual_person_prop')] = interaction.user.display_name
                 if self.config.get('topic_link_property_name') and self.thread_context: collected[self.config.get('topic_link_property_name')] = self.thread_context.jump_url
-                if self.config.get('collective_person_prop') and self.thread_context:
-                     participants = await get_topic_participants(self.thread_context)
-                     collected[self.config.get('collective_person_prop')] = [uid for uid in [self.notion.search_id_person(m.display_name) for m in participants] if uid]
-
-                page_content = await _build_notion_page_content(self.config, self.thread_context, self.notion, command_name="card")
-                page_properties = self.notion.build_page_properties(self.config['notion_url'], title_value, collected)
-                response = self.notion.insert_into_database(self.config['notion_url'], page_properties, children=page_content)
-                
-                if self.config.get('rename_topic_enabled') and self.thread_context and not self.thread_context.name.startswith("[Card]"):
-                    await self.thread_context.edit(name=f"[Card] {self.thread_context.name}")
-
-                final_embed = self.notion.format_page_for_embed(response, self.config.get('display_properties', []))
-                final_embed.title = f"✅ Card '{final_embed.title.replace('📌 ', '')}' Criado!"
-                final_embed.color = Color.purple()
-                publish_view = PublishView(interaction.user.id, final_embed, response['id'], self.config, self.notion)
-                await interaction.followup.send("Card criado! Use o botão para exibir.", embed=final_embed, view=publish_view, ephemeral=True)
+
+                # Participantes, conteúdo e criação da página rodam em segundo plano (card_jobs)
+                await self.job_queue.enqueue(interaction, "card", title_value, collected)
+                await interaction.followup.send("⏳ Criando o card... Você será avisado aqui assim que ele estiver pronto.", ephemeral=True)
 
             except Exception as e: await interaction.followup.send(f"🔴 Erro ao criar card: {e}", ephemeral=True)
         else:
             await interaction.edit_original_response(content="📝 Etapa 1/2 concluída. Agora, selecione os valores abaixo.", view=None)
-            view = CardSelectPropertiesView(interaction.user.id, self.config, self.all_properties, self.select_props, collected, self.thread_context, self.notion)
+            view = CardSelectPropertiesView(interaction.user.id, self.config, self.all_properties, self.select_props, collected, self.thread_context, self.notion, self.job_queue)
             await interaction.followup.send(view=view, ephemeral=True)
 
 
-class ContinueEditingView(View):
+class ContinueEditingView(TrackedView):
     def __init__(self, author_id: int):
         super().__init__(timeout=180.0)
         self.author_id, self.choice = author_id, None
@@ -487,14 +804,39 @@ class ContinueEditingView(View):
         self.choice = 'continue'
         await interaction.response.edit_message(content="Continuando...", view=None)
         self.stop()
-    @discord.ui.button(label="✅ Concluir", style=ButtonStyle.success)
+    @discord.ui.button(label="✅ Salvar e concluir", style=ButtonStyle.success)
     async def finish_editing(self, interaction: Interaction, button: Button):
         self.choice = 'finish'
         await interaction.response.edit_message(content="Finalizando...", view=None)
         self.stop()
+    @discord.ui.button(label="🗑️ Descartar", style=ButtonStyle.danger)
+    async def discard_editing(self, interaction: Interaction, button: Button):
+        self.choice = 'discard'
+        await interaction.response.edit_message(content="Descartando...", view=None)
+        self.stop()
 
 
-class PersonSelectView(View):
+class ConflictView(TrackedView):
+    def __init__(self, author_id: int):
+        super().__init__(timeout=180.0)
+        self.author_id, self.overwrite = author_id, False
+    async def interaction_check(self, interaction: Interaction) -> bool:
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message("Você não pode interagir com o menu de outra pessoa.", ephemeral=True)
+            return False
+        return True
+    @discord.ui.button(label="Sobrescrever", style=ButtonStyle.danger)
+    async def overwrite_button(self, interaction: Interaction, button: Button):
+        self.overwrite = True
+        await interaction.response.edit_message(content="⚙️ Salvando...", view=None)
+        self.stop()
+    @discord.ui.button(label="Cancelar", style=ButtonStyle.secondary)
+    async def cancel_button(self, interaction: Interaction, button: Button):
+        await interaction.response.edit_message(content="Cancelando...", view=None)
+        self.stop()
+
+
+class PersonSelectView(TrackedView):
     def __init__(self, guild_id: int, channel_id: int, compatible_props: list, config_key: str):
         super().__init__(timeout=180.0)
         options = [SelectOption(label=p['name'], description=f"Tipo: {p['type']}") for p in compatible_props[:25]]
@@ -506,7 +848,7 @@ class PersonSelectView(View):
         self.add_item(prop_select)
 
 
-class TopicLinkView(View):
+class TopicLinkView(TrackedView):
     def __init__(self, guild_id: int, channel_id: int, compatible_props: list):
         super().__init__(timeout=180.0)
         options = [SelectOption(label=p['name'], description=f"Tipo: {p['type']}") for p in compatible_props[:25]]
@@ -518,194 +860,7 @@ class TopicLinkView(View):
         self.add_item(prop_select)
 
 
-class ResolvedPropertyDefaultModal(Modal, title="Definir Valor Padrão"):
-    def __init__(self, property_name: str, current_value: Optional[str] = None):
-        super().__init__()
-        self.property_name = property_name
-        self.value_input = TextInput(
-            label=f"Valor para '{property_name}'",
-            placeholder="Ex: Concluído, Finalizado, etc.",
-            default=current_value,
-            required=True
-        )
-        self.add_item(self.value_input)
-
-    async def on_submit(self, interaction: Interaction):
-        self.value = self.value_input.value
-        await interaction.response.defer()
-        self.stop()
-
-class ResolvedConfigView(View):
-    def __init__(self, parent_interaction: Interaction, notion: NotionIntegration, config: dict):
-        super().__init__(timeout=180.0)
-        self.parent_interaction = parent_interaction
-        self.guild_id = parent_interaction.guild_id
-        self.channel_id = parent_interaction.channel.parent_id if isinstance(parent_interaction.channel, discord.Thread) else parent_interaction.channel.id
-        self.notion = notion
-        self.config = config
-        self.all_db_properties = self.notion.get_properties_for_interaction(self.config['notion_url'])
-
-    async def _update_message(self, interaction: Interaction):
-        self.config = load_config(self.guild_id, self.channel_id)
-        defaults = self.config.get('resolved_command_defaults', {})
-        
-        embed = discord.Embed(title="⚙️ Configuração do /resolvido", color=Color.orange())
-        if not defaults:
-            embed.description = "Nenhuma propriedade com valor padrão foi configurada ainda."
-        else:
-            desc = "Quando `/resolvido` for usado, as seguintes propriedades serão definidas:\n\n"
-            for key, value in defaults.items():
-                if isinstance(value, list): value_str = ", ".join(f"`{v}`" for v in value)
-                else: value_str = f"`{value}`"
-                desc += f"🔹 **{key}**: {value_str}\n"
-            embed.description = desc
-        
-        await self.parent_interaction.edit_original_response(embed=embed, view=self)
-
-
-    @discord.ui.button(label="Adicionar/Editar Propriedade", style=ButtonStyle.success, emoji="➕")
-    async def add_property(self, interaction: Interaction, button: Button):
-        
-        prop_options = [SelectOption(label=p['name']) for p in self.all_db_properties if p['type'] != 'title']
-        prop_select = Select(placeholder="Escolha a propriedade para definir um valor...", options=prop_options[:25])
-
-        async def select_callback(inter: Interaction):
-            selected_prop_name = inter.data['values'][0]
-            prop_details = next((p for p in self.all_db_properties if p['name'] == selected_prop_name), None)
-            
-            if prop_details and prop_details['type'] in ['select', 'multi_select', 'status']:
-                options = prop_details.get('options', [])
-                is_multi = prop_details['type'] == 'multi_select'
-                
-                value_select = Select(
-                    placeholder=f"Escolha o valor padrão para '{selected_prop_name}'...",
-                    options=[SelectOption(label=opt) for opt in options[:25]],
-                    max_values=len(options) if is_multi else 1
-                )
-
-                async def value_select_callback(value_inter: Interaction):
-                    chosen_value = value_inter.data['values']
-                    current_defaults = self.config.get('resolved_command_defaults', {})
-                    current_defaults[selected_prop_name] = chosen_value if is_multi else chosen_value[0]
-                    save_config(self.guild_id, self.channel_id, {'resolved_command_defaults': current_defaults})
-                    await value_inter.response.edit_message(content=f"✅ Valor padrão para **{selected_prop_name}** salvo!", view=None, delete_after=5)
-                    await self._update_message(interaction)
-
-                value_select.callback = value_select_callback
-                view = View().add_item(value_select)
-                await inter.response.edit_message(content="Agora, escolha o valor padrão:", view=view)
-
-            else:
-                current_defaults = self.config.get('resolved_command_defaults', {})
-                modal = ResolvedPropertyDefaultModal(selected_prop_name, current_defaults.get(selected_prop_name))
-                await inter.response.send_modal(modal)
-                await modal.wait()
-
-                if hasattr(modal, 'value'):
-                    current_defaults[selected_prop_name] = modal.value
-                    save_config(self.guild_id, self.channel_id, {'resolved_command_defaults': current_defaults})
-                    await inter.followup.send(f"✅ Valor padrão para **{selected_prop_name}** salvo!", ephemeral=True, delete_after=5)
-                    await self._update_message(interaction)
-        
-        prop_select.callback = select_callback
-        view = View().add_item(prop_select)
-        await interaction.response.send_message("Primeiro, selecione a propriedade:", view=view, ephemeral=True)
-
-
-    @discord.ui.button(label="Remover Propriedade", style=ButtonStyle.danger, emoji="🗑️")
-    async def remove_property(self, interaction: Interaction, button: Button):
-        defaults = self.config.get('resolved_command_defaults', {})
-        if not defaults:
-            return await interaction.response.send_message("❌ Nenhuma propriedade configurada para remover.", ephemeral=True, delete_after=10)
-
-        prop_options = [SelectOption(label=name) for name in defaults.keys()]
-        prop_select = Select(placeholder="Escolha a propriedade para remover...", options=prop_options[:25])
-
-        async def select_callback(inter: Interaction):
-            prop_to_remove = inter.data['values'][0]
-            current_defaults = self.config.get('resolved_command_defaults', {})
-            if prop_to_remove in current_defaults:
-                del current_defaults[prop_to_remove]
-                save_config(self.guild_id, self.channel_id, {'resolved_command_defaults': current_defaults})
-                await inter.response.send_message(f"✅ Propriedade **{prop_to_remove}** removida.", ephemeral=True, delete_after=5)
-                await self._update_message(interaction)
-        
-        prop_select.callback = select_callback
-        view = View().add_item(prop_select)
-        await interaction.response.send_message("Selecione a propriedade para remover:", view=view, ephemeral=True)
-
-
-    @discord.ui.button(label="Voltar", style=ButtonStyle.secondary, emoji="↩️")
-    async def go_back(self, interaction: Interaction, button: Button):
-        await interaction.response.defer()
-        main_view = ManagementView(self.parent_interaction, self.notion, self.config)
-        await self.parent_interaction.edit_original_response(content="Este canal já está configurado. Escolha uma opção de gerenciamento:", embed=None, view=main_view)
-
-class CardContentView(View):
-    def __init__(self, parent_interaction: Interaction, notion: NotionIntegration, config: dict):
-        super().__init__(timeout=180.0)
-        self.parent_interaction = parent_interaction
-        self.guild_id = parent_interaction.guild_id
-        self.channel_id = parent_interaction.channel.parent_id if isinstance(parent_interaction.channel, discord.Thread) else parent_interaction.channel.id
-        self.notion = notion
-        self.config = config
-        self._update_buttons()
-
-    def _update_buttons(self):
-        self.clear_items()
-        self.add_item(Button(label="Configurar Resumo por IA", custom_id="config_ai_summary", style=ButtonStyle.secondary, emoji="✨"))
-        self.add_item(Button(label="Configurar Captura de 1ª Mensagem", custom_id="config_first_message", style=ButtonStyle.secondary, emoji="✉️"))
-        self.add_item(Button(label="Voltar", custom_id="back_to_main", style=ButtonStyle.grey, row=2))
-
-    async def interaction_check(self, interaction: Interaction) -> bool:
-        # CORREÇÃO APLICADA AQUI
-        custom_id = interaction.data.get('custom_id')
-
-        if custom_id == "config_ai_summary":
-            await self.configure_feature(interaction, 'ai_summary_for_commands', 'Resumo por IA')
-            return False 
-        elif custom_id == "config_first_message":
-            await self.configure_feature(interaction, 'capture_first_message_for_commands', 'Captura da 1ª Mensagem')
-            return False
-        elif custom_id == "back_to_main":
-            main_view = ManagementView(self.parent_interaction, self.notion, self.config)
-            await self.parent_interaction.edit_original_response(content="Este canal já está configurado. Escolha uma opção de gerenciamento:", embed=None, view=main_view)
-            await interaction.response.defer()
-            return False
-        return True
-
-    async def configure_feature(self, interaction: Interaction, config_key: str, feature_name: str):
-        current_setting = self.config.get(config_key, [])
-        options = [
-            SelectOption(label="/card", value="card", default=("card" in current_setting)),
-            SelectOption(label="/resolvido", value="resolvido", default=("resolvido" in current_setting))
-        ]
-        select_menu = Select(placeholder=f"Ativar {feature_name} para...", options=options, min_values=0, max_values=2, custom_id=f"select_{config_key}")
-
-        async def select_callback(inter: Interaction):
-            save_config(self.guild_id, self.channel_id, {config_key: inter.data.get('values', [])})
-            self.config = load_config(self.guild_id, self.channel_id)
-            await inter.response.edit_message(content=f"✅ Configuração de **{feature_name}** atualizada!", view=None, delete_after=5)
-            await self.update_embed(self.parent_interaction)
-
-        select_menu.callback = select_callback
-        view = View().add_item(select_menu)
-        await interaction.response.send_message(f"Selecione para quais comandos a função **{feature_name}** deve ser ativada.", view=view, ephemeral=True)
-
-    async def update_embed(self, interaction: Interaction):
-        ai_commands = self.config.get('ai_summary_for_commands', [])
-        fm_commands = self.config.get('capture_first_message_for_commands', [])
-        ai_status = ", ".join(f"`/{cmd}`" for cmd in ai_commands) if ai_commands else "Nenhum"
-        fm_status = ", ".join(f"`/{cmd}`" for cmd in fm_commands) if fm_commands else "Nenhum"
-        
-        embed = discord.Embed(title="⚙️ Configurar Conteúdo do Card", color=Color.blue())
-        embed.add_field(name="Resumo por IA", value=f"Ativado para: {ai_status}", inline=False)
-        embed.add_field(name="Captura da 1ª Mensagem", value=f"Ativado para: {fm_status}", inline=False)
-        
-        await self.parent_interaction.edit_original_response(embed=embed, view=self)
-
-
-class ManagementView(View):
+class ManagementView(TrackedView):
     def __init__(self, parent_interaction: Interaction, notion: NotionIntegration, config: dict):
         super().__init__(timeout=180.0)
         self.parent_interaction = parent_interaction
@@ -748,13 +903,14 @@ class ManagementView(View):
 
     @discord.ui.button(label="Conteúdo do Card", style=ButtonStyle.secondary, emoji="📝", row=1)
     async def manage_content(self, interaction: Interaction, button: Button):
+        from config_views import CardContentView
         view = CardContentView(interaction, self.notion, self.config)
         await interaction.response.defer()
         await view.update_embed(interaction)
 
     @discord.ui.button(label="Configurar Link de Tópico", style=ButtonStyle.secondary, emoji="🔗", row=2)
     async def configure_topic_link(self, interaction: Interaction, button: Button):
-        all_props = self.notion.get_properties_for_interaction(self.config['notion_url'])
+        all_props = await self.notion.get_properties_for_interaction(self.config['notion_url'])
         compat_props = [p for p in all_props if p['type'] in ['rich_text', 'url']]
         if not compat_props: return await interaction.response.send_message("❌ Nenhuma propriedade compatível (Texto/URL) encontrada.", ephemeral=True)
         view = TopicLinkView(self.guild_id, self.channel_id, compat_props)
@@ -762,7 +918,7 @@ class ManagementView(View):
 
     @discord.ui.button(label="Definir Dono do Card", style=ButtonStyle.secondary, emoji="👤", row=3)
     async def configure_individual_person(self, interaction: Interaction, button: Button):
-        all_props = self.notion.get_properties_for_interaction(self.config['notion_url'])
+        all_props = await self.notion.get_properties_for_interaction(self.config['notion_url'])
         people_props = [p for p in all_props if p['type'] == 'people']
         if not people_props: return await interaction.response.send_message("❌ Nenhuma propriedade 'Pessoa' encontrada.", ephemeral=True)
         view = PersonSelectView(self.guild_id, self.channel_id, people_props, 'individual_person_prop')
@@ -770,7 +926,7 @@ class ManagementView(View):
 
     @discord.ui.button(label="Definir Envolvidos do Tópico", style=ButtonStyle.secondary, emoji="👥", row=3)
     async def configure_collective_person(self, interaction: Interaction, button: Button):
-        all_props = self.notion.get_properties_for_interaction(self.config['notion_url'])
+        all_props = await self.notion.get_properties_for_interaction(self.config['notion_url'])
         people_props = [p for p in all_props if p['type'] == 'people']
         if not people_props: return await interaction.response.send_message("❌ Nenhuma propriedade 'Pessoa' encontrada.", ephemeral=True)
         view = PersonSelectView(self.guild_id, self.channel_id, people_props, 'collective_person_prop')
@@ -778,6 +934,8 @@ class ManagementView(View):
     
     @discord.ui.button(label="Configurar /resolvido", style=ButtonStyle.primary, emoji="✅", row=4)
     async def configure_resolved_command(self, interaction: Interaction, button: Button):
-        view = ResolvedConfigView(interaction, self.notion, self.config)
         await interaction.response.defer()
+        all_db_properties = await self.notion.get_properties_for_interaction(self.config['notion_url'])
+        from config_views import ResolvedConfigView
+        view = ResolvedConfigView(interaction, self.notion, self.config, all_db_properties)
         await view._update_message(interaction)
\ No newline at end of file